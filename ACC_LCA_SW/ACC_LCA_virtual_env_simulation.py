@@ -1,43 +1,184 @@
+import argparse
+import json
 import random
-import time
-import matplotlib.pyplot as plt
+import numpy as np
+from instrumentation import Instrumentation, profile_call
+from live_dashboard import LiveDashboard
+from sim_clock import MODES, SimClock
+from trace_buffer import Lane, TraceBuffer
+from traffic_world import TrafficWorld
+
+# cm; the prototype sketch's SAFETY_DISTANCE for its front centre ultrasonic sensor
+SENSOR_SAFETY_DISTANCE = 20
+
+# Controller attributes that change from step to step (see get_state)
+STATE_FIELDS = (
+    'step_counter', 'current_lane', 'current_speed', 'lane_change_cooldown', 'obstacle_cooldown',
+    'obstacle_count', 'overtake_count', 'lane_change_count',
+    'speed_sum', 'min_speed', 'max_speed', 'obstacle_steps', 'position',
+)
 
 class EnhancedCruiseControl:
-    def __init__(self):
-        self.cruise_speed = float(input("ENTER INITIAL CRUISE SPEED (KM/HR): "))
-        self.current_lane = random.randint(1, 3)
+    def __init__(self, cruise_speed=None, seed=None, steps=500, safety_distance=200,
+                 radar_range=250, verbose=True, accel_step=5, scenario_weights=(4, 2, 2),
+                 trace_path=None, dt=0.1, world=None):
+        """cruise_speed is asked for on stdin when not given. seed makes the run
+        reproducible; verbose=False silences the per-step log. accel_step is the
+        km/h change per step and scenario_weights the slower/free/faster odds
+        for a new obstacle. trace_path keeps the per-step trace in memory-mapped
+        files in that folder instead of RAM. dt is the simulated seconds per step.
+        world is an optional TrafficWorld: obstacles then come from radar
+        queries against real traffic, safety_distance and radar_range apply,
+        and lane changes need an actual gap; scenario_weights are unused."""
+        if cruise_speed is None:
+            cruise_speed = input("ENTER INITIAL CRUISE SPEED (KM/HR): ")
+        self.cruise_speed = float(cruise_speed)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.steps = steps
+        self.dt = dt
+        self.clock = None
+        self.verbose = verbose
+        self.current_lane = self.rng.randint(1, 3)
         self.current_speed = self.cruise_speed
         self.step_counter = 0
         self.obstacle = {'exists': False, 'speed': None, 'duration': 0}
         self.lane_change_cooldown = 0
         self.obstacle_cooldown = 0
+        self.world = world
+        self.snapshot = None                    # latest sensor_fusion.Snapshot when driven by sensors
+        self.observers = []                     # called with the controller after every step
+        self.position = 0.0                     # m along the world's ring road
         
         # safety parameters
-        self.safety_distance = 200  # 200m safety threshold
-        self.radar_range = 250      # 250m detection range
+        self.safety_distance = safety_distance  # m, default 200m safety threshold
+        self.radar_range = radar_range          # m, default 250m detection range
+        self.accel_step = accel_step            # km/h per step, accelerating or braking
+        self.scenario_weights = list(scenario_weights)
+
+        # Event counters
+        self.obstacle_count = 0
+        self.overtake_count = 0
+        self.lane_change_count = 0
         
-        # Data storage
-        self.time_steps = []
-        self.speed_history = []
-        self.obstacle_history = []
-        self.lane_history = []
-        self.gear_history = []
-
-    def run_simulation(self):
-        print(f"\nInitialized in Lane {self.current_lane} | Target Speed: {self.cruise_speed} km/h")
-        print(f"Safety Distance: {self.safety_distance}m | Radar Range: {self.radar_range}m")
-        print("Simulation starting...\n")
+        # Data storage: typed per-step columns, plus running sums for the summary
+        self.trace = TraceBuffer(capacity=steps, path=trace_path, dt=dt)
+        self.speed_sum = 0.0
+        self.min_speed = None
+        self.max_speed = None
+        self.obstacle_steps = 0
+
+    @property
+    def time_steps(self):
+        return self.trace.time
+
+    @property
+    def speed_history(self):
+        return self.trace.column('speed')
+
+    @property
+    def obstacle_history(self):
+        """Obstacle speed per step, NaN where there was none"""
+        return self.trace.column('obstacle_speed')
+
+    @property
+    def lane_history(self):
+        return self.trace.column('lane')
+
+    @property
+    def gear_history(self):
+        return self.trace.column('gear')
+
+    def run_simulation(self, step_delay=None, plot=True, clock=None):
+        """Run self.steps steps and return results().
+
+        clock is a SimClock that paces the steps. Without one, step_delay is
+        the wall time per step (default 10 ms, ten times real time) and
+        step_delay=0 runs as fast as possible. Use step_delay=0, plot=False
+        for batch runs.
+        """
+        if clock is None:
+            if step_delay is None:
+                step_delay = 0.01
+            if step_delay:
+                clock = SimClock(self.dt, mode="scaled", rate=self.dt / step_delay)
+            else:
+                clock = SimClock(self.dt)
+        self.clock = clock
+        self._log(f"\nInitialized in Lane {self.current_lane} | Target Speed: {self.cruise_speed} km/h")
+        self._log(f"Safety Distance: {self.safety_distance}m | Radar Range: {self.radar_range}m")
+        self._log("Simulation starting...\n")
         
-        for _ in range(500):
-            self.step_counter += 1
-            self._update_obstacle()
-            self._simulate_step()
-            self._store_data()
-            time.sleep(0.01)
-            self._maintain_speed_limits()
-            self._update_timers()
+        clock.run(self.step, self.steps)
         
-        self.plot_results()
+        self.trace.flush()
+        if plot:
+            self.plot_results()
+        return self.results()
+
+    def step(self):
+        self.step_counter += 1
+        if self.world is not None:
+            self.world.advance(self.dt)
+        self._update_obstacle()
+        self._simulate_step()
+        self._store_data()
+        self._maintain_speed_limits()
+        self._update_timers()
+        if self.world is not None:
+            self.position += self.current_speed / 3.6 * self.dt
+        for observer in self.observers:
+            observer(self)
+
+    def get_state(self):
+        """Everything a step depends on besides the RNG, as JSON-ready data"""
+        state = {name: getattr(self, name) for name in STATE_FIELDS}
+        state['obstacle'] = dict(self.obstacle)
+        return state
+
+    def set_state(self, state):
+        """Restore a get_state() dict; the trace is not rewound"""
+        for name in STATE_FIELDS:
+            setattr(self, name, state[name])
+        self.obstacle = dict(state['obstacle'])
+
+    def step_from_snapshot(self, snapshot):
+        """One decision from a sensor_fusion.Snapshot instead of the simulated obstacle model.
+
+        The prototype's lane reading is taken as the current lane, the radar
+        target within radar_range (or a blocked front ultrasonic sensor) is
+        the obstacle, and lane changes need clear side sensors.
+        """
+        self.snapshot = snapshot
+        self.step_counter += 1
+        if snapshot.lane is not None:
+            self.current_lane = snapshot.lane
+        self._update_obstacle_from_snapshot(snapshot)
+        self._simulate_world_step()
+        self._store_data()
+        self._maintain_speed_limits()
+        self._update_timers()
+        for observer in self.observers:
+            observer(self)
+
+    def _update_obstacle_from_snapshot(self, snapshot):
+        had_obstacle = self.obstacle['exists']
+        # 0 cm is no echo, which the sketch's front check ignores too
+        if snapshot.front is not None and 0 < snapshot.front < SENSOR_SAFETY_DISTANCE:
+            speed = snapshot.radar_speed if snapshot.radar_speed is not None else 0
+            self.obstacle = {'exists': True, 'speed': speed, 'duration': 0, 'distance': snapshot.front / 100.0}
+        elif snapshot.radar_range is not None and snapshot.radar_range <= self.radar_range:
+            self.obstacle = {'exists': True, 'speed': snapshot.radar_speed, 'duration': 0,
+                             'distance': snapshot.radar_range}
+        else:
+            self.obstacle = {'exists': False, 'speed': None, 'duration': 0}
+        if self.obstacle['exists'] and not had_obstacle:
+            self.obstacle_count += 1
+            self._log(f"Sensors: obstacle at {self.obstacle['distance']:.1f}m, {self.obstacle['speed']} km/h")
+
+    def _log(self, message):
+        if self.verbose:
+            print(message)
 
     def _calculate_gear(self):
         speed = self.current_speed
@@ -48,10 +189,13 @@ class EnhancedCruiseControl:
         else: return 5
 
     def _update_obstacle(self):
+        if self.world is not None:
+            self._update_obstacle_from_radar()
+            return
         if self.obstacle_cooldown <= 0 and not self.obstacle['exists']:
-            scenario = random.choices(
+            scenario = self.rng.choices(
                 ['slower', 'free', 'faster'],
-                weights=[4, 2, 2],
+                weights=self.scenario_weights,
                 k=1
             )[0]
             
@@ -61,66 +205,114 @@ class EnhancedCruiseControl:
             min_speed = max(60, self.current_speed - 60)
             max_speed = min(150, self.current_speed + 60)
             
-            self.obstacle['speed'] = random.randint(
+            self.obstacle['speed'] = self.rng.randint(
                 int(min_speed) if scenario == 'slower' else int(self.current_speed),
                 int(self.current_speed) if scenario == 'slower' else int(max_speed)
             )
             
             self.obstacle['exists'] = True
-            self.obstacle['duration'] = random.randint(5, 15)
+            self.obstacle['duration'] = self.rng.randint(5, 15)
             self.obstacle_cooldown = 10
-            print(f"New obstacle: {self.obstacle['speed']} km/h (Safety: {self.safety_distance}m)")
+            self.obstacle_count += 1
+            self._log(f"New obstacle: {self.obstacle['speed']} km/h (Safety: {self.safety_distance}m)")
+
+    def _update_obstacle_from_radar(self):
+        contact = self.world.nearest_ahead(self.current_lane, self.position, self.radar_range)
+        if contact is None:
+            self.obstacle = {'exists': False, 'speed': None, 'duration': 0}
+            return
+        if contact.vehicle_id != self.obstacle.get('id'):
+            self.obstacle_count += 1
+            self._log(f"Radar: vehicle ahead at {contact.gap:.0f}m, {contact.speed:.0f} km/h")
+        self.obstacle = {'exists': True, 'speed': contact.speed, 'duration': 0,
+                         'distance': contact.gap, 'id': contact.vehicle_id}
 
     def _simulate_step(self):
+        if self.world is not None:
+            self._simulate_world_step()
+            return
         if self.obstacle['exists']:
             if self.obstacle['duration'] <= 0:
-                print(f"Step {self.step_counter}: Obstacle cleared")
+                self._log(f"Step {self.step_counter}: Obstacle cleared")
                 self.obstacle['exists'] = False
                 return
                 
             if self.current_speed > self.obstacle['speed']:
                 self._handle_slower_obstacle()
             elif self.current_speed < self.obstacle['speed']:
-                print(f"Step {self.step_counter}: Faster obstacle ({self.obstacle['speed']} km/h)")
-                if random.random() < 0.3:
-                    print(f"Step {self.step_counter}: Overtaking initiated")
+                self._log(f"Step {self.step_counter}: Faster obstacle ({self.obstacle['speed']} km/h)")
+                if self.rng.random() < 0.3:
+                    self._log(f"Step {self.step_counter}: Overtaking initiated")
                     self.obstacle['exists'] = False
+                    self.overtake_count += 1
             else:
                 self._attempt_lane_change()
         else:
             self._maintain_cruise_speed()
 
+    def _simulate_world_step(self):
+        if not self.obstacle['exists']:
+            self._maintain_cruise_speed()
+            return
+        gap, obstacle_speed = self.obstacle['distance'], self.obstacle['speed']
+        if gap < self.safety_distance and self.current_speed > obstacle_speed:
+            # Closing on slower traffic: pass it if a neighbouring lane has room, else slow down
+            new_lane = self._get_available_lane() if self.lane_change_cooldown <= 0 else None
+            if new_lane:
+                self._log(f"Step {self.step_counter}: Overtaking in Lane {new_lane}")
+                self.current_lane = new_lane
+                self.obstacle = {'exists': False, 'speed': None, 'duration': 0}
+                self.lane_change_cooldown = 5
+                self.lane_change_count += 1
+                self.overtake_count += 1
+            else:
+                self._handle_slower_obstacle()
+            return
+        # Inside the safety distance, never speed up past the vehicle ahead
+        limit = self.cruise_speed if gap >= self.safety_distance else min(self.cruise_speed, obstacle_speed)
+        if self.current_speed < limit:
+            self.current_speed = min(limit, self.current_speed + self.accel_step)
+            self._log(f"Step {self.step_counter}: Accelerating to {self.current_speed} km/h")
+
     def _maintain_cruise_speed(self):
         if self.current_speed < self.cruise_speed:
-            self.current_speed = min(self.cruise_speed, self.current_speed + 5)
-            print(f"Step {self.step_counter}: Accelerating to {self.current_speed} km/h")
+            self.current_speed = min(self.cruise_speed, self.current_speed + self.accel_step)
+            self._log(f"Step {self.step_counter}: Accelerating to {self.current_speed} km/h")
         else:
-            print(f"Step {self.step_counter}: Maintaining {self.current_speed} km/h")
+            self._log(f"Step {self.step_counter}: Maintaining {self.current_speed} km/h")
 
     def _handle_slower_obstacle(self):
-        self.current_speed = max(self.obstacle['speed'], self.current_speed - 5)
+        self.current_speed = max(self.obstacle['speed'], self.current_speed - self.accel_step)
         action = "Decelerating" if self.current_speed > self.obstacle['speed'] else "Speed matched"
-        print(f"Step {self.step_counter}: {action} to {self.current_speed} km/h")
+        self._log(f"Step {self.step_counter}: {action} to {self.current_speed} km/h")
 
     def _attempt_lane_change(self):
-        if random.random() < 0.5:
+        if self.rng.random() < 0.5:
             new_lane = self._get_available_lane()
             if new_lane:
-                print(f"Step {self.step_counter}: Switching to Lane {new_lane}")
+                self._log(f"Step {self.step_counter}: Switching to Lane {new_lane}")
                 self.current_lane = new_lane
                 self.obstacle['exists'] = False
                 self.lane_change_cooldown = 5
+                self.lane_change_count += 1
             else:
-                print(f"Step {self.step_counter}: Lanes blocked")
+                self._log(f"Step {self.step_counter}: Lanes blocked")
         else:
-            print(f"Step {self.step_counter}: Lane change aborted")
+            self._log(f"Step {self.step_counter}: Lane change aborted")
 
     def _get_available_lane(self):
         lanes = []
         if self.current_lane == 1: lanes.append(2)
         elif self.current_lane == 2: lanes.extend([1, 3])
         else: lanes.append(2)
-        return random.choice(lanes) if lanes else None
+        if self.world is not None:
+            lanes = [lane for lane in lanes
+                     if self.world.lane_change_feasible(lane, self.position, self.current_speed,
+                                                        self.safety_distance, self.radar_range)]
+        elif self.snapshot is not None:
+            lanes = [lane for lane in lanes
+                     if self.snapshot.side_clear("left" if lane < self.current_lane else "right")]
+        return self.rng.choice(lanes) if lanes else None
 
     def _maintain_speed_limits(self):
         self.current_speed = max(60, min(150, self.current_speed))
@@ -131,13 +323,60 @@ class EnhancedCruiseControl:
         if self.lane_change_cooldown > 0: self.lane_change_cooldown -= 1
 
     def _store_data(self):
-        self.time_steps.append(self.step_counter * 0.1)
-        self.speed_history.append(self.current_speed)
-        self.lane_history.append(self.current_lane)
-        self.obstacle_history.append(self.obstacle['speed'] if self.obstacle['exists'] else None)
-        self.gear_history.append(self._calculate_gear())
+        speed = self.current_speed
+        obstacle_speed = self.obstacle['speed'] if self.obstacle['exists'] else None
+        self.trace.append(self.step_counter, speed, obstacle_speed, self.current_lane, self._calculate_gear())
+        self.speed_sum += speed
+        if self.min_speed is None or speed < self.min_speed:
+            self.min_speed = speed
+        if self.max_speed is None or speed > self.max_speed:
+            self.max_speed = speed
+        if obstacle_speed is not None:
+            self.obstacle_steps += 1
+
+    def results(self):
+        """Per-step traces and a summary of the run so far.
+
+        Traces are the TraceBuffer columns as NumPy arrays (views, except
+        the computed time), so this costs nothing however long the run;
+        write_results_json turns them into lists. The summary uses exact
+        running sums.
+        """
+        steps = len(self.trace)
+        return {
+            'params': {
+                'cruise_speed': self.cruise_speed,
+                'seed': self.seed,
+                'steps': self.steps,
+                'safety_distance': self.safety_distance,
+                'radar_range': self.radar_range,
+                'accel_step': self.accel_step,
+                'scenario_weights': list(self.scenario_weights),
+                'traffic_vehicles': self.world.vehicle_count if self.world is not None else None,
+            },
+            'time': self.time_steps,
+            'speed': self.speed_history,
+            'obstacle_speed': self.obstacle_history,
+            'lane': self.lane_history,
+            'gear': self.gear_history,
+            'timing': self.clock.stats() if self.clock else None,
+            'summary': {
+                'steps': steps,
+                'mean_speed': self.speed_sum / steps if steps else None,
+                'min_speed': self.min_speed,
+                'max_speed': self.max_speed,
+                'obstacles': self.obstacle_count,
+                'overtakes': self.overtake_count,
+                'lane_changes': self.lane_change_count,
+                'obstacle_steps': self.obstacle_steps,
+                'final_lane': self.current_lane,
+            },
+        }
 
     def plot_results(self):
+        # Imported here so headless runs never need a display backend
+        import matplotlib.pyplot as plt
+
         plt.figure(figsize=(12, 10))
         
         # Speed plot
@@ -151,11 +390,11 @@ class EnhancedCruiseControl:
         
         # Obstacle plot
         plt.subplot(4, 1, 2)
-        obstacle_times = [t for t, obs in zip(self.time_steps, self.obstacle_history) if obs]
-        obstacle_speeds = [obs for obs in self.obstacle_history if obs]
-        if obstacle_speeds:
-            plt.scatter(obstacle_times, obstacle_speeds, c='orange', marker='x', label='Obstacles')
-            plt.ylim(min(obstacle_speeds)-10, max(obstacle_speeds)+10)
+        mask = self.trace.obstacle_mask()
+        obstacle_speeds = self.obstacle_history[mask]
+        if obstacle_speeds.size:
+            plt.scatter(self.time_steps[mask], obstacle_speeds, c='orange', marker='x', label='Obstacles')
+            plt.ylim(obstacle_speeds.min()-10, obstacle_speeds.max()+10)
         plt.ylabel('Obstacle Speed')
         plt.legend()
         plt.grid(True)
@@ -171,15 +410,119 @@ class EnhancedCruiseControl:
         plt.subplot(4, 1, 4)
         plt.step(self.time_steps, self.lane_history, where='post', color='g')
         plt.ylabel('Lane')
-        plt.yticks([1,2,3], ['Left','Center','Right'])
+        plt.yticks([int(lane) for lane in Lane], [lane.name.title() for lane in Lane])
         plt.xlabel('Time (seconds)')
         plt.grid(True)
         
         plt.tight_layout()
         plt.show()
 
+def run_headless(cruise_speed, seed=None, steps=500, safety_distance=200, radar_range=250,
+                 verbose=False, accel_step=5, scenario_weights=(4, 2, 2), traffic=None):
+    """One scripted run with no prompt, sleeps or plots; returns the results() dict.
+
+    traffic, if given, is the vehicles per lane of a TrafficWorld seeded with seed.
+    """
+    world = TrafficWorld(traffic, seed=seed) if traffic else None
+    simulator = EnhancedCruiseControl(cruise_speed, seed=seed, steps=steps,
+                                      safety_distance=safety_distance,
+                                      radar_range=radar_range, verbose=verbose,
+                                      accel_step=accel_step, scenario_weights=scenario_weights,
+                                      world=world)
+    return simulator.run_simulation(step_delay=0, plot=False)
+
+def write_results_json(results, path):
+    """Write a results() dict as JSON, with missing obstacle speeds as null.
+
+    Trace columns become lists one at a time, so a long run never holds
+    more than one column as Python objects.
+    """
+    with open(path, "w") as f:
+        f.write("{")
+        for i, (key, value) in enumerate(results.items()):
+            if isinstance(value, np.ndarray):
+                value = value.tolist()
+                if key == 'obstacle_speed':
+                    value = [None if obs != obs else obs for obs in value]
+            f.write(("" if i == 0 else ", ") + json.dumps(key) + ": " + json.dumps(value))
+        f.write("}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Adaptive cruise control and lane change assist simulation")
+    parser.add_argument("--speed", type=float, help="initial cruise speed in km/h (asked for if omitted)")
+    parser.add_argument("--seed", type=int, help="random seed for a reproducible run")
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--safety-distance", type=float, default=200, help="m")
+    parser.add_argument("--radar-range", type=float, default=250, help="m")
+    parser.add_argument("--headless", action="store_true",
+                        help="no per-step delay and no plot; print a JSON summary instead")
+    parser.add_argument("--quiet", action="store_true", help="don't log every step")
+    parser.add_argument("--json", help="write the full results to this file")
+    parser.add_argument("--mode", choices=MODES,
+                        help="pacing: afap (as fast as possible), scaled (--rate x real time) or "
+                             "realtime with deadline tracking; default 10x real time, afap when headless")
+    parser.add_argument("--rate", type=float, default=1.0, help="real-time factor for --mode scaled")
+    parser.add_argument("--timing", action="store_true", help="print step latency, jitter and overruns")
+    parser.add_argument("--traffic", type=int,
+                        help="simulate a ring road with this many vehicles per lane instead of random obstacles")
+    parser.add_argument("--trace", help="keep the per-step trace as memory-mapped files in this folder")
+    parser.add_argument("--live", action="store_true",
+                        help="draw speed, obstacle, gear and lane traces while the run goes on")
+    parser.add_argument("--window", type=int, default=600, help="steps shown by --live")
+    parser.add_argument("--instrument", action="store_true",
+                        help="time each step phase and count events; print the metrics as JSON")
+    parser.add_argument("--metrics-json", help="write the --instrument metrics to this JSON file")
+    parser.add_argument("--metrics-prom", help="write the --instrument metrics in Prometheus text format")
+    parser.add_argument("--profile", help="run under cProfile and write the report here (.prof for raw stats)")
+    parser.add_argument("--record", help="write a binary run log for exact replay (see run_log.py)")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    print("=== CRUISE CONTROL SIMULATION ===")
-    simulator = EnhancedCruiseControl()
-    simulator.run_simulation()
-    print("\nSimulation completed successfully!")
+    args = parse_args()
+    if not args.headless:
+        print("=== CRUISE CONTROL SIMULATION ===")
+    simulator = EnhancedCruiseControl(args.speed, seed=args.seed, steps=args.steps,
+                                      safety_distance=args.safety_distance,
+                                      radar_range=args.radar_range,
+                                      verbose=not (args.quiet or args.headless),
+                                      trace_path=args.trace,
+                                      world=TrafficWorld(args.traffic, seed=args.seed) if args.traffic else None)
+    clock = SimClock(simulator.dt, mode=args.mode, rate=args.rate) if args.mode else None
+    if args.live and not args.headless:
+        simulator.observers.append(LiveDashboard(window=args.window, cruise_speed=simulator.cruise_speed,
+                                                 dt=simulator.dt))
+    recorder = None
+    if args.record:
+        from run_log import RunLogWriter
+        recorder = RunLogWriter(args.record, simulator)
+    instrumentation = None
+    if args.instrument or args.metrics_json or args.metrics_prom:
+        instrumentation = Instrumentation().attach(simulator)
+    if args.headless:
+        run_options = {'step_delay': 0, 'plot': False, 'clock': clock}
+    else:
+        run_options = {'clock': clock}
+    try:
+        if args.profile:
+            results = profile_call(args.profile, simulator.run_simulation, **run_options)
+        else:
+            results = simulator.run_simulation(**run_options)
+    finally:
+        # Runs that crash or are interrupted are the ones worth replaying
+        if recorder:
+            recorder.close()
+    if args.headless:
+        print(json.dumps(results['summary']))
+    else:
+        print("\nSimulation completed successfully!")
+    if instrumentation:
+        if args.instrument:
+            print(json.dumps(instrumentation.metrics(), indent=2))
+        if args.metrics_json:
+            instrumentation.write_json(args.metrics_json)
+        if args.metrics_prom:
+            instrumentation.write_prometheus(args.metrics_prom)
+    if args.timing:
+        print(json.dumps(results['timing'], indent=2))
+    if args.json:
+        write_results_json(results, args.json)
@@ -0,0 +1,255 @@
+import argparse
+import json
+import statistics
+import time
+import numpy as np
+from ACC_LCA_virtual_env_simulation import run_headless
+
+MIN_SPEED = 60
+MAX_SPEED = 150
+
+SLOWER, FREE, FASTER = 0, 1, 2
+
+# Random draws taken per vehicle per step, one counter slot each
+SLOT_SCENARIO, SLOT_OBSTACLE_SPEED, SLOT_DURATION, SLOT_OVERTAKE, SLOT_LANE_ROLL, SLOT_LANE_PICK = range(6)
+SLOTS_PER_STEP = 8
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+
+def _splitmix64(x):
+    x = x ^ (x >> np.uint64(30))
+    x = x * _MIX1
+    x = x ^ (x >> np.uint64(27))
+    x = x * _MIX2
+    return x ^ (x >> np.uint64(31))
+
+class FleetCruiseControl:
+    """N independent EnhancedCruiseControl vehicles advanced in lockstep as NumPy arrays.
+
+    Every branch of the scalar controller (_update_obstacle, _simulate_step,
+    _handle_slower_obstacle, _attempt_lane_change, _maintain_speed_limits and
+    the timers) is applied to all vehicles at once through boolean masks.
+
+    Each vehicle has its own counter-based SplitMix64 stream keyed on
+    (seed, vehicle index), so a vehicle's trajectory does not depend on how
+    many other vehicles are simulated. The streams differ from the scalar
+    class's random.Random, so the two agree in distribution, not run by run.
+    """
+
+    def __init__(self, n_vehicles, cruise_speed, seed=0, accel_step=5, scenario_weights=(4, 2, 2)):
+        self.n = n_vehicles
+        self.seed = seed
+        self.accel_step = accel_step
+        weights = np.asarray(scenario_weights, dtype=np.float64)
+        self._scenario_bounds = np.cumsum(weights) / weights.sum()
+        self.step_counter = 0
+        self.cruise_speed = np.broadcast_to(np.asarray(cruise_speed, dtype=np.float64), (n_vehicles,)).copy()
+        with np.errstate(over='ignore'):
+            ids = np.arange(n_vehicles, dtype=np.uint64)
+            self._keys = _splitmix64(np.uint64(seed & 0xFFFFFFFFFFFFFFFF) * _GOLDEN + ids * _GOLDEN + _GOLDEN)
+        self.current_speed = self.cruise_speed.copy()
+        self.current_lane = (1 + np.floor(self._uniform(SLOT_LANE_PICK) * 3)).astype(np.int8)
+        self.obstacle_exists = np.zeros(n_vehicles, dtype=bool)
+        self.obstacle_speed = np.zeros(n_vehicles, dtype=np.float64)
+        self.obstacle_duration = np.zeros(n_vehicles, dtype=np.int32)
+        self.obstacle_cooldown = np.zeros(n_vehicles, dtype=np.int32)
+        self.lane_change_cooldown = np.zeros(n_vehicles, dtype=np.int32)
+
+        # Per-vehicle accumulators
+        self.steps_run = 0
+        self.speed_sum = np.zeros(n_vehicles)
+        self.speed_sq_sum = np.zeros(n_vehicles)
+        self.min_speed = np.full(n_vehicles, np.inf)
+        self.max_speed = np.full(n_vehicles, -np.inf)
+        self.obstacle_count = np.zeros(n_vehicles, dtype=np.int64)
+        self.overtake_count = np.zeros(n_vehicles, dtype=np.int64)
+        self.lane_change_count = np.zeros(n_vehicles, dtype=np.int64)
+        self.obstacle_steps = np.zeros(n_vehicles, dtype=np.int64)
+        self.lane_steps = np.zeros((n_vehicles, 3), dtype=np.int64)
+
+    def _uniform(self, slot):
+        """One uniform [0, 1) draw per vehicle for this step and slot"""
+        counter = np.uint64(self.step_counter * SLOTS_PER_STEP + slot)
+        with np.errstate(over='ignore'):
+            bits = _splitmix64(self._keys + counter * _GOLDEN)
+        return (bits >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+    @staticmethod
+    def _randint(u, low, high):
+        # random.randint(low, high) raises when low > high; clamp instead
+        high = np.maximum(high, low)
+        return low + np.floor(u * (high - low + 1))
+
+    def step(self):
+        self.step_counter += 1
+        self._update_obstacle()
+        self._simulate_step()
+        self._store_data()
+        self._maintain_speed_limits()
+        self._update_timers()
+
+    def run(self, steps):
+        for _ in range(steps):
+            self.step()
+        return self.summary()
+
+    def _update_obstacle(self):
+        ready = (self.obstacle_cooldown <= 0) & ~self.obstacle_exists
+        # random.choices(['slower', 'free', 'faster'], weights=scenario_weights)
+        u = self._uniform(SLOT_SCENARIO)
+        bounds = self._scenario_bounds
+        scenario = np.where(u < bounds[0], SLOWER, np.where(u < bounds[1], FREE, FASTER))
+        spawn = ready & (scenario != FREE)
+        if not spawn.any():
+            return
+        slower = scenario == SLOWER
+        speed = self.current_speed
+        min_speed = np.trunc(np.maximum(MIN_SPEED, speed - 60))
+        max_speed = np.trunc(np.minimum(MAX_SPEED, speed + 60))
+        low = np.where(slower, min_speed, np.trunc(speed))
+        high = np.where(slower, np.trunc(speed), max_speed)
+        obstacle_speed = self._randint(self._uniform(SLOT_OBSTACLE_SPEED), low, high)
+        duration = self._randint(self._uniform(SLOT_DURATION), 5, 15).astype(np.int32)
+        self.obstacle_speed = np.where(spawn, obstacle_speed, self.obstacle_speed)
+        self.obstacle_duration = np.where(spawn, duration, self.obstacle_duration)
+        self.obstacle_cooldown = np.where(spawn, 10, self.obstacle_cooldown)
+        self.obstacle_exists |= spawn
+        self.obstacle_count += spawn
+
+    def _simulate_step(self):
+        exists = self.obstacle_exists
+        speed = self.current_speed
+        obstacle = self.obstacle_speed
+        cleared = exists & (self.obstacle_duration <= 0)
+        live = exists & ~cleared
+
+        # _handle_slower_obstacle
+        slower = live & (speed > obstacle)
+        speed = np.where(slower, np.maximum(obstacle, speed - self.accel_step), speed)
+
+        # Faster obstacle: overtake 30% of the time
+        overtake = live & (self.current_speed < obstacle) & (self._uniform(SLOT_OVERTAKE) < 0.3)
+        self.overtake_count += overtake
+
+        # _attempt_lane_change: 50% roll, then a neighbouring lane
+        attempt = live & (self.current_speed == obstacle) & (self._uniform(SLOT_LANE_ROLL) < 0.5)
+        lane = self.current_lane
+        from_centre = np.where(self._uniform(SLOT_LANE_PICK) < 0.5, 1, 3)
+        new_lane = np.where(lane == 2, from_centre, 2).astype(np.int8)
+        self.current_lane = np.where(attempt, new_lane, lane)
+        self.lane_change_cooldown = np.where(attempt, 5, self.lane_change_cooldown)
+        self.lane_change_count += attempt
+
+        # _maintain_cruise_speed
+        free = ~exists
+        speed = np.where(free & (speed < self.cruise_speed),
+                         np.minimum(self.cruise_speed, speed + self.accel_step), speed)
+
+        self.current_speed = speed
+        self.obstacle_exists = exists & ~(cleared | overtake | attempt)
+
+    def _store_data(self):
+        speed = self.current_speed
+        self.steps_run += 1
+        self.speed_sum += speed
+        self.speed_sq_sum += speed * speed
+        np.minimum(self.min_speed, speed, out=self.min_speed)
+        np.maximum(self.max_speed, speed, out=self.max_speed)
+        self.obstacle_steps += self.obstacle_exists
+        self.lane_steps[np.arange(self.n), self.current_lane - 1] += 1
+
+    def _maintain_speed_limits(self):
+        np.clip(self.current_speed, MIN_SPEED, MAX_SPEED, out=self.current_speed)
+
+    def _update_timers(self):
+        self.obstacle_duration -= self.obstacle_exists
+        self.obstacle_cooldown -= self.obstacle_cooldown > 0
+        self.lane_change_cooldown -= self.lane_change_cooldown > 0
+
+    def per_vehicle(self):
+        """Per-vehicle summaries with the same keys as EnhancedCruiseControl.results()['summary']"""
+        steps = max(self.steps_run, 1)
+        return {
+            'mean_speed': self.speed_sum / steps,
+            'min_speed': self.min_speed,
+            'max_speed': self.max_speed,
+            'obstacles': self.obstacle_count,
+            'overtakes': self.overtake_count,
+            'lane_changes': self.lane_change_count,
+            'obstacle_steps': self.obstacle_steps,
+            'final_lane': self.current_lane,
+        }
+
+    def summary(self):
+        """Fleet-wide statistics: mean and spread of each per-vehicle metric"""
+        metrics = {}
+        for name, values in self.per_vehicle().items():
+            if name == 'final_lane':
+                continue
+            values = np.asarray(values, dtype=np.float64)
+            metrics[name] = {
+                'mean': float(values.mean()),
+                'std': float(values.std(ddof=1)) if self.n > 1 else 0.0,
+                'p05': float(np.percentile(values, 5)),
+                'p95': float(np.percentile(values, 95)),
+            }
+        lane_share = self.lane_steps.sum(axis=0) / max(self.lane_steps.sum(), 1)
+        return {
+            'vehicles': self.n,
+            'steps': self.steps_run,
+            'vehicle_steps': self.n * self.steps_run,
+            'speed_std': float(np.sqrt(max(
+                self.speed_sq_sum.sum() / max(self.n * self.steps_run, 1)
+                - (self.speed_sum.sum() / max(self.n * self.steps_run, 1)) ** 2, 0.0))),
+            'lane_share': {'left': float(lane_share[0]), 'center': float(lane_share[1]),
+                           'right': float(lane_share[2])},
+            'metrics': metrics,
+        }
+
+def compare_with_scalar(cruise_speed, n_vehicles=2000, n_scalar_runs=200, steps=500, seed=0):
+    """Run the fleet and the scalar class on the same scenario and compare metric means.
+
+    Returns, per metric, both means and the difference in standard errors;
+    |z| well under 3 across metrics means the two agree in distribution.
+    """
+    fleet = FleetCruiseControl(n_vehicles, cruise_speed, seed=seed)
+    fleet.run(steps)
+    fleet_metrics = fleet.per_vehicle()
+    scalar_runs = [run_headless(cruise_speed, seed=seed + i, steps=steps)['summary']
+                   for i in range(n_scalar_runs)]
+    comparison = {}
+    for name in ('mean_speed', 'obstacles', 'overtakes', 'lane_changes', 'obstacle_steps'):
+        fleet_values = np.asarray(fleet_metrics[name], dtype=np.float64)
+        scalar_values = [run[name] for run in scalar_runs]
+        scalar_mean = statistics.fmean(scalar_values)
+        stderr = np.sqrt(fleet_values.var(ddof=1) / len(fleet_values)
+                         + statistics.variance(scalar_values) / len(scalar_values))
+        comparison[name] = {
+            'fleet_mean': float(fleet_values.mean()),
+            'scalar_mean': scalar_mean,
+            'z': float((fleet_values.mean() - scalar_mean) / stderr) if stderr > 0 else 0.0,
+        }
+    return comparison
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte-Carlo fleet simulation of the ACC/LCA controller")
+    parser.add_argument("--vehicles", type=int, default=10000)
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--speed", type=float, default=100, help="cruise speed in km/h")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compare", action="store_true",
+                        help="also run the scalar simulator and compare metric distributions")
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    summary = FleetCruiseControl(args.vehicles, args.speed, seed=args.seed).run(args.steps)
+    elapsed = time.perf_counter() - start
+    summary['seconds'] = elapsed
+    summary['vehicle_steps_per_sec'] = summary['vehicle_steps'] / elapsed if elapsed > 0 else None
+    if args.compare:
+        summary['comparison'] = compare_with_scalar(args.speed, steps=args.steps, seed=args.seed)
+    print(json.dumps(summary, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import collections
+import json
+import os
+import time
+
+# Controller methods timed as step phases. _log runs inside the others, so
+# 'print' time is also part of the phase that printed.
+PHASE_METHODS = {
+    '_update_obstacle': 'obstacle',
+    '_simulate_step': 'decision',
+    '_store_data': 'store',
+    '_maintain_speed_limits': 'limits',
+    '_update_timers': 'timers',
+    '_log': 'print',
+}
+# Controller counters whose per-step increase is reported as an event
+EVENT_COUNTERS = {
+    'obstacle_count': 'obstacles',
+    'overtake_count': 'overtakes',
+    'lane_change_count': 'lane_changes',
+}
+EVENTS = ('obstacles', 'overtakes', 'lane_changes', 'speed_clamps')
+
+class Instrumentation:
+    """Per-phase timers, event counters and event hooks for one EnhancedCruiseControl.
+
+    attach() swaps the controller's phase methods for timed wrappers stored
+    on the instance, and detach() deletes them again, so a controller that
+    is not attached runs the plain class methods at no extra cost.
+    Callbacks registered with on(event, callback) get (controller, count)
+    whenever that event happens in a step.
+    """
+
+    def __init__(self):
+        self.phase_seconds = collections.Counter()
+        self.phase_calls = collections.Counter()
+        self.events = collections.Counter()
+        self.steps = 0
+        self.step_seconds = 0.0
+        self._hooks = collections.defaultdict(list)
+        self._controller = None
+
+    def on(self, event, callback):
+        if event not in EVENTS:
+            raise ValueError(f"unknown event {event!r}; expected one of {', '.join(EVENTS)}")
+        self._hooks[event].append(callback)
+
+    def off(self, event, callback):
+        self._hooks[event].remove(callback)
+
+    def _timed(self, method, phase):
+        clock = time.perf_counter
+        seconds, calls = self.phase_seconds, self.phase_calls
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                seconds[phase] += clock() - start
+                calls[phase] += 1
+        return timed
+
+    def attach(self, controller):
+        if self._controller is not None:
+            raise RuntimeError("already attached to a controller")
+        self._controller = controller
+        for name, phase in PHASE_METHODS.items():
+            setattr(controller, name, self._timed(getattr(controller, name), phase))
+        limits = controller._maintain_speed_limits
+
+        def maintain_speed_limits():
+            speed = controller.current_speed
+            limits()
+            if controller.current_speed != speed:
+                self._fire(controller, 'speed_clamps', 1)
+        controller._maintain_speed_limits = maintain_speed_limits
+        if controller.world is not None:
+            controller.world.advance = self._timed(controller.world.advance, 'world')
+        step = controller.step
+        step_from_snapshot = controller.step_from_snapshot
+        controller.step = lambda: self._step(controller, step)
+        controller.step_from_snapshot = lambda snapshot: self._step(controller, step_from_snapshot, snapshot)
+        return self
+
+    def detach(self):
+        controller = self._controller
+        if controller is None:
+            return
+        for name in (*PHASE_METHODS, 'step', 'step_from_snapshot'):
+            controller.__dict__.pop(name, None)
+        if controller.world is not None:
+            controller.world.__dict__.pop('advance', None)
+        self._controller = None
+
+    def _step(self, controller, step, *args):
+        before = [getattr(controller, name) for name in EVENT_COUNTERS]
+        start = time.perf_counter()
+        step(*args)
+        self.step_seconds += time.perf_counter() - start
+        self.steps += 1
+        for name, old in zip(EVENT_COUNTERS, before):
+            new = getattr(controller, name)
+            if new != old:
+                self._fire(controller, EVENT_COUNTERS[name], new - old)
+
+    def _fire(self, controller, event, count):
+        self.events[event] += count
+        for callback in self._hooks.get(event, ()):
+            callback(controller, count)
+
+    def metrics(self):
+        """JSON-ready snapshot; 'other' is step time outside the timed phases (observers, world bookkeeping)"""
+        outside_print = sum(s for phase, s in self.phase_seconds.items() if phase != 'print')
+        return {
+            'steps': self.steps,
+            'step_seconds': self.step_seconds,
+            'step_us_mean': 1e6 * self.step_seconds / self.steps if self.steps else None,
+            'phase_seconds': dict(self.phase_seconds),
+            'phase_calls': dict(self.phase_calls),
+            'other_seconds': max(self.step_seconds - outside_print, 0.0),
+            'events': {event: self.events[event] for event in EVENTS},
+        }
+
+    def write_json(self, path):
+        _write_atomic(path, json.dumps(self.metrics(), indent=2) + "\n")
+
+    def prometheus_text(self, prefix="acc"):
+        """Metrics in the Prometheus text exposition format"""
+        metrics = self.metrics()
+        lines = [
+            f"# HELP {prefix}_steps_total Simulation steps run.",
+            f"# TYPE {prefix}_steps_total counter",
+            f"{prefix}_steps_total {metrics['steps']}",
+            f"# HELP {prefix}_step_seconds_total Wall time spent in steps.",
+            f"# TYPE {prefix}_step_seconds_total counter",
+            f"{prefix}_step_seconds_total {metrics['step_seconds']!r}",
+            f"# HELP {prefix}_phase_seconds_total Wall time per step phase (print overlaps the others).",
+            f"# TYPE {prefix}_phase_seconds_total counter",
+        ]
+        for phase, seconds in sorted(metrics['phase_seconds'].items()):
+            lines.append(f'{prefix}_phase_seconds_total{{phase="{phase}"}} {seconds!r}')
+        lines += [
+            f"# HELP {prefix}_events_total Controller events.",
+            f"# TYPE {prefix}_events_total counter",
+        ]
+        for event, count in metrics['events'].items():
+            lines.append(f'{prefix}_events_total{{event="{event}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path, prefix="acc"):
+        # Atomic, as node_exporter's textfile collector expects
+        _write_atomic(path, self.prometheus_text(prefix))
+
+def _write_atomic(path, text):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def profile_call(path, func, *args, **kwargs):
+    """Run func under cProfile and write the report to path.
+
+    A path ending in .prof gets the raw stats for snakeviz/pstats; anything
+    else gets a text report sorted by cumulative time.
+    """
+    import cProfile
+    import io
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        if path.endswith(".prof"):
+            profiler.dump_stats(path)
+        else:
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(60)
+            _write_atomic(path, out.getvalue())
@@ -0,0 +1,133 @@
+import time
+import numpy as np
+
+# Backends that only render to files; the dashboard does nothing under them
+NON_INTERACTIVE_BACKENDS = {"agg", "cairo", "pdf", "pgf", "ps", "svg", "template"}
+
+class LiveDashboard:
+    """Speed, obstacle, gear and lane traces drawn live during a run.
+
+    Add an instance to EnhancedCruiseControl.observers. Each step is copied
+    into a ring buffer (O(1), no drawing), and at most `fps` times per wall
+    second the existing line artists get new data and are blitted over a
+    cached background. The x axis is "seconds before now" over a fixed
+    `window` of steps, so axes and ticks never change and the background
+    stays valid; windows longer than max_points are decimated by stride.
+    Under a non-interactive backend (headless) every call is a no-op.
+    """
+
+    def __init__(self, window=600, fps=10, max_points=1000, cruise_speed=None, dt=0.1, enabled=None):
+        self.window = window
+        self.interval = 1.0 / fps
+        self.stride = max(1, -(-window // max_points))
+        self.dt = dt
+        self.cruise_speed = cruise_speed
+        self.enabled = self._interactive() if enabled is None else enabled
+        self.draws = 0
+        self._count = 0
+        self._last_draw = 0.0
+        self._fig = None
+        self._background = None
+        # Each sample is written at i and i + window, so with i the next slot,
+        # buf[i:i + window] is always the whole window oldest first, with no copy
+        self._buf = np.full((4, 2 * window), np.nan)
+
+    @staticmethod
+    def _interactive():
+        import matplotlib
+        return matplotlib.get_backend().lower() not in NON_INTERACTIVE_BACKENDS
+
+    def __call__(self, controller):
+        if not self.enabled:
+            return
+        i = self._count % self.window
+        obstacle = controller.obstacle
+        sample = (controller.current_speed, obstacle['speed'] if obstacle['exists'] else np.nan,
+                  controller._calculate_gear(), controller.current_lane)
+        self._buf[:, i] = sample
+        self._buf[:, i + self.window] = sample
+        self._count += 1
+        now = time.perf_counter()
+        if now - self._last_draw >= self.interval:
+            self._last_draw = now
+            self.draw(controller.step_counter)
+
+    def _setup(self):
+        import matplotlib.pyplot as plt
+
+        self._fig, axes = plt.subplots(4, 1, figsize=(12, 10), sharex=True)
+        span = self.window * self.dt
+        x = self._decimate(np.arange(-self.window + 1, 1) * self.dt)
+        self._x = x
+        empty = np.full(len(x), np.nan)
+        speed_ax, obstacle_ax, gear_ax, lane_ax = axes
+        self._lines = [
+            speed_ax.plot(x, empty, 'b-', label='Actual Speed', animated=True)[0],
+            obstacle_ax.plot(x, empty, 'x', color='orange', label='Obstacles', animated=True)[0],
+            gear_ax.step(x, empty, where='post', color='purple', animated=True)[0],
+            lane_ax.step(x, empty, where='post', color='g', animated=True)[0],
+        ]
+        if self.cruise_speed is not None:
+            speed_ax.axhline(y=self.cruise_speed, color='r', linestyle='--', label='Target')
+        speed_ax.set_ylim(50, 160)
+        speed_ax.set_ylabel('Speed (km/h)')
+        speed_ax.legend(loc='upper left')
+        obstacle_ax.set_ylim(50, 160)
+        obstacle_ax.set_ylabel('Obstacle Speed')
+        gear_ax.set_ylim(0.5, 5.5)
+        gear_ax.set_yticks([1, 2, 3, 4, 5], ['1st', '2nd', '3rd', '4th', '5th'])
+        gear_ax.set_ylabel('Gear')
+        lane_ax.set_ylim(0.5, 3.5)
+        lane_ax.set_yticks([1, 2, 3], ['Left', 'Center', 'Right'])
+        lane_ax.set_ylabel('Lane')
+        lane_ax.set_xlim(-span, 0)
+        lane_ax.set_xlabel('Seconds before now')
+        for ax in axes:
+            ax.grid(True)
+        self._title = self._fig.suptitle('Step 0', animated=True)
+        self._fig.tight_layout()
+        # Resizes and other full redraws invalidate the cached background
+        self._fig.canvas.mpl_connect('draw_event', self._on_draw)
+        # Shown without plt.ion(), so global interactive mode and with it the
+        # blocking plt.show() at the end of the run are left as they were
+        self._fig.show()
+        self._fig.canvas.draw()
+
+    def _decimate(self, values):
+        # Every stride-th sample counted back from the newest, which is always kept
+        return values[..., ::-1][..., ::self.stride][..., ::-1]
+
+    def _on_draw(self, event):
+        canvas = self._fig.canvas
+        self._background = canvas.copy_from_bbox(self._fig.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for artist in (*self._lines, self._title):
+            self._fig.draw_artist(artist)
+
+    def draw(self, step):
+        """Push the current window to the screen"""
+        if self._fig is None:
+            self._setup()
+        i = self._count % self.window
+        # Slots not written yet are still NaN, so a part-filled window just draws shorter
+        window = self._decimate(self._buf[:, i:i + self.window])
+        for line, values in zip(self._lines, window):
+            line.set_data(self._x, values)
+        self._title.set_text(f'Step {step}  |  t = {step * self.dt:.1f} s')
+        canvas = self._fig.canvas
+        if self._background is None:
+            canvas.draw()
+        else:
+            canvas.restore_region(self._background)
+            self._draw_artists()
+            canvas.blit(self._fig.bbox)
+        canvas.flush_events()
+        self.draws += 1
+
+    def close(self):
+        if self._fig is not None:
+            import matplotlib.pyplot as plt
+            plt.close(self._fig)
+            self._fig = None
@@ -0,0 +1,271 @@
+import argparse
+import glob
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+from ACC_LCA_virtual_env_simulation import run_headless
+
+# Parameters the controller takes; the three scenario weights are swept separately
+PARAMETERS = {
+    'cruise_speed': 100.0,
+    'safety_distance': 200.0,
+    'radar_range': 250.0,
+    'accel_step': 5.0,
+    'weight_slower': 4.0,
+    'weight_free': 2.0,
+    'weight_faster': 2.0,
+}
+METRICS = ('mean_speed', 'min_speed', 'max_speed', 'obstacles', 'overtakes', 'lane_changes', 'obstacle_steps')
+SPEC_NAME = "sweep.json"
+
+def grid_design(space):
+    """Every combination of the listed values; space maps name -> list of values"""
+    names = list(space)
+    points = np.array(list(itertools.product(*(space[name] for name in names))), dtype=np.float64)
+    return names, points.reshape(-1, len(names))
+
+def _scale(unit, space, names):
+    """Map [0, 1) columns onto (low, high) ranges or pick from explicit value lists"""
+    points = np.empty_like(unit)
+    for j, name in enumerate(names):
+        bounds = space[name]
+        if isinstance(bounds, tuple):
+            low, high = bounds
+            points[:, j] = low + unit[:, j] * (high - low)
+        else:
+            values = np.asarray(bounds, dtype=np.float64)
+            points[:, j] = values[np.minimum((unit[:, j] * len(values)).astype(int), len(values) - 1)]
+    return points
+
+def random_design(space, n_points, seed=0):
+    """Independent uniform draws; (low, high) tuples are ranges, lists are choices"""
+    names = list(space)
+    unit = np.random.default_rng(seed).random((n_points, len(names)))
+    return names, _scale(unit, space, names)
+
+def latin_hypercube_design(space, n_points, seed=0):
+    """One draw in each of n_points equal strata per parameter, strata shuffled per column"""
+    names = list(space)
+    rng = np.random.default_rng(seed)
+    unit = (rng.random((n_points, len(names))) + np.arange(n_points)[:, None]) / n_points
+    for j in range(len(names)):
+        unit[:, j] = unit[rng.permutation(n_points), j]
+    return names, _scale(unit, space, names)
+
+def task_seed(base_seed, index, replicate):
+    """Seed for one run, fixed by (base seed, point index, replicate) alone"""
+    return int(np.random.SeedSequence([base_seed, index, replicate]).generate_state(1, np.uint64)[0])
+
+def run_point(params, steps, seeds, traffic=None):
+    """Run one design point once per seed and return replicate-averaged metrics.
+
+    traffic is vehicles per lane of a seeded TrafficWorld, or None for the
+    random obstacle model.
+    """
+    params = dict(PARAMETERS, **params)
+    weights = (params.pop('weight_slower'), params.pop('weight_free'), params.pop('weight_faster'))
+    totals = np.zeros(len(METRICS))
+    mean_speeds = []
+    for seed in seeds:
+        summary = run_headless(params['cruise_speed'], seed=seed, steps=steps,
+                               safety_distance=params['safety_distance'],
+                               radar_range=params['radar_range'],
+                               accel_step=params['accel_step'], scenario_weights=weights,
+                               traffic=traffic)['summary']
+        totals += [summary[name] for name in METRICS]
+        mean_speeds.append(summary['mean_speed'])
+    row = dict(zip(METRICS, totals / len(seeds)))
+    row['mean_speed_std'] = float(np.std(mean_speeds, ddof=1)) if len(seeds) > 1 else 0.0
+    return row
+
+def run_chunk(chunk_id, names, points, start, steps, replicates, base_seed, traffic=None):
+    """Worker entry point: simulate rows start.. of points and return the chunk as columns"""
+    indices = np.arange(start, start + len(points))
+    rows = []
+    for index, values in zip(indices, points):
+        seeds = [task_seed(base_seed, int(index), r) for r in range(replicates)]
+        rows.append(run_point(dict(zip(names, values.tolist())), steps, seeds, traffic))
+    columns = {'index': indices}
+    for j, name in enumerate(names):
+        columns[name] = points[:, j]
+    for name in rows[0]:
+        columns[name] = np.array([row[name] for row in rows])
+    return chunk_id, columns
+
+def _have_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def _chunk_path(out_dir, chunk_id, fmt):
+    return os.path.join(out_dir, f"chunk_{chunk_id:06d}.{fmt}")
+
+def write_chunk(out_dir, chunk_id, columns, fmt):
+    """Write one chunk atomically, so a half-written file never counts as done on resume"""
+    path = _chunk_path(out_dir, chunk_id, fmt)
+    tmp_path = path + ".tmp"
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        pq.write_table(pa.table(columns), tmp_path)
+    else:
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **columns)
+    os.replace(tmp_path, path)
+    return path
+
+def completed_chunks(out_dir, fmt):
+    done = set()
+    for path in glob.glob(os.path.join(out_dir, f"chunk_*.{fmt}")):
+        done.add(int(os.path.basename(path).split("_")[1].split(".")[0]))
+    return done
+
+def load_results(out_dir):
+    """All finished chunks of a sweep as one dict of columns, ordered by point index"""
+    with open(os.path.join(out_dir, SPEC_NAME)) as f:
+        fmt = json.load(f)['format']
+    parts = []
+    for path in sorted(glob.glob(os.path.join(out_dir, f"chunk_*.{fmt}"))):
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            table = pq.read_table(path)
+            parts.append({name: table.column(name).to_numpy() for name in table.column_names})
+        else:
+            with np.load(path) as data:
+                parts.append({name: data[name] for name in data.files})
+    if not parts:
+        return {}
+    columns = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+    order = np.argsort(columns['index'], kind="stable")
+    return {name: values[order] for name, values in columns.items()}
+
+def run_sweep(out_dir, names, points, steps=500, replicates=1, seed=0, workers=None,
+              chunk_size=64, fmt="auto", progress=None, traffic=None):
+    """Run every design point across a process pool, writing results chunk by chunk.
+
+    Each run's seed depends only on (seed, point index, replicate), so results
+    do not depend on worker count or completion order. Re-running with the
+    same out_dir resumes: chunks already on disk are skipped. progress, if
+    given, is called with (points_done, points_total).
+    """
+    unknown = set(names) - set(PARAMETERS)
+    if unknown:
+        raise ValueError(f"unknown parameters: {', '.join(sorted(unknown))}")
+    points = np.asarray(points, dtype=np.float64).reshape(-1, len(names))
+    os.makedirs(out_dir, exist_ok=True)
+    spec_path = os.path.join(out_dir, SPEC_NAME)
+    design_path = os.path.join(out_dir, "design.npy")
+    previous = None
+    if os.path.exists(spec_path):
+        with open(spec_path) as f:
+            previous = json.load(f)
+    # "auto" is resolved once and the concrete format stored, so a resume keeps
+    # the original format even if pyarrow was installed or removed since
+    if fmt == "auto":
+        if previous is not None:
+            fmt = previous['format']
+        else:
+            fmt = "parquet" if _have_pyarrow() else "npz"
+    if fmt == "parquet" and not _have_pyarrow():
+        raise RuntimeError("parquet output needs pyarrow; install it or use --format npz")
+    spec = {'names': list(names), 'points': len(points), 'steps': steps, 'replicates': replicates,
+            'seed': seed, 'chunk_size': chunk_size, 'format': fmt, 'traffic': traffic}
+    if previous is not None:
+        if previous != spec or not np.array_equal(np.load(design_path), points):
+            raise ValueError(f"{out_dir} holds a different sweep; use a new folder to start over")
+    else:
+        np.save(design_path, points)
+        with open(spec_path, "w") as f:
+            json.dump(spec, f, indent=2)
+
+    n_chunks = (len(points) + chunk_size - 1) // chunk_size
+    done = completed_chunks(out_dir, fmt)
+    pending = [c for c in range(n_chunks) if c not in done]
+    points_done = len(points) - sum(len(points[c * chunk_size:(c + 1) * chunk_size]) for c in pending)
+    start_time = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        queue = iter(pending)
+        in_flight = set()
+        # A couple of chunks per worker keeps every core busy without queueing the whole design
+        while True:
+            for chunk_id in itertools.islice(queue, max(0, 2 * workers - len(in_flight))):
+                start = chunk_id * chunk_size
+                in_flight.add(pool.submit(run_chunk, chunk_id, names, points[start:start + chunk_size],
+                                          start, steps, replicates, seed, traffic))
+            if not in_flight:
+                break
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                chunk_id, columns = future.result()
+                write_chunk(out_dir, chunk_id, columns, fmt)
+                points_done += len(columns['index'])
+                if progress:
+                    progress(points_done, len(points))
+    return {
+        'out_dir': out_dir,
+        'points': len(points),
+        'chunks_run': len(pending),
+        'chunks_skipped': n_chunks - len(pending),
+        'seconds': time.perf_counter() - start_time,
+        'format': fmt,
+    }
+
+def parse_param(text):
+    """name=low:high (range), name=low:high:n (grid of n), or name=v1,v2,..."""
+    name, _, value = text.partition("=")
+    if name not in PARAMETERS or not value:
+        raise argparse.ArgumentTypeError(f"expected one of {', '.join(PARAMETERS)} as name=value, got {text!r}")
+    if ":" in value:
+        parts = [float(v) for v in value.split(":")]
+        if len(parts) == 3:
+            return name, np.linspace(parts[0], parts[1], int(parts[2])).tolist()
+        if len(parts) == 2:
+            return name, (parts[0], parts[1])
+        raise argparse.ArgumentTypeError(f"bad range {value!r}")
+    return name, [float(v) for v in value.split(",")]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parameter sweep of the ACC/LCA simulation over a process pool")
+    parser.add_argument("--out", required=True, help="results folder; re-run with the same folder to resume")
+    parser.add_argument("--design", choices=["grid", "random", "lhs"], default="grid")
+    parser.add_argument("--param", action="append", type=parse_param, default=[],
+                        help="name=low:high, name=low:high:n or name=v1,v2,...; repeat per parameter")
+    parser.add_argument("--points", type=int, default=1000, help="design size for random and lhs")
+    parser.add_argument("--replicates", type=int, default=1, help="seeded runs per design point")
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--traffic", type=int,
+                        help="vehicles per lane of a simulated ring road; without it obstacles are random")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=64)
+    parser.add_argument("--format", choices=["auto", "npz", "parquet"], default="auto")
+    args = parser.parse_args(argv)
+    if not args.param:
+        parser.error("give at least one --param")
+    space = dict(args.param)
+    if args.design == "grid":
+        if any(isinstance(v, tuple) for v in space.values()):
+            parser.error("grid designs need value lists or low:high:n ranges")
+        names, points = grid_design(space)
+    elif args.design == "random":
+        names, points = random_design(space, args.points, args.seed)
+    else:
+        names, points = latin_hypercube_design(space, args.points, args.seed)
+
+    def progress(done, total):
+        print(f"\r{done}/{total} points", end="", flush=True)
+
+    stats = run_sweep(args.out, names, points, steps=args.steps, replicates=args.replicates,
+                      seed=args.seed, workers=args.workers, chunk_size=args.chunk_size,
+                      fmt=args.format, progress=progress, traffic=args.traffic)
+    print()
+    print(json.dumps(stats, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+import argparse
+import json
+import math
+import mmap
+import struct
+import time
+from ACC_LCA_virtual_env_simulation import EnhancedCruiseControl
+
+MAGIC = b"ACCLOG\x00\x01"
+TRAILER_MAGIC = b"ACCLOGIX"
+HEADER_LEN = struct.Struct("<I")
+# Records: a tag byte, then a fixed body (K carries a JSON state of the given length)
+EVENT = struct.Struct("<cBd")            # b'E', kind, value
+STEP = struct.Struct("<cIddbb")          # b'S', step, speed, obstacle speed (NaN if none), lane, gear
+SNAPSHOT = struct.Struct("<cII")         # b'K', step, JSON length
+INDEX_ENTRY = struct.Struct("<IQQ")      # step, file offset of its K record, events before it
+TRAILER = struct.Struct("<QI8s")         # index offset, index entries, TRAILER_MAGIC
+
+# RNG calls the controller makes: obstacle scenario and lane picks are choices,
+# obstacle speed and duration are randint, overtake and lane-change rolls are random
+EV_RANDOM, EV_RANDINT, EV_CHOICE = range(3)
+
+class ReplayDivergence(Exception):
+    """The replayed run asked for something the log does not hold"""
+
+class RecordingRandom:
+    """Wraps a random.Random and reports every result the controller draws"""
+
+    def __init__(self, rng, on_event):
+        self._rng = rng
+        self._on_event = on_event
+
+    def random(self):
+        value = self._rng.random()
+        self._on_event(EV_RANDOM, value)
+        return value
+
+    def randint(self, a, b):
+        value = self._rng.randint(a, b)
+        self._on_event(EV_RANDINT, value)
+        return value
+
+    def choices(self, population, weights=None, k=1):
+        picks = self._rng.choices(population, weights=weights, k=k)
+        for pick in picks:
+            self._on_event(EV_CHOICE, population.index(pick))
+        return picks
+
+    def choice(self, seq):
+        pick = self._rng.choice(seq)
+        self._on_event(EV_CHOICE, seq.index(pick))
+        return pick
+
+class ReplayRandom:
+    """Hands back recorded results in order instead of drawing new ones"""
+
+    def __init__(self, next_event):
+        self._next_event = next_event
+
+    def _take(self, kind):
+        got, value = self._next_event()
+        if got != kind:
+            raise ReplayDivergence(f"expected RNG event {kind}, log has {got}")
+        return value
+
+    def random(self):
+        return self._take(EV_RANDOM)
+
+    def randint(self, a, b):
+        return int(self._take(EV_RANDINT))
+
+    def choices(self, population, weights=None, k=1):
+        return [population[int(self._take(EV_CHOICE))] for _ in range(k)]
+
+    def choice(self, seq):
+        return seq[int(self._take(EV_CHOICE))]
+
+def _step_record(controller):
+    obstacle = controller.obstacle
+    return (controller.step_counter, float(controller.current_speed),
+            float(obstacle['speed']) if obstacle['exists'] else math.nan,
+            controller.current_lane, controller._calculate_gear())
+
+def _same_step(a, b):
+    # NaN != NaN, so compare the obstacle column by its missing-ness
+    return (a[0], a[1], a[3], a[4]) == (b[0], b[1], b[3], b[4]) and (
+        a[2] == b[2] or (math.isnan(a[2]) and math.isnan(b[2])))
+
+class RunLogWriter:
+    """Streams one run to a binary log while it happens.
+
+    Attach before the run: the writer records the controller's parameters
+    and initial state, swaps its RNG for a RecordingRandom and registers an
+    observer that appends each step's state. Every snapshot_every steps the
+    full controller state is written as well, and close() appends an index
+    of those snapshots so readers can seek without scanning.
+    """
+
+    def __init__(self, path, controller, snapshot_every=1000):
+        if controller.world is not None:
+            raise ValueError("run logs cover the random obstacle model; traffic-world runs are not recorded")
+        self.snapshot_every = snapshot_every
+        self._f = open(path, "wb")
+        self._events = 0
+        self._index = []
+        params = controller.results()['params']
+        header = json.dumps({'version': 1, 'params': params, 'dt': controller.dt,
+                             'snapshot_every': snapshot_every}).encode()
+        self._f.write(MAGIC + HEADER_LEN.pack(len(header)) + header)
+        self._snapshot(controller)
+        controller.rng = RecordingRandom(controller.rng, self._event)
+        controller.observers.append(self._after_step)
+
+    def _event(self, kind, value):
+        self._f.write(EVENT.pack(b"E", kind, value))
+        self._events += 1
+
+    def _snapshot(self, controller):
+        state = json.dumps(controller.get_state()).encode()
+        self._index.append((controller.step_counter, self._f.tell(), self._events))
+        self._f.write(SNAPSHOT.pack(b"K", controller.step_counter, len(state)) + state)
+
+    def _after_step(self, controller):
+        self._f.write(STEP.pack(b"S", *_step_record(controller)))
+        if controller.step_counter % self.snapshot_every == 0:
+            self._snapshot(controller)
+
+    def close(self):
+        """Write the snapshot index and trailer; the log is readable up to the last logged step"""
+        if self._f.closed:
+            return
+        index_offset = self._f.tell()
+        for entry in self._index:
+            self._f.write(INDEX_ENTRY.pack(*entry))
+        self._f.write(TRAILER.pack(index_offset, len(self._index), TRAILER_MAGIC))
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class RunLog:
+    """Reader and replay engine for a RunLogWriter file"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = self._buf
+        if buf[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not an ACC run log")
+        (header_len,) = HEADER_LEN.unpack_from(buf, len(MAGIC))
+        start = len(MAGIC) + HEADER_LEN.size
+        self.header = json.loads(buf[start:start + header_len])
+        index_offset, entries, magic = TRAILER.unpack_from(buf, len(buf) - TRAILER.size)
+        if magic != TRAILER_MAGIC:
+            raise ValueError(f"{path} has no snapshot index; the run was not closed cleanly")
+        self._end = index_offset
+        self.snapshots = [INDEX_ENTRY.unpack_from(buf, index_offset + i * INDEX_ENTRY.size)
+                          for i in range(entries)]
+
+    def close(self):
+        self._buf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _records(self, offset):
+        buf, end = self._buf, self._end
+        while offset < end:
+            tag = buf[offset:offset + 1]
+            if tag == b"E":
+                _, kind, value = EVENT.unpack_from(buf, offset)
+                offset += EVENT.size
+                yield tag, (kind, value)
+            elif tag == b"S":
+                record = STEP.unpack_from(buf, offset)[1:]
+                offset += STEP.size
+                yield tag, record
+            elif tag == b"K":
+                _, step, length = SNAPSHOT.unpack_from(buf, offset)
+                offset += SNAPSHOT.size
+                yield tag, (step, offset, length)
+                offset += length
+            else:
+                raise ValueError(f"corrupt record at byte {offset}")
+
+    def steps(self):
+        """Logged per-step states as (step, speed, obstacle speed, lane, gear) tuples"""
+        return [record for tag, record in self._records(self.snapshots[0][1]) if tag == b"S"]
+
+    def _controller(self):
+        params = self.header['params']
+        return EnhancedCruiseControl(params['cruise_speed'], seed=params['seed'], steps=params['steps'],
+                                     safety_distance=params['safety_distance'],
+                                     radar_range=params['radar_range'], verbose=False,
+                                     accel_step=params['accel_step'],
+                                     scenario_weights=params['scenario_weights'],
+                                     dt=self.header['dt'])
+
+    def replay(self, to_step=None, from_step=None, verify=True):
+        """Re-run the logged trajectory and return the controller at to_step (default: the end).
+
+        The run restarts from the nearest snapshot at or before from_step,
+        which defaults to to_step, so seeking costs at most snapshot_every
+        steps; with neither given the whole run is replayed from the start.
+        The RNG is fed from the log; with verify each replayed step is
+        checked against the logged state. ValueError if from_step is past
+        to_step or the log ends before the requested step.
+        """
+        if from_step is not None and to_step is not None and from_step > to_step:
+            raise ValueError(f"from_step {from_step} is past to_step {to_step}")
+        start = from_step if from_step is not None else (to_step or 0)
+        step, offset, _ = max((s for s in self.snapshots if s[0] <= start), default=self.snapshots[0])
+        records = self._records(offset)
+        _, (_, state_offset, length) = next(records)
+        controller = self._controller()
+        controller.set_state(json.loads(self._buf[state_offset:state_offset + length]))
+        pushed_back = []
+
+        def pull():
+            # Next E or S record (snapshots are only for seeking), or None at the end
+            while True:
+                item = pushed_back.pop() if pushed_back else next(records, None)
+                if item is None or item[0] != b"K":
+                    return item
+
+        def next_event():
+            item = pull()
+            if item is None or item[0] != b"E":
+                raise ReplayDivergence(f"step {controller.step_counter} drew more random numbers than were logged")
+            return item[1]
+
+        controller.rng = ReplayRandom(next_event)
+        while to_step is None or controller.step_counter < to_step:
+            item = pull()
+            if item is None:
+                break
+            pushed_back.append(item)
+            controller.step()
+            item = pull()
+            if item is None or item[0] != b"S":
+                raise ReplayDivergence(f"step {controller.step_counter} drew fewer random numbers than were logged")
+            if verify and not _same_step(_step_record(controller), item[1]):
+                raise ReplayDivergence(f"step {item[1][0]}: replayed {_step_record(controller)}, logged {item[1]}")
+        wanted = max(start, to_step or 0)
+        if controller.step_counter < wanted:
+            raise ValueError(f"{self.path} ends at step {controller.step_counter}, before step {wanted}")
+        return controller
+
+def self_check(steps=2500, snapshot_every=1000):
+    """Record a short run and check seeking and the replay range checks"""
+    import os
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "check.acclog")
+        controller = EnhancedCruiseControl(100, seed=7, steps=steps, verbose=False)
+        with RunLogWriter(path, controller, snapshot_every):
+            controller.run_simulation(step_delay=0, plot=False)
+        with RunLog(path) as log:
+            full = log.replay(1500, 0).get_state()
+            seeked = log.replay(1500)
+            if seeked.step_counter != 1500 or seeked.get_state() != full:
+                raise AssertionError("seeking to step 1500 via a snapshot differs from replaying from 0")
+            for to_step, from_step, reason in ((1500, 2500, "past to_step"), (1500, 1501, "past to_step"),
+                                               (None, steps + 1, "ends at step"), (steps + 1, None, "ends at step")):
+                try:
+                    controller = log.replay(to_step, from_step)
+                except ValueError as error:
+                    if reason in str(error):
+                        continue
+                    raise AssertionError(f"replay(to_step={to_step}, from_step={from_step}): {error}")
+                raise AssertionError(f"replay(to_step={to_step}, from_step={from_step}) returned "
+                                     f"step {controller.step_counter} instead of raising ValueError")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record and replay ACC/LCA simulation runs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    record = sub.add_parser("record", help="run the simulation headless and log it")
+    record.add_argument("log")
+    record.add_argument("--speed", type=float, default=100)
+    record.add_argument("--seed", type=int)
+    record.add_argument("--steps", type=int, default=500)
+    record.add_argument("--safety-distance", type=float, default=200)
+    record.add_argument("--radar-range", type=float, default=250)
+    record.add_argument("--snapshot-every", type=int, default=1000)
+    replay = sub.add_parser("replay", help="re-run a log, optionally only up to one step")
+    replay.add_argument("log")
+    replay.add_argument("--to", type=int, help="stop at this step (seeks via the snapshot index)")
+    replay.add_argument("--from", dest="from_step", type=int,
+                        help="replay from the snapshot at or before this step (default: --to, else 0)")
+    replay.add_argument("--no-verify", action="store_true")
+    info = sub.add_parser("info", help="print a log's header and snapshot index")
+    info.add_argument("log")
+    sub.add_parser("self-check", help="record a short run and check seeking and replay ranges")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        controller = EnhancedCruiseControl(args.speed, seed=args.seed, steps=args.steps,
+                                           safety_distance=args.safety_distance,
+                                           radar_range=args.radar_range, verbose=False)
+        start = time.perf_counter()
+        with RunLogWriter(args.log, controller, args.snapshot_every):
+            results = controller.run_simulation(step_delay=0, plot=False)
+        print(json.dumps({'summary': results['summary'], 'seconds': time.perf_counter() - start}))
+        return
+    if args.command == "self-check":
+        self_check()
+        print("self-check passed")
+        return
+    if args.command == "replay" and None not in (args.to, args.from_step) and args.from_step > args.to:
+        parser.error("--from must not be past --to")
+    with RunLog(args.log) as log:
+        if args.command == "info":
+            print(json.dumps({'header': log.header, 'snapshots': [s[0] for s in log.snapshots]}, indent=2))
+            return
+        start = time.perf_counter()
+        controller = log.replay(args.to, args.from_step, verify=not args.no_verify)
+        print(json.dumps({'step': controller.step_counter, 'state': controller.get_state(),
+                          'seconds': time.perf_counter() - start}))
+
+if __name__ == "__main__":
+    main()
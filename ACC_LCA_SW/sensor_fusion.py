@@ -0,0 +1,371 @@
+import argparse
+import asyncio
+import collections
+import itertools
+import json
+import re
+import statistics
+import time
+
+# Matches ADAS_MAIN.ino logSensorData: "Lane:2 FC:15cm FL:40cm FR:0cm RL:33cm RR:0cm"
+ULTRASONIC_LINE = re.compile(
+    r"Lane:(\d+)\s+FC:(\d+)cm\s+FL:(\d+)cm\s+FR:(\d+)cm\s+RL:(\d+)cm\s+RR:(\d+)cm")
+# Radar frames: "RADAR:123.4m SPEED:87.0kmh", or "RADAR:none" when nothing is in range
+RADAR_LINE = re.compile(r"RADAR:(?:none|([\d.]+)m\s+SPEED:([\d.]+)kmh)")
+# Same thresholds as the sketch (cm)
+LANE_CHANGE_DISTANCE = 30
+ARDUINO_PERIOD = 0.1         # s, the sketch's delay(100) between lines
+
+UltrasonicReading = collections.namedtuple("UltrasonicReading", "time lane fc fl fr rl rr")
+RadarReading = collections.namedtuple("RadarReading", "time range speed")
+
+class Snapshot(collections.namedtuple(
+        "Snapshot", "time lane front front_left front_right rear_left rear_right radar_range radar_speed latency")):
+    """Fused sensor state at one decision.
+
+    Ultrasonic distances are in cm as the sketch logs them, so 0 when
+    nothing echoed back, and None when the channel is stale. radar_range (m) is None with no target or a
+    stale radar. latency is the age in seconds of the newest reading used.
+    """
+
+    def side_clear(self, side, clearance=LANE_CHANGE_DISTANCE):
+        """True if both the front and rear sensor on 'left' or 'right' see more than clearance cm.
+
+        Like the sketch's lane change check, a 0 cm (no echo) reading does
+        not count as clear.
+        """
+        front, rear = (self.front_left, self.rear_left) if side == "left" else (self.front_right, self.rear_right)
+        return front is not None and rear is not None and front > clearance and rear > clearance
+
+def parse_line(line, timestamp):
+    """UltrasonicReading or RadarReading for one text line, or None if it is neither"""
+    match = ULTRASONIC_LINE.search(line)
+    if match:
+        lane, *distances = (int(v) for v in match.groups())
+        return UltrasonicReading(timestamp, lane, *distances)
+    match = RADAR_LINE.search(line)
+    if match:
+        if match.group(1) is None:
+            return RadarReading(timestamp, None, None)
+        return RadarReading(timestamp, float(match.group(1)), float(match.group(2)))
+    return None
+
+class SerialSource:
+    """Lines from a serial port (the Arduino prototype); needs pyserial.
+
+    pyserial's readline blocks, so it runs in the default executor and the
+    event loop never waits on the port.
+    """
+
+    def __init__(self, port, baudrate=9600):
+        self.port = port
+        self.baudrate = baudrate
+
+    async def lines(self):
+        try:
+            import serial
+        except ImportError:
+            raise RuntimeError("reading a serial port needs pyserial (pip install pyserial)") from None
+        loop = asyncio.get_running_loop()
+        conn = await loop.run_in_executor(None, lambda: serial.Serial(self.port, self.baudrate, timeout=1))
+        try:
+            while True:
+                raw = await loop.run_in_executor(None, conn.readline)
+                if raw:
+                    yield time.monotonic(), raw.decode("ascii", "replace")
+        finally:
+            conn.close()
+
+class ReplaySource:
+    """Lines from a recorded file, paced like the original capture.
+
+    A line may start with its capture time in seconds ("12.30 Lane:2 ...");
+    a line without one comes ARDUINO_PERIOD after the previous line. rate > 1
+    replays faster, with timestamps scaled to match; loop=True starts over
+    at the end.
+    """
+
+    def __init__(self, path, rate=1.0, loop=False):
+        self.path = path
+        self.rate = rate
+        self.loop = loop
+
+    def _read(self):
+        records = []
+        last = -ARDUINO_PERIOD
+        with open(self.path) as f:
+            for line in f:
+                head, _, rest = line.strip().partition(" ")
+                try:
+                    last = float(head)
+                except ValueError:
+                    last += ARDUINO_PERIOD
+                    rest = line.strip()
+                records.append((last, rest))
+        return records
+
+    async def lines(self):
+        records = await asyncio.get_running_loop().run_in_executor(None, self._read)
+        if not records:
+            return
+        first = records[0][0]
+        span = records[-1][0] - first + ARDUINO_PERIOD
+        lap = 0
+        while True:
+            start = time.monotonic()
+            for t, line in records:
+                elapsed = (t - first) / self.rate
+                delay = start + elapsed - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                # Capture time, so alignment follows the recording, not our scheduling
+                yield elapsed + lap * span / self.rate, line
+            if not self.loop:
+                return
+            lap += 1
+
+class TcpSource:
+    """Lines from a TCP stream, e.g. the stand-in server below or a bridge to real sensors"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+
+    async def lines(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    return
+                yield time.monotonic(), raw.decode("ascii", "replace")
+        finally:
+            writer.close()
+
+class SensorFusion:
+    """Merges readings from any number of sources into one latest Snapshot.
+
+    Each source's clock is mapped onto time.monotonic() by the offset seen
+    on its first reading, and readings older than the newest one already
+    held for that channel are dropped. Ultrasonic distances are the median
+    of the last `debounce` readings, and a new lane number must repeat
+    `debounce` times before it is accepted. A channel older than max_age
+    seconds is reported as stale (None).
+    """
+
+    def __init__(self, sources, debounce=3, max_age=0.5):
+        self.sources = list(sources)
+        self.debounce = debounce
+        self.max_age = max_age
+        self._offsets = {}
+        self._distances = collections.deque(maxlen=debounce)
+        self._ultrasonic_time = None
+        self._lane = None
+        self._lane_candidate = (None, 0)
+        self._radar = None
+        self._updated = asyncio.Event()
+        self.readings = 0
+        self.dropped = 0
+
+    def update(self, source_id, timestamp, line):
+        reading = parse_line(line, timestamp)
+        if reading is None:
+            return
+        if source_id not in self._offsets:
+            self._offsets[source_id] = time.monotonic() - timestamp
+        reading = reading._replace(time=timestamp + self._offsets[source_id])
+        if isinstance(reading, RadarReading):
+            if self._radar is not None and reading.time < self._radar.time:
+                self.dropped += 1
+                return
+            self._radar = reading
+        else:
+            if self._ultrasonic_time is not None and reading.time < self._ultrasonic_time:
+                self.dropped += 1
+                return
+            self._ultrasonic_time = reading.time
+            self._distances.append(reading[2:])
+            candidate, count = self._lane_candidate
+            count = count + 1 if reading.lane == candidate else 1
+            self._lane_candidate = (reading.lane, count)
+            if self._lane is None or count >= self.debounce:
+                self._lane = reading.lane
+        self.readings += 1
+        self._updated.set()
+
+    def snapshot(self, now=None):
+        now = time.monotonic() if now is None else now
+        fresh_ultrasonic = self._ultrasonic_time is not None and now - self._ultrasonic_time <= self.max_age
+        if fresh_ultrasonic:
+            distances = [statistics.median(channel) for channel in zip(*self._distances)]
+        else:
+            distances = [None] * 5
+        radar = self._radar
+        fresh_radar = radar is not None and now - radar.time <= self.max_age
+        newest = max((t for t in (self._ultrasonic_time, radar and radar.time) if t is not None), default=None)
+        return Snapshot(
+            now,
+            self._lane if fresh_ultrasonic else None,
+            *distances,
+            radar.range if fresh_radar else None,
+            radar.speed if fresh_radar else None,
+            None if newest is None else now - newest,
+        )
+
+    async def wait_update(self, timeout):
+        """Wait up to timeout seconds for any new reading; True if one arrived"""
+        try:
+            await asyncio.wait_for(self._updated.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._updated.clear()
+        return True
+
+    async def _pump(self, source_id, source):
+        async for timestamp, line in source.lines():
+            self.update(source_id, timestamp, line)
+
+    async def run(self):
+        """Read every source until all of them end"""
+        await asyncio.gather(*(self._pump(i, source) for i, source in enumerate(self.sources)))
+
+async def drive(controller, fusion, steps, min_interval=0.02):
+    """Run controller decisions from fused sensor data.
+
+    A decision follows each new reading straight away (but no more often
+    than min_interval) and happens at least every controller.dt without
+    one, so sensor-to-decision latency stays bounded by one decision's
+    compute time. Returns the latency of each decision in seconds.
+    """
+    reader = asyncio.ensure_future(fusion.run())
+    latencies = []
+    last = 0.0
+    try:
+        for _ in range(steps):
+            if reader.done():
+                break
+            await fusion.wait_update(controller.dt)
+            wait = min_interval - (time.monotonic() - last)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            last = time.monotonic()
+            snapshot = fusion.snapshot(last)
+            controller.step_from_snapshot(snapshot)
+            if snapshot.latency is not None:
+                latencies.append(time.monotonic() - last + snapshot.latency)
+    finally:
+        reader.cancel()
+        try:
+            await reader
+        except asyncio.CancelledError:
+            pass
+    return latencies
+
+async def serve_stand_in(path, host="127.0.0.1", port=7000, rate=1.0):
+    """TCP server that streams a replay file to each client, standing in for the hardware"""
+    async def handle(reader, writer):
+        try:
+            async for _, line in ReplaySource(path, rate=rate, loop=True).lines():
+                writer.write((line + "\n").encode("ascii"))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        await server.serve_forever()
+
+def _address(text):
+    host, _, port = text.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+def self_check():
+    """Check that fused readings allow lane changes exactly where the sketch would.
+
+    Covers 0 cm (no echo) side and front readings, which the sketch treats
+    as not clear and as no obstacle respectively.
+    """
+    from ACC_LCA_virtual_env_simulation import EnhancedCruiseControl
+
+    for fl, fr, rl, rr in itertools.product((0, 10, 30, 31, 200), repeat=4):
+        snapshot = Snapshot(0.0, 2, 100, fl, fr, rl, rr, None, None, 0.0)
+        # ADAS_MAIN.ino checkLaneChange: raw distances against LANE_CHANGE_DISTANCE
+        sketch_left = fl > LANE_CHANGE_DISTANCE and rl > LANE_CHANGE_DISTANCE
+        sketch_right = fr > LANE_CHANGE_DISTANCE and rr > LANE_CHANGE_DISTANCE
+        if (snapshot.side_clear("left"), snapshot.side_clear("right")) != (sketch_left, sketch_right):
+            raise AssertionError(f"FL:{fl} FR:{fr} RL:{rl} RR:{rr}: side_clear disagrees with the sketch")
+
+    # End to end: in the centre lane with the left blocked and FR/RR at 0 the sketch stays put
+    fusion = SensorFusion([], debounce=1)
+    fusion.update("check", 0.0, "Lane:2 FC:0cm FL:10cm FR:0cm RL:12cm RR:0cm")
+    snapshot = fusion.snapshot()
+    if (snapshot.front_right, snapshot.rear_right) != (0, 0):
+        raise AssertionError(f"FR/RR parsed as {snapshot.front_right}/{snapshot.rear_right}, not 0")
+    controller = EnhancedCruiseControl(100, seed=0, steps=1, verbose=False)
+    controller.step_from_snapshot(snapshot)
+    if controller.obstacle['exists']:
+        raise AssertionError("FC:0cm (no echo) was taken as an obstacle")
+    lane = controller._get_available_lane()
+    if lane is not None:
+        raise AssertionError(f"lane change to {lane} allowed with FR/RR at 0 cm")
+
+def main(argv=None):
+    from ACC_LCA_virtual_env_simulation import EnhancedCruiseControl
+
+    parser = argparse.ArgumentParser(description="Drive the ACC/LCA controller from live or recorded sensor feeds")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="feed sensor data to the controller")
+    run.add_argument("--serial", action="append", default=[], help="serial port of the Arduino prototype")
+    run.add_argument("--baud", type=int, default=9600)
+    run.add_argument("--replay", action="append", default=[], help="recorded sensor log")
+    run.add_argument("--tcp", action="append", default=[], type=_address, help="host:port of a line stream")
+    run.add_argument("--rate", type=float, default=1.0, help="replay speed-up")
+    run.add_argument("--speed", type=float, default=100, help="cruise speed in km/h")
+    run.add_argument("--steps", type=int, default=500)
+    run.add_argument("--debounce", type=int, default=3)
+    run.add_argument("--max-age", type=float, default=0.5, help="s before a channel counts as stale")
+    run.add_argument("--quiet", action="store_true")
+    stand_in = sub.add_parser("stand-in", help="serve a replay file over TCP in place of the hardware")
+    stand_in.add_argument("replay")
+    stand_in.add_argument("--listen", type=_address, default=("127.0.0.1", 7000))
+    stand_in.add_argument("--rate", type=float, default=1.0)
+    sub.add_parser("self-check", help="check that fused readings gate lane changes like the sketch")
+    args = parser.parse_args(argv)
+
+    if args.command == "self-check":
+        self_check()
+        print("self-check passed")
+        return
+
+    if args.command == "stand-in":
+        host, port = args.listen
+        try:
+            asyncio.run(serve_stand_in(args.replay, host, port, args.rate))
+        except KeyboardInterrupt:
+            pass
+        return
+    sources = ([SerialSource(port, args.baud) for port in args.serial]
+               + [ReplaySource(path, args.rate) for path in args.replay]
+               + [TcpSource(host, port) for host, port in args.tcp])
+    if not sources:
+        parser.error("give at least one --serial, --replay or --tcp source")
+    controller = EnhancedCruiseControl(args.speed, steps=args.steps, verbose=not args.quiet)
+    fusion = SensorFusion(sources, debounce=args.debounce, max_age=args.max_age)
+    latencies = asyncio.run(drive(controller, fusion, args.steps))
+    controller.trace.flush()
+    latencies_ms = sorted(1000.0 * t for t in latencies)
+    print(json.dumps({
+        'summary': controller.results()['summary'],
+        'readings': fusion.readings,
+        'dropped_out_of_order': fusion.dropped,
+        'decisions': len(latencies_ms),
+        'latency_ms': {
+            'p50': latencies_ms[len(latencies_ms) // 2],
+            'max': latencies_ms[-1],
+        } if latencies_ms else None,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
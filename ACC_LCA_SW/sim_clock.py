@@ -0,0 +1,122 @@
+import array
+import time
+import numpy as np
+
+MODES = ("afap", "scaled", "realtime")
+
+class SimClock:
+    """Simulation clock that paces fixed dt steps against wall time.
+
+    mode 'afap' runs steps back to back; 'scaled' runs `rate` simulated
+    seconds per wall second; 'realtime' is rate 1 with deadline tracking.
+    Deadlines are absolute (start + n * dt / rate) so sleep error never
+    accumulates. A step that finishes after its deadline is an overrun; in
+    realtime mode the schedule is then re-anchored instead of bursting
+    through the backlog, which is what a hardware-in-the-loop peer expects.
+    The last `spin` seconds before a deadline are busy-waited for accuracy.
+    """
+
+    def __init__(self, dt=0.1, mode="afap", rate=1.0, spin=0.0005, clock=time.perf_counter, sleep=time.sleep):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}, got {mode!r}")
+        if mode == "realtime":
+            rate = 1.0
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.dt = dt
+        self.mode = mode
+        self.rate = rate
+        self.spin = spin
+        self._clock = clock
+        self._sleep = sleep
+        self.step = 0
+        self.overruns = 0
+        self._origin = None
+        self._end = None
+        self._start = None
+        self._anchor_step = 0
+        self._step_start = None
+        # Per-step samples, in seconds: compute time, and how late each step started
+        self.latency = array.array('d')
+        self.lateness = array.array('d')
+
+    @property
+    def sim_time(self):
+        return self.step * self.dt
+
+    @property
+    def wall_time(self):
+        """Wall seconds from the first step to the end of the last one"""
+        return 0.0 if self._origin is None else self._end - self._origin
+
+    def _deadline(self, step):
+        return self._start + (step - self._anchor_step) * self.dt / self.rate
+
+    def begin_step(self):
+        """Call before each step"""
+        now = self._clock()
+        if self._start is None:
+            self._origin = self._start = self._end = now
+        elif self.mode != "afap":
+            self.lateness.append(now - self._deadline(self.step))
+        self._step_start = now
+
+    def end_step(self):
+        """Call after each step; sleeps until the next step is due"""
+        now = self._clock()
+        self.latency.append(now - self._step_start)
+        self.step += 1
+        self._end = now
+        if self.mode == "afap":
+            return
+        deadline = self._deadline(self.step)
+        if now > deadline:
+            self.overruns += 1
+            if self.mode == "realtime":
+                self._start, self._anchor_step = now, self.step
+            return
+        remaining = deadline - now - self.spin
+        if remaining > 0:
+            self._sleep(remaining)
+        while self._clock() < deadline:
+            pass
+        self._end = deadline
+
+    def run(self, step_fn, steps):
+        for _ in range(steps):
+            self.begin_step()
+            step_fn()
+            self.end_step()
+        return self.stats()
+
+    def stats(self):
+        """Timing summary; latencies and jitter in milliseconds"""
+        latency = np.frombuffer(self.latency, dtype=np.float64) * 1000.0
+        lateness = np.frombuffer(self.lateness, dtype=np.float64) * 1000.0
+        wall = self.wall_time
+        stats = {
+            'mode': self.mode,
+            'dt': self.dt,
+            'target_rate': None if self.mode == "afap" else self.rate,
+            'steps': self.step,
+            'sim_seconds': self.sim_time,
+            'wall_seconds': wall,
+            'achieved_rate': self.sim_time / wall if wall > 0 else None,
+            'overruns': self.overruns,
+            'latency_ms': None,
+            'jitter_ms': None,
+        }
+        if latency.size:
+            stats['latency_ms'] = {
+                'mean': float(latency.mean()),
+                'p50': float(np.percentile(latency, 50)),
+                'p99': float(np.percentile(latency, 99)),
+                'max': float(latency.max()),
+            }
+        if lateness.size:
+            stats['jitter_ms'] = {
+                'std': float(lateness.std()),
+                'p99': float(np.percentile(np.abs(lateness), 99)),
+                'max': float(np.abs(lateness).max()),
+            }
+        return stats
@@ -0,0 +1,139 @@
+import enum
+import json
+import os
+import numpy as np
+
+NAN = float('nan')
+
+class Lane(enum.IntEnum):
+    LEFT = 1
+    CENTER = 2
+    RIGHT = 3
+
+# 14 bytes per step; speeds in km/h, NaN obstacle_speed means no obstacle in range
+COLUMNS = {
+    'step': np.int32,
+    'speed': np.float32,
+    'obstacle_speed': np.float32,
+    'lane': np.int8,
+    'gear': np.int8,
+}
+SIDECAR_NAME = "trace.json"
+# Rows are staged as tuples and copied into the columns this many at a time
+BLOCK_ROWS = 4096
+
+class TraceBuffer:
+    """Growable typed columns for per-step simulation traces.
+
+    In memory the columns start at `capacity` rows and double when full.
+    With a `path` each column is a raw file in that folder mapped with
+    np.memmap, so the OS pages old rows out and resident memory stays small
+    however long the run; trace.json next to them records dtypes and length.
+    append() stages rows in a short list and writes them as one block, which
+    is far cheaper per step than five scalar stores into NumPy arrays.
+    """
+
+    def __init__(self, capacity=1024, path=None, dt=0.1):
+        self.dt = dt
+        self.path = path
+        self._length = 0
+        self._pending = []
+        self._capacity = max(int(capacity), 1)
+        if path:
+            os.makedirs(path, exist_ok=True)
+        self._columns = {name: self._allocate(name, dtype, self._capacity) for name, dtype in COLUMNS.items()}
+
+    def _column_file(self, name):
+        return os.path.join(self.path, f"{name}.bin")
+
+    def _allocate(self, name, dtype, capacity):
+        if not self.path:
+            return np.empty(capacity, dtype=dtype)
+        filename = self._column_file(name)
+        with open(filename, "ab") as f:
+            f.truncate(capacity * np.dtype(dtype).itemsize)
+        return np.memmap(filename, dtype=dtype, mode="r+", shape=(capacity,))
+
+    def _grow(self):
+        capacity = self._capacity * 2
+        for name, dtype in COLUMNS.items():
+            old = self._columns[name]
+            if self.path:
+                old.flush()
+                del old
+                self._columns[name] = self._allocate(name, dtype, capacity)
+            else:
+                new = np.empty(capacity, dtype=dtype)
+                new[:self._length] = old[:self._length]
+                self._columns[name] = new
+        self._capacity = capacity
+
+    def append(self, step, speed, obstacle_speed, lane, gear):
+        """Add one row; obstacle_speed None is stored as NaN"""
+        pending = self._pending
+        pending.append((step, speed, NAN if obstacle_speed is None else obstacle_speed, lane, gear))
+        if len(pending) >= BLOCK_ROWS:
+            self._drain()
+
+    def _drain(self):
+        pending = self._pending
+        if not pending:
+            return
+        while self._length + len(pending) > self._capacity:
+            self._grow()
+        start, end = self._length, self._length + len(pending)
+        for name, values in zip(COLUMNS, zip(*pending)):
+            self._columns[name][start:end] = values
+        self._length = end
+        pending.clear()
+
+    def __len__(self):
+        return self._length + len(self._pending)
+
+    def column(self, name):
+        """View (no copy) of the filled part of a column"""
+        self._drain()
+        return self._columns[name][:self._length]
+
+    @property
+    def time(self):
+        return self.column('step') * self.dt
+
+    def obstacle_mask(self):
+        """True for steps with an obstacle in range"""
+        return ~np.isnan(self.column('obstacle_speed'))
+
+    def flush(self):
+        """Push mapped pages to disk and update the sidecar; no-op in memory"""
+        self._drain()
+        if not self.path:
+            return
+        for array in self._columns.values():
+            array.flush()
+        meta = {'length': self._length, 'capacity': self._capacity, 'dt': self.dt,
+                'columns': {name: np.dtype(dtype).str for name, dtype in COLUMNS.items()}}
+        with open(os.path.join(self.path, SIDECAR_NAME), "w") as f:
+            json.dump(meta, f, indent=2)
+
+    def save_npy(self, out_dir):
+        """Write each filled column as <name>.npy, straight from the buffer"""
+        os.makedirs(out_dir, exist_ok=True)
+        for name in COLUMNS:
+            np.save(os.path.join(out_dir, f"{name}.npy"), self.column(name))
+        return out_dir
+
+    @classmethod
+    def open(cls, path, mode="r"):
+        """Map a trace written with a path, without reading it into memory"""
+        with open(os.path.join(path, SIDECAR_NAME)) as f:
+            meta = json.load(f)
+        trace = cls.__new__(cls)
+        trace.dt = meta['dt']
+        trace.path = path
+        trace._length = meta['length']
+        trace._pending = []
+        trace._capacity = meta['capacity']
+        trace._columns = {name: np.memmap(os.path.join(path, f"{name}.bin"), dtype=np.dtype(dtype_str),
+                                          mode=mode, shape=(meta['capacity'],))
+                          for name, dtype_str in meta['columns'].items()}
+        return trace
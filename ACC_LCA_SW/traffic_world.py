@@ -0,0 +1,117 @@
+import collections
+import numpy as np
+from trace_buffer import Lane
+
+# Desired-speed distribution per lane in km/h: overtaking lane fastest
+LANE_SPEEDS = {Lane.LEFT: (120, 10), Lane.CENTER: (100, 10), Lane.RIGHT: (85, 8)}
+MIN_GAP = 15.0       # m, bumper-to-bumper minimum in any lane
+HEADWAY = 1.5        # s, traffic vehicles follow their leader inside this time gap
+REAR_MARGIN = 2.0    # s of closing speed a vehicle behind needs after we cut in
+
+RadarContact = collections.namedtuple("RadarContact", "gap speed vehicle_id")
+
+class TrafficWorld:
+    """Multi-lane ring road of traffic vehicles for radar and lane-change queries.
+
+    All vehicles live in one set of arrays grouped in fixed per-lane blocks,
+    each block sorted by position, so "nearest vehicle ahead or behind" is
+    one np.searchsorted on that lane's slice. advance() moves every vehicle
+    at once with a follow-the-leader rule and re-sorts the blocks; the data
+    is nearly sorted, which the stable sort handles in close to linear time.
+    """
+
+    def __init__(self, vehicles_per_lane=30, length=10000.0, seed=None):
+        self.length = float(length)
+        self.rng = np.random.default_rng(seed)
+        positions, desired = [], []
+        n = vehicles_per_lane
+        for lane in Lane:
+            mean, std = LANE_SPEEDS[lane]
+            # Evenly spread with jitter, so no two start closer than MIN_GAP
+            spacing = self.length / max(n, 1)
+            jitter = self.rng.uniform(0, max(spacing - MIN_GAP, 0), n)
+            positions.append(np.arange(n) * spacing + jitter)
+            desired.append(np.clip(self.rng.normal(mean, std, n), 60, 150))
+        self.position = np.concatenate(positions)
+        self.desired = np.concatenate(desired)
+        self.speed = self.desired.copy()
+        self.ids = np.arange(len(self.position))
+        # Lane blocks never change size: traffic keeps its lane
+        self.lane_start = np.arange(len(Lane) + 1) * n
+        block = np.repeat(np.arange(len(Lane)), n)
+        self._sort_base = block * (2 * self.length)
+        # Index of each vehicle's leader: the next one in its block, wrapping
+        self._leader = np.arange(1, len(self.position) + 1)
+        if n:
+            self._leader[self.lane_start[1:] - 1] = self.lane_start[:-1]
+
+    @property
+    def vehicle_count(self):
+        return len(self.position)
+
+    def lane_vehicles(self, lane):
+        """(positions, speeds) views of one lane, sorted by position"""
+        s = slice(self.lane_start[lane - 1], self.lane_start[lane])
+        return self.position[s], self.speed[s]
+
+    def advance(self, dt):
+        """Move all traffic dt seconds forward"""
+        if not len(self.position):
+            return
+        length = self.length
+        position, speed, leader = self.position, self.speed, self._leader
+        gap = (position[leader] - position) % length
+        following = gap < MIN_GAP + (HEADWAY / 3.6) * speed
+        # A lone vehicle in its lane is its own leader and never follows
+        following &= leader != np.arange(len(leader))
+        speed = np.where(following, np.minimum(self.desired, speed[leader]), self.desired)
+        position = (position + speed * (dt / 3.6)) % length
+        order = np.argsort(self._sort_base + position, kind="stable")
+        self.position = position[order]
+        self.speed = speed[order]
+        self.desired = self.desired[order]
+        self.ids = self.ids[order]
+
+    def _contact(self, lane, index, gap):
+        i = self.lane_start[lane - 1] + index
+        return RadarContact(float(gap), float(self.speed[i]), int(self.ids[i]))
+
+    def nearest_ahead(self, lane, position, max_range):
+        """RadarContact for the first vehicle in front within max_range m, or None"""
+        pos, _ = self.lane_vehicles(lane)
+        n = len(pos)
+        if not n:
+            return None
+        i = int(np.searchsorted(pos, position % self.length, side="right")) % n
+        gap = (pos[i] - position) % self.length
+        return self._contact(lane, i, gap) if gap <= max_range else None
+
+    def nearest_behind(self, lane, position, max_range):
+        """RadarContact for the first vehicle behind within max_range m, or None"""
+        pos, _ = self.lane_vehicles(lane)
+        n = len(pos)
+        if not n:
+            return None
+        # side="right" so a vehicle level with us counts as behind, at gap 0
+        i = (int(np.searchsorted(pos, position % self.length, side="right")) - 1) % n
+        gap = (position - pos[i]) % self.length
+        return self._contact(lane, i, gap) if gap <= max_range else None
+
+    def lane_change_feasible(self, lane, position, speed, safety_distance, radar_range):
+        """True if moving into lane at position leaves safe gaps ahead and behind.
+
+        A slower vehicle ahead must be at least safety_distance away; a
+        faster one only MIN_GAP. A vehicle behind needs MIN_GAP plus
+        REAR_MARGIN seconds of its closing speed.
+        """
+        ahead = self.nearest_ahead(lane, position, radar_range)
+        if ahead is not None:
+            required = safety_distance if ahead.speed < speed else MIN_GAP
+            if ahead.gap < required:
+                return False
+        behind = self.nearest_behind(lane, position, radar_range)
+        if behind is not None:
+            closing = max(behind.speed - speed, 0.0) / 3.6
+            if behind.gap < MIN_GAP + REAR_MARGIN * closing:
+                return False
+        return True
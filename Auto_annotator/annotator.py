@@ -0,0 +1,447 @@
+import argparse
+import json
+import mmap
+import os
+import queue
+import sys
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+from PIL import Image, ImageOps
+from image_probe import probe_size
+from manifest import Manifest, bytes_hash, in_shard, shard_manifest_name
+from model_cache import load_model
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+VEHICLE_CLASSES = {"car", "truck", "bus", "auto rickshaw"}
+BIKE_CLASSES = {"bicycle", "motorcycle"}
+
+def build_class_map():
+    class_map = {name: 0 for name in VEHICLE_CLASSES}
+    class_map.update({name: 1 for name in BIKE_CLASSES})
+    return class_map
+
+def iter_image_paths(img_dir, shard_index=0, shard_count=1):
+    """Stream image paths from a folder without building the full listing.
+
+    With shard_count > 1 only the images hashed to shard_index are yielded.
+    """
+    with os.scandir(img_dir) as entries:
+        for entry in entries:
+            if (entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS)
+                    and in_shard(entry.name, shard_index, shard_count)):
+                yield entry.path
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def decode_image(img_path, imgsz=0, with_hash=False):
+    """Decode an image once into the BGR array the model takes.
+
+    The file is memory-mapped, so the content hash and the decoder read the
+    same pages with no extra copy. EXIF orientation is applied, as it was
+    when the model opened paths itself. With imgsz set the image is shrunk
+    to fit imgsz x imgsz, and JPEGs are decoded straight at reduced scale.
+
+    Returns (array, content_hash), with content_hash None unless with_hash,
+    or None for unreadable or corrupt files.
+    """
+    try:
+        size = probe_size(img_path)
+        with open(img_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            content_hash = bytes_hash(buf) if with_hash else None
+            img = Image.open(buf)
+            w, h = size or img.size
+            if imgsz and max(w, h) > imgsz:
+                scale = imgsz / max(w, h)
+                img.draft("RGB", (max(1, int(w * scale)), max(1, int(h * scale))))
+            img = ImageOps.exif_transpose(img.convert("RGB"))
+        if imgsz:
+            img.thumbnail((imgsz, imgsz))
+    except (OSError, ValueError):
+        # ValueError: mmap refuses empty files
+        return None
+    return np.ascontiguousarray(np.asarray(img)[:, :, ::-1]), content_hash
+
+def decode_batch(img_paths, imgsz=0, with_hash=False):
+    """Decode a list of paths, returning ([(path, array, content_hash)], seconds spent)"""
+    start = time.perf_counter()
+    batch = []
+    for img_path in img_paths:
+        decoded = decode_image(img_path, imgsz, with_hash)
+        if decoded is not None:
+            batch.append((img_path,) + decoded)
+    return batch, time.perf_counter() - start
+
+def prefetch(iterable, depth):
+    """Run an iterator on a background thread, keeping up to `depth` items ready"""
+    if depth <= 0:
+        yield from iterable
+        return
+    buffer = queue.Queue(maxsize=depth)
+    done = object()
+    stop = threading.Event()
+
+    def put(item):
+        # Give up once the consumer has gone away instead of blocking forever
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def producer():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(e)
+        put(done)
+
+    threading.Thread(target=producer, daemon=True).start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+def iter_batches(img_paths, batch_size, imgsz=0, pool=None, queue_size=2, with_hash=False):
+    """Decode images into (batch, decode_seconds) pairs, in input order.
+
+    Each batch is a list of (path, array, content_hash) with unreadable
+    images left out.
+
+    With a process pool each batch is decoded in a worker and at most
+    queue_size batches are in flight; without one, decoding happens on a
+    background thread that keeps queue_size batches ready.
+    """
+    path_batches = chunked(img_paths, batch_size)
+    if pool is None:
+        decoded = (decode_batch(paths, imgsz, with_hash) for paths in path_batches)
+        for batch, seconds in prefetch(decoded, queue_size):
+            if batch:
+                yield batch, seconds
+        return
+    pending = deque()
+    try:
+        for paths in path_batches:
+            pending.append(pool.submit(decode_batch, paths, imgsz, with_hash))
+            if len(pending) >= queue_size:
+                batch, seconds = pending.popleft().result()
+                if batch:
+                    yield batch, seconds
+        while pending:
+            batch, seconds = pending.popleft().result()
+            if batch:
+                yield batch, seconds
+    finally:
+        # Abandoned early (cancelled): drop decodes that have not started
+        for future in pending:
+            future.cancel()
+
+def to_numpy(values):
+    return values.cpu().numpy() if hasattr(values, "cpu") else np.asarray(values)
+
+def build_class_lookup(names, class_map):
+    """Array mapping model class index -> custom class id, -1 for classes we drop"""
+    lookup = np.full(max(names) + 1, -1, dtype=np.int64)
+    for cls, name in names.items():
+        if name in class_map:
+            lookup[cls] = class_map[name]
+    return lookup
+
+def round5(values):
+    """round(v, 5) for every element, matching Python's correctly rounded result.
+
+    np.round scales by 1e5 first, which can tip values lying within float
+    error of a .5 boundary the other way; those few are redone with round().
+    """
+    rounded = np.round(values, 5)
+    scaled = values * 1e5
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_half.any():
+        rounded[near_half] = [round(v, 5) for v in values[near_half].tolist()]
+    return rounded
+
+def label_rows(results, class_lookup, w, h):
+    """Unique (class_id, x, y, w, h) label rows for one result, in first-seen order"""
+    boxes = results.boxes
+    if len(boxes) == 0:
+        return []
+    custom_ids = class_lookup[to_numpy(boxes.cls).astype(np.int64)]
+    keep = custom_ids >= 0
+    if not keep.any():
+        return []
+    xywh = to_numpy(boxes.xywh)[keep].astype(np.float64)
+    xywh /= np.array([w, h, w, h], dtype=np.float64)
+    coords = round5(xywh)
+    custom_ids = custom_ids[keep]
+    rows = np.column_stack((custom_ids.astype(np.float64), coords))
+    _, first = np.unique(rows, axis=0, return_index=True)
+    first.sort()
+    return [(cls,) + tuple(coord) for cls, coord in zip(custom_ids[first].tolist(), coords[first].tolist())]
+
+def label_path_for(img_path, output_dir=None):
+    stem = os.path.splitext(img_path)[0]
+    if output_dir:
+        stem = os.path.join(output_dir, os.path.basename(stem))
+    return stem + ".txt"
+
+def label_set(results, class_lookup, w, h):
+    # Emit rows in the order the old set-based writer produced them, so label
+    # files stay byte-identical: a set built from the first occurrences of each
+    # row iterates exactly like one that also saw the duplicates.
+    return set(label_rows(results, class_lookup, w, h))
+
+def write_labels(img_path, annotations, output_dir=None):
+    label_path = label_path_for(img_path, output_dir)
+    # Write then rename, so an interrupted run never leaves a half-written label
+    tmp_path = label_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write("".join(f"{anno[0]} {anno[1]} {anno[2]} {anno[3]} {anno[4]}\n" for anno in annotations))
+    os.replace(tmp_path, label_path)
+
+def write_batch(batch, results, class_lookup, manifest=None, output_dir=None):
+    """Post-process and write one batch of labels.
+
+    Returns (images written, post-processing seconds, writing seconds).
+    """
+    postprocess_seconds = 0.0
+    write_seconds = 0.0
+    for (img_path, img, content_hash), result in zip(batch, results):
+        start = time.perf_counter()
+        h, w = img.shape[:2]
+        annotations = label_set(result, class_lookup, w, h)
+        written = time.perf_counter()
+        write_labels(img_path, annotations, output_dir)
+        if manifest is not None:
+            class_counts = Counter(str(anno[0]) for anno in annotations)
+            manifest.record(img_path, content_hash, dict(class_counts))
+        postprocess_seconds += written - start
+        write_seconds += time.perf_counter() - written
+    return len(batch), postprocess_seconds, write_seconds
+
+def timed(iterable, stage_seconds, stage):
+    """Yield from iterable, adding the time spent producing items to stage_seconds[stage]"""
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            stage_seconds[stage] += time.perf_counter() - start
+        yield item
+
+def annotate_images(model_path, img_dir, batch_size=16, prefetch_depth=2,
+                    workers=None, writers=2, imgsz=640, incremental=False,
+                    manifest_path=None, output_dir=None, shard_index=0, shard_count=1,
+                    decode_pool=None, progress=None, cancel=None, model=None):
+    """Label every image in img_dir with a decode -> infer -> write pipeline.
+
+    Decoding runs on `workers` processes (0 decodes on a background thread),
+    the model runs once per batch on the calling thread and label files are
+    written by `writers` threads. prefetch_depth bounds the number of batches
+    queued between stages. Label files go next to each image, or into
+    output_dir when given.
+
+    With incremental=True, images already labelled with the same model file
+    and class map are skipped, based on a manifest kept at manifest_path
+    (default: .annotations.sqlite in the label folder).
+
+    shard_index/shard_count split the folder deterministically by file name
+    hash, so N machines can each take one shard with no coordination. Sharded
+    runs are always incremental and keep a per-shard manifest; combine them
+    with `python manifest.py merge`.
+
+    The model comes from the in-process model cache, and a long-lived caller
+    can pass its own decode_pool to skip process start-up. Passing a loaded
+    model (anything with .names that maps a list of arrays to results with
+    .boxes, as bench.StubDetector does) skips loading model_path entirely.
+
+    progress, if given, is called from the calling thread after each batch
+    of labels is written, with a dict of images done, skipped and total,
+    images per second, ETA in seconds and per-stage latency in ms per image.
+    Setting the cancel event stops the run after the batches already in
+    flight are written; every label file on disk is complete either way.
+
+    Returns a dict with the image count, skipped count, whether the run was
+    cancelled, elapsed seconds, images per second and seconds per stage
+    (list, decode, infer, postprocess, write), summed over workers.
+    """
+    if model is None:
+        model, weights_hash = load_model(model_path, imgsz)
+    else:
+        weights_hash = f"injected:{type(model).__name__}"
+    class_map = build_class_map()
+    class_lookup = build_class_lookup(model.names, class_map)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    queue_size = max(1, prefetch_depth)
+    start = time.perf_counter()
+    count = 0
+    skipped = 0
+    cancelled = False
+    stage_seconds = {'list': 0.0, 'decode': 0.0, 'infer': 0.0, 'postprocess': 0.0, 'write': 0.0}
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(f"shard_index must be in [0, {shard_count}), got {shard_index}")
+    incremental = incremental or shard_count > 1
+    # A cheap listing pass gives the progress display a total to work from
+    total = sum(1 for _ in iter_image_paths(img_dir, shard_index, shard_count)) if progress else None
+    img_paths = timed(iter_image_paths(img_dir, shard_index, shard_count), stage_seconds, 'list')
+    manifest = None
+    if incremental:
+        manifest_path = manifest_path or os.path.join(output_dir or img_dir,
+                                                      shard_manifest_name(shard_index, shard_count))
+        manifest = Manifest(manifest_path,
+                            img_dir, weights_hash, class_map)
+
+        def pending_paths(paths):
+            nonlocal skipped
+            for img_path in paths:
+                if manifest.needs_annotation(img_path):
+                    yield img_path
+                else:
+                    skipped += 1
+
+        img_paths = pending_paths(img_paths)
+    owns_pool = decode_pool is None and workers > 0
+    if owns_pool:
+        decode_pool = ProcessPoolExecutor(max_workers=workers)
+
+    def report():
+        elapsed = time.perf_counter() - start
+        rate = count / elapsed if elapsed > 0 else 0.0
+        remaining = total - count - skipped if total is not None else None
+        progress({
+            'done': count,
+            'skipped': skipped,
+            'total': total,
+            'images_per_sec': rate,
+            'eta_seconds': remaining / rate if remaining is not None and rate > 0 else None,
+            'stage_ms': {stage: 1000.0 * seconds / count if count else 0.0
+                         for stage, seconds in stage_seconds.items()},
+        })
+
+    def finish_write(future):
+        nonlocal count
+        written, postprocess_seconds, write_seconds = future.result()
+        count += written
+        stage_seconds['postprocess'] += postprocess_seconds
+        stage_seconds['write'] += write_seconds
+        if progress is not None:
+            report()
+
+    batches = iter_batches(img_paths, batch_size, imgsz, decode_pool, queue_size,
+                           with_hash=incremental)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, writers)) as write_pool:
+            pending_writes = deque()
+            for batch, decode_seconds in batches:
+                if cancel is not None and cancel.is_set():
+                    cancelled = True
+                    break
+                stage_seconds['decode'] += decode_seconds
+                infer_start = time.perf_counter()
+                results = model([img for _, img, _ in batch], verbose=False)
+                stage_seconds['infer'] += time.perf_counter() - infer_start
+                pending_writes.append(write_pool.submit(write_batch, batch, results,
+                                                        class_lookup, manifest, output_dir))
+                while len(pending_writes) > queue_size:
+                    finish_write(pending_writes.popleft())
+            while pending_writes:
+                finish_write(pending_writes.popleft())
+        if progress is not None:
+            report()
+    finally:
+        batches.close()
+        if owns_pool:
+            decode_pool.shutdown(cancel_futures=True)
+        if manifest is not None:
+            manifest.close()
+    elapsed = time.perf_counter() - start
+    return {
+        'images': count,
+        'skipped': skipped,
+        'cancelled': cancelled,
+        'shard': f"{shard_index}/{shard_count}",
+        'seconds': elapsed,
+        'images_per_sec': count / elapsed if elapsed > 0 else 0.0,
+        'stage_seconds': stage_seconds,
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Auto-annotate a folder of images with a YOLO model")
+    parser.add_argument("--model", required=True, help="YOLO weights file (.pt)")
+    parser.add_argument("--input", required=True, help="folder of .jpg/.jpeg/.png images")
+    parser.add_argument("--output", help="folder for label files (default: next to each image)")
+    parser.add_argument("--batch-size", type=int, default=16, help="images per model call")
+    parser.add_argument("--prefetch", type=int, default=2, help="batches queued between stages")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="decode processes, 0 to decode on a thread (default: one per core)")
+    parser.add_argument("--writers", type=int, default=2, help="label writer threads")
+    parser.add_argument("--imgsz", type=int, default=640,
+                        help="shrink images to fit this size before inference, 0 to keep full size")
+    parser.add_argument("--incremental", action="store_true",
+                        help="skip images already labelled with this model and class map")
+    parser.add_argument("--manifest", help="manifest path for --incremental")
+    parser.add_argument("--shard-index", type=int, default=0,
+                        help="which shard of the folder this run labels (0-based)")
+    parser.add_argument("--shard-count", type=int, default=1,
+                        help="number of machines/jobs splitting the folder")
+    parser.add_argument("--socket",
+                        help="hand the job to a warm worker listening on this Unix socket "
+                             "(start one with: python worker.py serve)")
+    args = parser.parse_args(argv)
+    if not os.path.isfile(args.model):
+        parser.error(f"model not found: {args.model}")
+    if not os.path.isdir(args.input):
+        parser.error(f"image folder not found: {args.input}")
+    if not 0 <= args.shard_index < args.shard_count:
+        parser.error("--shard-index must be between 0 and --shard-count - 1")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    options = dict(
+        batch_size=args.batch_size,
+        prefetch_depth=args.prefetch,
+        workers=args.workers,
+        writers=args.writers,
+        imgsz=args.imgsz,
+        incremental=args.incremental,
+        manifest_path=args.manifest,
+        output_dir=args.output,
+        shard_index=args.shard_index,
+        shard_count=args.shard_count,
+    )
+    if args.socket:
+        from worker import submit
+        stats = submit(args.model, args.input, socket_path=args.socket, **options)
+    else:
+        stats = annotate_images(args.model, args.input, **options)
+    print(json.dumps(stats))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,79 +1,145 @@
 import os
-import tkinter as tk
-from tkinter import filedialog, messagebox
-from ultralytics import YOLO
-from PIL import Image
-
-def annotate_images(model_path, img_dir):
-    model = YOLO(model_path)
-    names = model.names
-    vehicle_classes = {"car", "truck", "bus", "auto rickshaw"}
-    bike_classes = {"bicycle", "motorcycle"}
-    class_map = {name: 0 for name in vehicle_classes}
-    class_map.update({name: 1 for name in bike_classes})
-    for img_file in os.listdir(img_dir):
-        if not img_file.lower().endswith(('.jpg', '.jpeg', '.png')):
-            continue
-        img_path = os.path.join(img_dir, img_file)
-        results = model(img_path)[0]
-        h, w = Image.open(img_path).size
-        annotations = set()
-        for box in results.boxes:
-            cls = int(box.cls.item())
-            name = names[cls]
-            if name not in class_map:
-                continue
-            custom_id = class_map[name]
-            xywh = box.xywh[0].tolist()
-            x_center = xywh[0] / w
-            y_center = xywh[1] / h
-            bw = xywh[2] / w
-            bh = xywh[3] / h
-            key = (custom_id, round(x_center, 5), round(y_center, 5), round(bw, 5), round(bh, 5))
-            annotations.add(key)
-        label_path = os.path.splitext(img_path)[0] + ".txt"
-        with open(label_path, "w") as f:
-            for anno in annotations:
-                f.write(f"{anno[0]} {anno[1]} {anno[2]} {anno[3]} {anno[4]}\n")
-
-def select_model():
-    path = filedialog.askopenfilename(filetypes=[("YOLOv8 .pt", "*.pt")])
-    if path:
-        model_entry.delete(0, tk.END)
-        model_entry.insert(0, path)
-
-def select_folder():
-    path = filedialog.askdirectory()
-    if path:
-        folder_entry.delete(0, tk.END)
-        folder_entry.insert(0, path)
-
-def run():
-    model_path = model_entry.get().strip()
-    folder_path = folder_entry.get().strip()
-    if not os.path.exists(model_path) or not os.path.exists(folder_path):
-        messagebox.showerror("Error", "Invalid model or image folder path")
-        return
-    try:
-        annotate_images(model_path, folder_path)
-        messagebox.showinfo("Success", "Annotations complete!")
-    except Exception as e:
-        messagebox.showerror("Error", str(e))
-
-app = tk.Tk()
-app.title("Auto Annotator")
-app.geometry("500x200")
-
-tk.Label(app, text="Model Path").pack()
-model_entry = tk.Entry(app, width=60)
-model_entry.pack()
-tk.Button(app, text="Browse Model", command=select_model).pack()
-
-tk.Label(app, text="Image Folder").pack()
-folder_entry = tk.Entry(app, width=60)
-folder_entry.pack()
-tk.Button(app, text="Browse Folder", command=select_folder).pack()
-
-tk.Button(app, text="Run Annotation", command=run).pack(pady=10)
-
-app.mainloop()
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+def main():
+    # Tk is only needed for the window; the annotator itself runs headless
+    import tkinter as tk
+    from tkinter import filedialog, messagebox, ttk
+    from annotator import annotate_images
+    from worker import submit, worker_available
+
+    def select_model():
+        path = filedialog.askopenfilename(filetypes=[("YOLOv8 .pt", "*.pt")])
+        if path:
+            model_entry.delete(0, tk.END)
+            model_entry.insert(0, path)
+
+    def select_folder():
+        path = filedialog.askdirectory()
+        if path:
+            folder_entry.delete(0, tk.END)
+            folder_entry.insert(0, path)
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    updates = queue.Queue()
+    job = {}
+
+    def annotate(model_path, folder_path, cancel):
+        # Runs on the executor thread; the Tk widgets are only touched from poll()
+        def progress(update):
+            updates.put(update)
+        if worker_available():
+            try:
+                return submit(model_path, folder_path, progress=progress, cancel=cancel)
+            except ConnectionError:
+                pass
+        return annotate_images(model_path, folder_path, progress=progress, cancel=cancel)
+
+    def run():
+        model_path = model_entry.get().strip()
+        folder_path = folder_entry.get().strip()
+        if not os.path.exists(model_path) or not os.path.exists(folder_path):
+            messagebox.showerror("Error", "Invalid model or image folder path")
+            return
+        job['cancel'] = threading.Event()
+        job['future'] = executor.submit(annotate, model_path, folder_path, job['cancel'])
+        run_button.config(state=tk.DISABLED)
+        cancel_button.config(state=tk.NORMAL)
+        progress_bar.config(value=0)
+        status.set("Loading model...")
+        stages.set("")
+        app.after(100, poll)
+
+    def cancel_run():
+        if 'cancel' in job:
+            job['cancel'].set()
+            cancel_button.config(state=tk.DISABLED)
+            status.set("Cancelling after the batches in flight...")
+
+    def show_progress(update):
+        done = update['done'] + update['skipped']
+        total = update['total']
+        if total:
+            progress_bar.config(maximum=total, value=done)
+        eta = update['eta_seconds']
+        eta_text = time.strftime("%H:%M:%S", time.gmtime(eta)) if eta is not None else "--:--:--"
+        status.set(f"{done}/{total if total is not None else '?'} images | "
+                   f"{update['images_per_sec']:.1f} img/s | ETA {eta_text}")
+        stages.set(" | ".join(f"{stage} {ms:.1f} ms/img" for stage, ms in update['stage_ms'].items()))
+
+    def poll():
+        latest = None
+        while True:
+            try:
+                latest = updates.get_nowait()
+            except queue.Empty:
+                break
+        if latest is not None:
+            show_progress(latest)
+        future = job['future']
+        if not future.done():
+            app.after(100, poll)
+            return
+        run_button.config(state=tk.NORMAL)
+        cancel_button.config(state=tk.DISABLED)
+        try:
+            stats = future.result()
+        except Exception as e:
+            status.set("Failed")
+            messagebox.showerror("Error", str(e))
+            return
+        summary = f"{stats['images']} images at {stats['images_per_sec']:.1f} img/s"
+        if stats.get('cancelled'):
+            status.set(f"Cancelled: {summary}")
+            messagebox.showinfo("Cancelled", f"Annotation cancelled.\n{summary} labelled")
+        else:
+            status.set(f"Done: {summary}")
+            messagebox.showinfo("Success", f"Annotations complete!\n{summary}")
+
+    def close():
+        if 'cancel' in job:
+            job['cancel'].set()
+        executor.shutdown(wait=False)
+        app.destroy()
+
+    app = tk.Tk()
+    app.title("Auto Annotator")
+    app.geometry("500x300")
+    app.protocol("WM_DELETE_WINDOW", close)
+
+    tk.Label(app, text="Model Path").pack()
+    model_entry = tk.Entry(app, width=60)
+    model_entry.pack()
+    tk.Button(app, text="Browse Model", command=select_model).pack()
+
+    tk.Label(app, text="Image Folder").pack()
+    folder_entry = tk.Entry(app, width=60)
+    folder_entry.pack()
+    tk.Button(app, text="Browse Folder", command=select_folder).pack()
+
+    buttons = tk.Frame(app)
+    buttons.pack(pady=10)
+    run_button = tk.Button(buttons, text="Run Annotation", command=run)
+    run_button.pack(side=tk.LEFT, padx=5)
+    cancel_button = tk.Button(buttons, text="Cancel", command=cancel_run, state=tk.DISABLED)
+    cancel_button.pack(side=tk.LEFT, padx=5)
+
+    progress_bar = ttk.Progressbar(app, length=400, mode="determinate")
+    progress_bar.pack()
+    status = tk.StringVar()
+    tk.Label(app, textvariable=status).pack()
+    stages = tk.StringVar()
+    tk.Label(app, textvariable=stages).pack()
+
+    app.mainloop()
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Any arguments mean a headless run, e.g. from cron
+        from annotator import main as cli_main
+        sys.exit(cli_main())
+    main()
@@ -0,0 +1,176 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import numpy as np
+from PIL import Image
+from annotator import annotate_images
+
+# (width, height) mix: phone photos, dashcam frames, thumbnails, portrait shots
+CORPUS_SIZES = [(640, 480), (1280, 720), (1920, 1080), (4000, 3000), (320, 240), (1080, 1920)]
+CORPUS_FORMATS = ["jpg", "png", "jpeg"]
+STUB_NAMES = {0: "person", 1: "bicycle", 2: "car", 3: "motorcycle", 5: "bus", 7: "truck", 9: "traffic light"}
+
+def generate_corpus(corpus_dir, count, seed=0):
+    """Write a reproducible set of synthetic images, reusing an identical existing corpus"""
+    stamp_path = os.path.join(corpus_dir, ".corpus.json")
+    stamp = {'count': count, 'seed': seed, 'sizes': CORPUS_SIZES, 'formats': CORPUS_FORMATS}
+    if os.path.exists(stamp_path):
+        with open(stamp_path) as f:
+            if json.load(f) == json.loads(json.dumps(stamp)):
+                return corpus_dir
+        shutil.rmtree(corpus_dir)
+    os.makedirs(corpus_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    for i in range(count):
+        w, h = CORPUS_SIZES[rng.integers(len(CORPUS_SIZES))]
+        fmt = CORPUS_FORMATS[rng.integers(len(CORPUS_FORMATS))]
+        # Smooth gradient plus a few flat boxes compresses like a real photo, unlike pure noise
+        ys = np.linspace(0, 255, h, dtype=np.float32)[:, None]
+        xs = np.linspace(0, 255, w, dtype=np.float32)[None, :]
+        img = np.empty((h, w, 3), dtype=np.uint8)
+        for channel, (a, b) in enumerate(rng.uniform(0, 1, (3, 2))):
+            img[:, :, channel] = (a * ys + b * xs) % 256
+        for _ in range(rng.integers(3, 12)):
+            x0, y0 = rng.integers(0, w - 8), rng.integers(0, h - 8)
+            x1, y1 = x0 + rng.integers(8, max(9, w // 4)), y0 + rng.integers(8, max(9, h // 4))
+            img[y0:y1, x0:x1] = rng.integers(0, 256, 3)
+        Image.fromarray(img).save(os.path.join(corpus_dir, f"img_{i:06d}.{fmt}"), quality=90)
+    with open(stamp_path, "w") as f:
+        json.dump(stamp, f)
+    return corpus_dir
+
+class StubBoxes:
+    """Stand-in for ultralytics Boxes: cls and xywh arrays in input-image pixels"""
+
+    def __init__(self, cls, xywh):
+        self.cls = cls
+        self.xywh = xywh
+
+    def __len__(self):
+        return len(self.cls)
+
+class StubResult:
+    def __init__(self, boxes, orig_shape):
+        self.boxes = boxes
+        self.orig_shape = orig_shape
+
+class StubDetector:
+    """Detector with the YOLO call interface that needs no weights, torch or network.
+
+    Boxes are a deterministic function of the image shape, with a mix of
+    kept and dropped classes and some duplicates. infer_ms adds a fixed
+    per-image cost to stand in for a real model.
+    """
+
+    def __init__(self, boxes_per_image=40, infer_ms=0.0, seed=0):
+        self.names = STUB_NAMES
+        self.boxes_per_image = boxes_per_image
+        self.infer_ms = infer_ms
+        self.seed = seed
+
+    def __call__(self, sources, verbose=False):
+        if self.infer_ms:
+            time.sleep(self.infer_ms * len(sources) / 1000.0)
+        return [self._detect(img) for img in sources]
+
+    def _detect(self, img):
+        h, w = img.shape[:2]
+        rng = np.random.default_rng((self.seed, h, w))
+        n = self.boxes_per_image
+        cls = rng.choice(list(self.names), n).astype(np.float32)
+        bw = rng.uniform(4, w / 3, n)
+        bh = rng.uniform(4, h / 3, n)
+        xywh = np.column_stack((rng.uniform(bw / 2, w - bw / 2), rng.uniform(bh / 2, h - bh / 2), bw, bh))
+        xywh = xywh.astype(np.float32)
+        xywh[n // 2:n // 2 + n // 10] = xywh[:n // 10]
+        cls[n // 2:n // 2 + n // 10] = cls[:n // 10]
+        return StubResult(StubBoxes(cls, xywh), (h, w))
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1.0 / (1 << 20) if platform.system() == "Darwin" else 1.0 / (1 << 10)
+    return {
+        'self': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        'children': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+    }
+
+def run_benchmark(corpus_dir, repeat=3, detector=None, **options):
+    """Annotate the corpus `repeat` times and return a JSON-ready report.
+
+    options are passed to annotate_images. Labels go to a scratch folder so
+    the corpus stays untouched between runs.
+    """
+    detector = detector or StubDetector()
+    runs = []
+    for _ in range(repeat):
+        output_dir = tempfile.mkdtemp(prefix="anno_bench_labels_")
+        try:
+            stats = annotate_images(None, corpus_dir, model=detector, output_dir=output_dir, **options)
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+        images = stats['images'] or 1
+        runs.append({
+            'images': stats['images'],
+            'seconds': stats['seconds'],
+            'images_per_sec': stats['images_per_sec'],
+            'stage_seconds': stats['stage_seconds'],
+            'stage_ms_per_image': {stage: 1000.0 * seconds / images
+                                   for stage, seconds in stats['stage_seconds'].items()},
+        })
+    return {
+        'corpus': corpus_dir,
+        'options': options,
+        'detector': {'boxes_per_image': detector.boxes_per_image, 'infer_ms': detector.infer_ms},
+        'images_per_sec': {
+            'best': max(run['images_per_sec'] for run in runs),
+            'median': statistics.median(run['images_per_sec'] for run in runs),
+        },
+        'peak_rss_mb': peak_rss_mb(),
+        'runs': runs,
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the annotation pipeline on a synthetic corpus")
+    parser.add_argument("--corpus", default=os.path.join(tempfile.gettempdir(), "anno_bench_corpus"),
+                        help="folder for the synthetic images (reused if already generated)")
+    parser.add_argument("--images", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--prefetch", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--boxes", type=int, default=40, help="stub detections per image")
+    parser.add_argument("--infer-ms", type=float, default=0.0, help="simulated model cost per image")
+    parser.add_argument("--output", help="write the JSON report here as well as to stdout")
+    args = parser.parse_args(argv)
+    generate_corpus(args.corpus, args.images, args.seed)
+    report = run_benchmark(
+        args.corpus,
+        repeat=args.repeat,
+        detector=StubDetector(args.boxes, args.infer_ms, args.seed),
+        batch_size=args.batch_size,
+        prefetch_depth=args.prefetch,
+        workers=args.workers,
+        writers=args.writers,
+        imgsz=args.imgsz,
+    )
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
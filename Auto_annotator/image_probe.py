@@ -0,0 +1,65 @@
+import functools
+import os
+import struct
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Start-of-frame markers carry the image size; C4, C8 and CC share the range but do not
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# Markers with no length field after them
+JPEG_STANDALONE_MARKERS = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7}
+
+def probe_size(img_path):
+    """(width, height) read from a JPEG or PNG header, or None if it can't be parsed.
+
+    Only the header bytes are read. Results are cached per file and
+    invalidated when its size or mtime changes.
+    """
+    st = os.stat(img_path)
+    return _probe_cached(img_path, st.st_size, st.st_mtime_ns)
+
+@functools.lru_cache(maxsize=65536)
+def _probe_cached(img_path, size, mtime_ns):
+    with open(img_path, "rb") as f:
+        head = f.read(24)
+        if head.startswith(PNG_SIGNATURE):
+            return _png_size(head)
+        if head[:2] == b"\xff\xd8":
+            f.seek(2)
+            return _jpeg_size(f)
+    return None
+
+def _png_size(head):
+    if len(head) < 24 or head[12:16] != b"IHDR":
+        return None
+    return struct.unpack(">II", head[16:24])
+
+def _jpeg_size(f):
+    while True:
+        byte = f.read(1)
+        if not byte:
+            return None
+        if byte != b"\xff":
+            # Not at a marker: the stream is corrupt
+            return None
+        marker = f.read(1)
+        while marker == b"\xff":
+            marker = f.read(1)
+        if not marker:
+            return None
+        marker = marker[0]
+        if marker in JPEG_STANDALONE_MARKERS:
+            continue
+        if marker in (0xD9, 0xDA):
+            # End of image or start of scan before any frame header
+            return None
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack(">H", length_bytes)[0]
+        if marker in JPEG_SOF_MARKERS:
+            segment = f.read(5)
+            if len(segment) < 5:
+                return None
+            height, width = struct.unpack(">xHH", segment)
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
@@ -0,0 +1,249 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.request import pathname2url
+
+MANIFEST_NAME = ".annotations.sqlite"
+COLUMNS = ("path", "size", "mtime_ns", "content_hash", "model_hash",
+           "class_map_hash", "annotated_at", "class_counts")
+
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def bytes_hash(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def class_map_hash(class_map):
+    encoded = json.dumps(sorted(class_map.items())).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+def shard_manifest_name(shard_index, shard_count):
+    if shard_count <= 1:
+        return MANIFEST_NAME
+    return f".annotations.shard-{shard_index}-of-{shard_count}.sqlite"
+
+def in_shard(name, shard_index, shard_count):
+    """Deterministically assign a file name to one of shard_count shards"""
+    if shard_count <= 1:
+        return True
+    # Not CRC32: it puts near-identical names like img1.jpg/img2.jpg together
+    digest = hashlib.blake2b(name.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % shard_count == shard_index
+
+def _uri(path, options=""):
+    uri = "file:" + pathname2url(os.path.abspath(path))
+    return uri + "?" + options if options else uri
+
+def _readonly_uri(path):
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"no manifest at {path}")
+    # A manifest closed cleanly has everything in the main file; opening it
+    # immutable keeps SQLite from leaving -wal/-shm files next to it
+    return _uri(path, "mode=ro" if os.path.exists(path + "-wal") else "immutable=1")
+
+def connect(path):
+    # URI filenames so merge_manifests can ATTACH shards read-only
+    conn = sqlite3.connect(_uri(path), uri=True, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS images ("
+        " path TEXT PRIMARY KEY,"
+        " size INTEGER,"
+        " mtime_ns INTEGER,"
+        " content_hash TEXT,"
+        " model_hash TEXT,"
+        " class_map_hash TEXT,"
+        " annotated_at REAL,"
+        " class_counts TEXT)"
+    )
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(images)")}
+    if "class_counts" not in existing:
+        # Manifests written before per-class counts were tracked
+        conn.execute("ALTER TABLE images ADD COLUMN class_counts TEXT")
+    conn.commit()
+    return conn
+
+def connect_readonly(path):
+    """Open an existing manifest without creating or migrating it"""
+    return sqlite3.connect(_readonly_uri(path), uri=True)
+
+class Manifest:
+    """On-disk record of which images were labelled with which model and class map.
+
+    An image is skipped when its size and mtime match the manifest, or when
+    they changed but the content hash did not. Rows are committed every
+    commit_every labels, so an interrupted run resumes where it stopped.
+    """
+
+    def __init__(self, path, img_dir, model_hash, class_map, commit_every=256):
+        self.path = path
+        self.img_dir = img_dir
+        self.model_hash = model_hash
+        self.class_map_hash = class_map_hash(class_map)
+        self.commit_every = commit_every
+        self._lock = threading.Lock()
+        self._uncommitted = 0
+        self._stats = {}
+        self.conn = connect(path)
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('class_map', ?)",
+                          (json.dumps(class_map, sort_keys=True),))
+        self.conn.commit()
+        self._rows = {
+            row[0]: row[1:]
+            for row in self.conn.execute(
+                "SELECT path, size, mtime_ns, content_hash, model_hash, class_map_hash,"
+                " class_counts FROM images"
+            )
+        }
+
+    def _key(self, img_path):
+        return os.path.relpath(img_path, self.img_dir)
+
+    def needs_annotation(self, img_path):
+        key = self._key(img_path)
+        st = os.stat(img_path)
+        self._stats[key] = (st.st_size, st.st_mtime_ns)
+        row = self._rows.get(key)
+        if row is None:
+            return True
+        size, mtime_ns, content_hash, model_hash, cmap_hash, counts = row
+        if model_hash != self.model_hash or cmap_hash != self.class_map_hash:
+            return True
+        if (size, mtime_ns) == (st.st_size, st.st_mtime_ns):
+            return False
+        # Touched but possibly unchanged (copied, re-synced): compare content
+        if file_hash(img_path) != content_hash:
+            return True
+        self.record(img_path, content_hash, counts and json.loads(counts))
+        return False
+
+    def record(self, img_path, content_hash, class_counts=None):
+        key = self._key(img_path)
+        size, mtime_ns = self._stats.pop(key, None) or self._stat(img_path)
+        counts = json.dumps(class_counts, sort_keys=True) if class_counts is not None else None
+        with self._lock:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO images ({', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, size, mtime_ns, content_hash, self.model_hash,
+                 self.class_map_hash, time.time(), counts)
+            )
+            self._uncommitted += 1
+            if self._uncommitted >= self.commit_every:
+                self.conn.commit()
+                self._uncommitted = 0
+
+    def _stat(self, img_path):
+        st = os.stat(img_path)
+        return st.st_size, st.st_mtime_ns
+
+    def close(self):
+        with self._lock:
+            self.conn.commit()
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def merge_manifests(output_path, shard_paths):
+    """Combine per-shard manifests into one, keeping the newest row per image.
+
+    Shards are only read: each must exist and is attached read-only, and
+    columns an older shard lacks are merged as NULL.
+    """
+    shard_uris = [_readonly_uri(shard_path) for shard_path in shard_paths]
+    conn = connect(output_path)
+    columns = ", ".join(COLUMNS)
+    updates = ", ".join(f"{col} = excluded.{col}" for col in COLUMNS[1:])
+    try:
+        for shard_uri in shard_uris:
+            conn.execute("ATTACH DATABASE ? AS shard", (shard_uri,))
+            existing = {row[1] for row in conn.execute("PRAGMA shard.table_info(images)")}
+            selected = ", ".join(col if col in existing else "NULL" for col in COLUMNS)
+            conn.execute(
+                f"INSERT INTO images ({columns}) SELECT {selected} FROM shard.images WHERE true"
+                f" ON CONFLICT(path) DO UPDATE SET {updates}"
+                " WHERE excluded.annotated_at > images.annotated_at"
+            )
+            # Manifests from before class maps were stored have no meta table
+            if conn.execute("SELECT 1 FROM shard.sqlite_master WHERE name = 'meta'").fetchone():
+                conn.execute("INSERT OR REPLACE INTO meta SELECT key, value FROM shard.meta")
+            conn.commit()
+            conn.execute("DETACH DATABASE shard")
+        return summarize(conn)
+    finally:
+        conn.close()
+
+def summarize(conn):
+    """Dataset summary: image and box totals plus per-class box and image counts"""
+    box_counts = Counter()
+    image_counts = Counter()
+    images = 0
+    empty = 0
+    models = set()
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(images)")}
+    # Read-only connections see manifests from before per-class counts unmigrated
+    counts_column = "class_counts" if "class_counts" in existing else "NULL"
+    for counts, model_hash in conn.execute(f"SELECT {counts_column}, model_hash FROM images"):
+        images += 1
+        models.add(model_hash)
+        counts = json.loads(counts) if counts else {}
+        if not counts:
+            empty += 1
+        box_counts.update(counts)
+        image_counts.update(class_id for class_id, n in counts.items() if n)
+    row = conn.execute("SELECT value FROM meta WHERE key = 'class_map'").fetchone()
+    class_names = {}
+    if row:
+        for name, class_id in json.loads(row[0]).items():
+            class_names.setdefault(str(class_id), []).append(name)
+    return {
+        'images': images,
+        'empty_images': empty,
+        'boxes': sum(box_counts.values()),
+        'classes': {
+            class_id: {
+                'names': sorted(class_names.get(class_id, [])),
+                'boxes': box_counts[class_id],
+                'images': image_counts[class_id],
+            }
+            for class_id in sorted(set(box_counts) | set(class_names), key=int)
+        },
+        'models': sorted(models),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or merge annotation manifests")
+    sub = parser.add_subparsers(dest="command", required=True)
+    merge = sub.add_parser("merge", help="combine per-shard manifests and print a dataset summary")
+    merge.add_argument("--output", required=True, help="merged manifest to create or update")
+    merge.add_argument("shards", nargs="+", help="per-shard manifest files")
+    summary = sub.add_parser("summary", help="print a dataset summary for one manifest")
+    summary.add_argument("manifest")
+    args = parser.parse_args(argv)
+    if args.command == "merge":
+        result = merge_manifests(args.output, args.shards)
+    else:
+        conn = connect_readonly(args.manifest)
+        try:
+            result = summarize(conn)
+        finally:
+            conn.close()
+    print(json.dumps(result, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from manifest import file_hash
+
+MAX_CACHED_MODELS = 3
+
+_lock = threading.Lock()
+_models = OrderedDict()
+_hashes = {}
+
+def model_hash(model_path):
+    """Content hash of a weights file, recomputed only when its size or mtime changes"""
+    path = os.path.realpath(model_path)
+    st = os.stat(path)
+    stamp = (path, st.st_size, st.st_mtime_ns)
+    with _lock:
+        digest = _hashes.get(stamp)
+    if digest is None:
+        digest = file_hash(path)
+        with _lock:
+            _hashes[stamp] = digest
+    return digest
+
+def load_model(model_path, imgsz=640, max_models=MAX_CACHED_MODELS):
+    """Return a warmed-up YOLO model for model_path and its weights hash.
+
+    Models are cached on the resolved path and weights hash, so re-running on
+    an unchanged file skips loading and warm-up; a touched but identical file
+    still hits the cache. The least recently used model is evicted once more
+    than max_models are cached.
+    """
+    # Imported here so decode worker processes never load torch
+    from ultralytics import YOLO
+
+    path = os.path.realpath(model_path)
+    digest = model_hash(path)
+    key = (path, digest)
+    with _lock:
+        model = _models.get(key)
+        if model is not None:
+            _models.move_to_end(key)
+            return model, digest
+    model = YOLO(path)
+    # One pass on a blank frame builds the graph and picks kernels up front
+    model(np.zeros((imgsz or 640, imgsz or 640, 3), dtype=np.uint8), verbose=False)
+    with _lock:
+        _models[key] = model
+        _models.move_to_end(key)
+        while len(_models) > max_models:
+            _models.popitem(last=False)
+    return model, digest
+
+def clear_cache():
+    with _lock:
+        _models.clear()
+        _hashes.clear()
@@ -0,0 +1,132 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.connection import Client, Listener
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), f"auto_annotator-{getattr(os, 'getuid', lambda: 0)()}.sock")
+PATH_OPTIONS = ("manifest_path", "output_dir")
+
+def submit(model_path, img_dir, socket_path=DEFAULT_SOCKET, progress=None, cancel=None, **options):
+    """Run annotate_images in the warm worker on socket_path and return its stats.
+
+    progress and cancel behave as in annotate_images: progress updates are
+    streamed back from the worker, and setting cancel asks it to stop.
+    Raises ConnectionError when no worker is listening and RuntimeError when
+    the job itself failed.
+    """
+    job = dict(options, model_path=os.path.abspath(model_path), img_dir=os.path.abspath(img_dir))
+    # The worker's working directory is not ours
+    for key in PATH_OPTIONS:
+        if job.get(key):
+            job[key] = os.path.abspath(job[key])
+    try:
+        conn = Client(socket_path, family="AF_UNIX")
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        raise ConnectionError(f"no annotator worker listening on {socket_path}") from e
+    with conn:
+        conn.send_bytes(json.dumps(dict(job, stream_progress=progress is not None)).encode())
+        cancel_sent = False
+        while True:
+            if cancel is not None and cancel.is_set() and not cancel_sent:
+                conn.send_bytes(b'"cancel"')
+                cancel_sent = True
+            if not conn.poll(0.1):
+                continue
+            reply = json.loads(conn.recv_bytes())
+            if "progress" in reply:
+                progress(reply["progress"])
+                continue
+            break
+    if not reply["ok"]:
+        raise RuntimeError(reply["error"])
+    return reply["stats"]
+
+def worker_available(socket_path=DEFAULT_SOCKET):
+    return os.path.exists(socket_path)
+
+def serve(socket_path=DEFAULT_SOCKET, workers=None):
+    """Accept annotation jobs on a Unix socket, one at a time, until interrupted.
+
+    The process keeps its model cache and decode pool between jobs, so
+    back-to-back runs skip weight loading, warm-up and process start-up.
+    Jobs are JSON, never pickles, and the socket is only accessible to the
+    current user.
+    """
+    from annotator import annotate_images
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    decode_pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+    old_umask = os.umask(0o177)
+    try:
+        listener = Listener(socket_path, family="AF_UNIX")
+    finally:
+        os.umask(old_umask)
+    print(f"Annotator worker listening on {socket_path}")
+    try:
+        while True:
+            with listener.accept() as conn:
+                try:
+                    job = json.loads(conn.recv_bytes())
+                except EOFError:
+                    continue
+                cancel = threading.Event()
+                watcher = threading.Thread(target=_watch_for_cancel, args=(conn, cancel), daemon=True)
+                watcher.start()
+                try:
+                    model_path = job.pop("model_path")
+                    img_dir = job.pop("img_dir")
+                    workers_requested = job.pop("workers", None)
+                    pool = None if workers_requested == 0 else decode_pool
+                    progress = None
+                    if job.pop("stream_progress", False):
+                        def progress(update):
+                            try:
+                                conn.send_bytes(json.dumps({"progress": update}).encode())
+                            except OSError:
+                                cancel.set()
+                    stats = annotate_images(model_path, img_dir, workers=workers_requested,
+                                            decode_pool=pool, progress=progress, cancel=cancel, **job)
+                    reply = {"ok": True, "stats": stats}
+                except Exception as e:
+                    reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                finally:
+                    cancel.set()
+                try:
+                    conn.send_bytes(json.dumps(reply).encode())
+                except OSError:
+                    pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+        decode_pool.shutdown(cancel_futures=True)
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+def _watch_for_cancel(conn, cancel):
+    # A cancel message or a client that hung up both stop the running job
+    while not cancel.is_set():
+        try:
+            if conn.poll(0.2):
+                conn.recv_bytes()
+                cancel.set()
+        except (EOFError, OSError):
+            cancel.set()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Long-lived annotation worker")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_cmd = sub.add_parser("serve", help="keep models warm and run jobs sent over a Unix socket")
+    serve_cmd.add_argument("--socket", default=DEFAULT_SOCKET)
+    serve_cmd.add_argument("--workers", type=int, default=None, help="decode processes (default: one per core)")
+    args = parser.parse_args(argv)
+    serve(args.socket, args.workers)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
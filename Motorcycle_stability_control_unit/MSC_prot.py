@@ -1,3 +1,5 @@
+import itertools
+import time
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
@@ -5,49 +7,118 @@ from matplotlib.patches import Rectangle, Circle, Wedge
 import matplotlib.transforms as transforms
 
 class MotorcycleVisualization:
-    def __init__(self):
-        self.fig = plt.figure(figsize=(15, 10))
+    """Live-view figure whose artists are created once and updated in place.
+
+    draw_motorcycle and draw_panels only change transforms, sizes, colours
+    and strings, and return the artists they touched, so callers can blit
+    them instead of redrawing the whole figure.
+    """
+
+    def __init__(self, fig=None):
+        self.fig = fig or plt.figure(figsize=(15, 10))
         self.setup_layout()
-        
+        self.create_artists()
+
     def setup_layout(self):
+        fig = self.fig
         # Main motorcycle view
-        self.ax_bike = plt.subplot2grid((3, 4), (0, 0), colspan=2, rowspan=2)
+        self.ax_bike = plt.subplot2grid((3, 4), (0, 0), colspan=2, rowspan=2, fig=fig)
         self.ax_bike.set_xlim(-3, 3)
         self.ax_bike.set_ylim(-1, 3)
         self.ax_bike.set_aspect('equal')
         self.ax_bike.set_title('Motorcycle Stability Control - Live View', fontsize=14, fontweight='bold')
         self.ax_bike.axis('off')
-        
+
         # Critical parameters
-        self.ax_params = plt.subplot2grid((3, 4), (0, 2), colspan=2)
+        self.ax_params = plt.subplot2grid((3, 4), (0, 2), colspan=2, fig=fig)
         self.ax_params.axis('off')
-        
+
         # Rider inputs
-        self.ax_inputs = plt.subplot2grid((3, 4), (1, 2))
+        self.ax_inputs = plt.subplot2grid((3, 4), (1, 2), fig=fig)
         self.ax_inputs.set_title('Rider Inputs')
         self.ax_inputs.set_ylim(0, 100)
-        
+
         # MSC interventions
-        self.ax_msc = plt.subplot2grid((3, 4), (1, 3))
+        self.ax_msc = plt.subplot2grid((3, 4), (1, 3), fig=fig)
         self.ax_msc.set_title('MSC Interventions')
         self.ax_msc.set_ylim(0, 100)
-        
+
         # Status messages
-        self.ax_status = plt.subplot2grid((3, 4), (2, 0), colspan=4)
+        self.ax_status = plt.subplot2grid((3, 4), (2, 0), colspan=4, fig=fig)
         self.ax_status.axis('off')
-        
+
+    def create_artists(self):
+        ax = self.ax_bike
+        # The bike leans by rotating one shared transform
+        self.lean_rotation = transforms.Affine2D()
+        transform = self.lean_rotation + ax.transData
+        self.body = ax.add_patch(Rectangle((-0.1, 0.3), 0.2, 1.2, transform=transform,
+                                           facecolor='black', alpha=0.8))
+        self.front_wheel = ax.add_patch(Circle((-0.8, 0.3), 0.3, transform=transform, facecolor='black', alpha=0.7))
+        self.rear_wheel = ax.add_patch(Circle((0.8, 0.3), 0.3, transform=transform, facecolor='black', alpha=0.7))
+
+        # Road surface
+        self.road = ax.axhline(y=0, color='gray', linewidth=3)
+
+        self.speed_text = ax.text(-2.5, 2.5, '', fontsize=12, bbox=dict(facecolor='lightblue', alpha=0.7))
+        self.lean_indicator = ax.add_patch(Wedge((2, 2), 0.5, 80, 100, facecolor='green', alpha=0.7))
+        self.lean_text = ax.text(1.5, 1.5, '', fontsize=10)
+
+        # Risk indicator
+        risk_x, risk_y = 0, 2.2
+        self.risk_width, risk_height = 2.0, 0.2
+        self.risk_background = ax.add_patch(Rectangle((risk_x, risk_y), self.risk_width, risk_height,
+                                                      facecolor='white', edgecolor='black'))
+        self.risk_bar = ax.add_patch(Rectangle((risk_x, risk_y), 0, risk_height, facecolor='green', alpha=0.8))
+        # Drawn after the bar so it stays on top
+        self.risk_label = ax.text(risk_x + self.risk_width/2, risk_y + risk_height/2, 'RISK',
+                                  ha='center', va='center', fontsize=10, fontweight='bold')
+
+        self.status_badge = ax.text(0, 2.5, '', fontsize=14, fontweight='bold',
+                                    bbox=dict(facecolor='green', alpha=0.8), ha='center')
+
+        # Parameters display
+        ax = self.ax_params
+        ax.text(0.1, 0.9, 'CRITICAL PARAMETERS', fontsize=16, fontweight='bold', transform=ax.transAxes)
+        self.param_speed = ax.text(0.1, 0.7, '', fontsize=12, transform=ax.transAxes)
+        self.param_lean = ax.text(0.1, 0.6, '', fontsize=12, transform=ax.transAxes)
+        self.param_risk = ax.text(0.1, 0.5, '', fontsize=12, transform=ax.transAxes)
+
+        # Rider inputs bar chart
+        ax = self.ax_inputs
+        inputs = ['Throttle', 'Brake']
+        x_pos = np.arange(len(inputs))
+        bar_width = 0.35
+        self.input_bars = ax.bar(x_pos - bar_width/2, [0, 0], bar_width,
+                                 color=['green', 'red'], alpha=0.7, label='Rider Input')
+        self.output_bars = ax.bar(x_pos + bar_width/2, [0, 0], bar_width,
+                                  color=['lightgreen', 'pink'], alpha=0.7, label='After MSC')
+        ax.set_xticks(x_pos)
+        ax.set_xticklabels(inputs)
+        ax.set_ylim(0, 100)
+        ax.set_ylabel('Input %')
+        self.inputs_legend = ax.legend()
+        ax.set_axisbelow(True)
+        ax.grid(True, alpha=0.3)
+
+        # MSC interventions
+        ax = self.ax_msc
+        self.intervention_bars = ax.bar(['Throttle\nLimit', 'Brake\nLimit'], [0, 0], color='gray', alpha=0.7)
+        ax.set_ylim(0, 100)
+        ax.set_ylabel('Reduction %')
+        ax.set_axisbelow(True)
+        ax.grid(True, alpha=0.3)
+
+        # Status messages
+        ax = self.ax_status
+        self.status_message = ax.text(0.05, 0.7, '', fontsize=14, transform=ax.transAxes)
+        self.status_detail = ax.text(0.05, 0.4, '', fontsize=12, transform=ax.transAxes)
+        self.status_time = ax.text(0.05, 0.1, '', fontsize=10, transform=ax.transAxes)
+
     def draw_motorcycle(self, lean_angle, speed, msc_active=False, risk_level=0):
-        self.ax_bike.clear()
-        self.ax_bike.set_xlim(-3, 3)
-        self.ax_bike.set_ylim(-1, 3)
-        self.ax_bike.set_aspect('equal')
-        self.ax_bike.axis('off')
-        
         # Transform for leaning
-        base_transform = self.ax_bike.transData
-        rotation = transforms.Affine2D().rotate_deg(lean_angle)
-        transform = rotation + base_transform
-        
+        self.lean_rotation.clear().rotate_deg(lean_angle)
+
         # Motorcycle body - color based on risk
         if risk_level > 0.7:
             body_color = 'red'
@@ -55,55 +126,105 @@ class MotorcycleVisualization:
             body_color = 'orange'
         else:
             body_color = 'black'
-            
-        body = Rectangle((-0.1, 0.3), 0.2, 1.2, transform=transform, 
-                        facecolor=body_color, alpha=0.8)
-        self.ax_bike.add_patch(body)
-        
-        # Wheels
-        front_wheel = Circle((-0.8, 0.3), 0.3, transform=transform, facecolor='black', alpha=0.7)
-        rear_wheel = Circle((0.8, 0.3), 0.3, transform=transform, facecolor='black', alpha=0.7)
-        self.ax_bike.add_patch(front_wheel)
-        self.ax_bike.add_patch(rear_wheel)
-        
-        # Road surface
-        self.ax_bike.axhline(y=0, color='gray', linewidth=3)
-        
+        self.body.set_facecolor(body_color)
+
         # Speed indicator
         speed_color = 'red' if speed > 80 else 'orange' if speed > 60 else 'lightblue'
-        self.ax_bike.text(-2.5, 2.5, f'Speed: {speed:.0f} km/h', fontsize=12, 
-                         bbox=dict(facecolor=speed_color, alpha=0.7))
-        
+        self.speed_text.set_text(f'Speed: {speed:.0f} km/h')
+        self.speed_text.get_bbox_patch().set_facecolor(speed_color)
+
         # Lean angle indicator
         lean_color = 'red' if abs(lean_angle) > 40 else 'orange' if abs(lean_angle) > 30 else 'green'
-        lean_indicator = Wedge((2, 2), 0.5, 90-lean_angle-10, 90-lean_angle+10, 
-                              facecolor=lean_color, alpha=0.7)
-        self.ax_bike.add_patch(lean_indicator)
-        self.ax_bike.text(1.5, 1.5, f'Lean: {lean_angle:.0f}°', fontsize=10)
-        
+        self.lean_indicator.set_theta1(90-lean_angle-10)
+        self.lean_indicator.set_theta2(90-lean_angle+10)
+        self.lean_indicator.set_facecolor(lean_color)
+        self.lean_text.set_text(f'Lean: {lean_angle:.0f}°')
+
         # Risk indicator
-        risk_x = 0
-        risk_y = 2.2
-        risk_width = 2.0
-        risk_height = 0.2
-        self.ax_bike.add_patch(Rectangle((risk_x, risk_y), risk_width, risk_height, 
-                                       facecolor='white', edgecolor='black'))
-        self.ax_bike.add_patch(Rectangle((risk_x, risk_y), risk_width * risk_level, risk_height, 
-                                       facecolor=lean_color, alpha=0.8))
-        self.ax_bike.text(risk_x + risk_width/2, risk_y + risk_height/2, 'RISK', 
-                         ha='center', va='center', fontsize=10, fontweight='bold')
-        
+        self.risk_bar.set_width(self.risk_width * risk_level)
+        self.risk_bar.set_facecolor(lean_color)
+
         # MSC status
-        status_color = 'red' if msc_active else 'green'
-        status_text = 'MSC ACTIVE!' if msc_active else 'Stable'
-        self.ax_bike.text(0, 2.5, status_text, fontsize=14, fontweight='bold',
-                         bbox=dict(facecolor=status_color, alpha=0.8), ha='center')
+        self.status_badge.set_text('MSC ACTIVE!' if msc_active else 'Stable')
+        self.status_badge.get_bbox_patch().set_facecolor('red' if msc_active else 'green')
+
+        # The road and risk frame never change but overlap changing artists, so they are redrawn too
+        return [self.body, self.front_wheel, self.rear_wheel, self.road, self.speed_text, self.lean_indicator,
+                self.lean_text, self.risk_background, self.risk_bar, self.risk_label, self.status_badge]
+
+    def draw_panels(self, current_data, msc_active, current_time):
+        """Parameter texts, input/intervention bars and status lines for one sample"""
+        risk = current_data['risk_level']
+        self.param_speed.set_text(f"Speed: {current_data['speed']:.0f} km/h")
+        self.param_lean.set_text(f"Lean Angle: {current_data['lean_angle']:.0f}°")
+        self.param_risk.set_text(f"Risk Level: {risk:.2f}")
+        self.param_risk.set_color('red' if risk > 0.5 else 'orange' if risk > 0.3 else 'green')
+
+        # Rider inputs bar chart
+        input_values = [current_data['throttle_input'], current_data['brake_input'] * 100]
+        output_values = [current_data['throttle_output'], current_data['brake_output'] * 100]
+        for bar, value in zip(self.input_bars, input_values):
+            bar.set_height(value)
+        for bar, value in zip(self.output_bars, output_values):
+            bar.set_height(value)
+
+        # MSC interventions
+        intervention_strength = [
+            max(0, (current_data['throttle_input'] - current_data['throttle_output']) / current_data['throttle_input'] * 100) if current_data['throttle_input'] > 0 else 0,
+            max(0, (current_data['brake_input'] - current_data['brake_output']) / current_data['brake_input'] * 100) if current_data['brake_input'] > 0 else 0
+        ]
+        for bar, strength in zip(self.intervention_bars, intervention_strength):
+            bar.set_height(strength)
+            bar.set_color('orange' if strength > 0 else 'gray')
+
+        # Status messages
+        if msc_active:
+            reasons = []
+            if current_data['throttle_output'] < current_data['throttle_input']:
+                reasons.append("throttle reduction")
+            if current_data['brake_output'] < current_data['brake_input']:
+                reasons.append("brake modulation")
+            self.status_message.set_text(f"⚠️ MSC ACTIVE: {', '.join(reasons)} for stability!")
+            self.status_message.set_color('red')
+            self.status_message.set_fontweight('bold')
+
+            if risk > 0.7:
+                self.status_detail.set_text("HIGH RISK: Extreme intervention required!")
+                self.status_detail.set_color('darkred')
+            elif risk > 0.4:
+                self.status_detail.set_text("MEDIUM RISK: Moderate intervention")
+                self.status_detail.set_color('orange')
+            else:
+                self.status_detail.set_text('')
+        else:
+            self.status_message.set_text("✅ Riding stable - MSC monitoring")
+            self.status_message.set_color('green')
+            self.status_message.set_fontweight('normal')
+            if risk > 0.2:
+                self.status_detail.set_text("⚠️ Caution: Risk level increasing")
+                self.status_detail.set_color('orange')
+            else:
+                self.status_detail.set_text('')
+
+        self.status_time.set_text(f"Time: {current_time:.1f}s")
+
+        # Bars meet the axes spines, which are drawn above them, so those are redrawn too
+        spines = [*self.ax_inputs.spines.values(), *self.ax_msc.spines.values()]
+        return [self.param_speed, self.param_lean, self.param_risk, *self.input_bars, *self.output_bars,
+                self.inputs_legend, *self.intervention_bars, *spines, self.status_message,
+                self.status_detail, self.status_time]
 
 class MSCController:
-    def __init__(self):
-        self.risk_threshold = 0.3
-        self.max_lean = 45
+    def __init__(self, risk_threshold=0.3, max_lean=45, speed_weight=0.3, lean_weight=0.4,
+                 brake_lean_weight=0.3, throttle_lean_weight=0.2):
+        self.risk_threshold = risk_threshold
+        self.max_lean = max_lean
         self.max_safe_speed_in_corner = 80
+        # Weights of the speed, lean, braking-while-leaning and throttle-in-corner risk terms
+        self.speed_weight = speed_weight
+        self.lean_weight = lean_weight
+        self.brake_lean_weight = brake_lean_weight
+        self.throttle_lean_weight = throttle_lean_weight
         
     def calculate_risk(self, speed, lean_angle, throttle, brake, dt):
         """Calculate dynamic risk level (0-1) based on multiple factors"""
@@ -111,21 +232,21 @@ class MSCController:
         
         # Speed risk (higher speed = higher risk)
         speed_risk = min(speed / 120.0, 1.0)
-        risk += speed_risk * 0.3
+        risk += speed_risk * self.speed_weight
         
         # Lean angle risk
         lean_risk = min(abs(lean_angle) / self.max_lean, 1.0)
-        risk += lean_risk * 0.4
+        risk += lean_risk * self.lean_weight
         
         # Combined braking + leaning risk (very dangerous)
         if brake > 0.2 and abs(lean_angle) > 20:
             combined_risk = (brake * 0.5) + (abs(lean_angle) / self.max_lean * 0.5)
-            risk += combined_risk * 0.3
+            risk += combined_risk * self.brake_lean_weight
             
         # High throttle in corner risk
         if throttle > 50 and abs(lean_angle) > 25:
             throttle_risk = (throttle / 100.0) * (abs(lean_angle) / self.max_lean)
-            risk += throttle_risk * 0.2
+            risk += throttle_risk * self.throttle_lean_weight
             
         return min(risk, 1.0)
     
@@ -151,11 +272,74 @@ class MSCController:
             if risk > 0.8:
                 throttle_limit = max(throttle_limit, 10)  # Minimum 10% throttle for control
                 brake_limit = max(brake_limit, 0.1)  # Minimum braking for control
-                
+
         return throttle_limit, brake_limit
 
-def create_dynamic_scenario():
-    """Create a realistic riding scenario with varied inputs"""
+    def calculate_risk_array(self, speed, lean_angle, throttle, brake, dt=0.1):
+        """calculate_risk over whole arrays; same operations in the same order, so results match exactly"""
+        speed = np.asarray(speed, dtype=np.float64)
+        throttle = np.asarray(throttle, dtype=np.float64)
+        brake = np.asarray(brake, dtype=np.float64)
+        abs_lean = np.abs(np.asarray(lean_angle, dtype=np.float64))
+
+        risk = np.minimum(speed / 120.0, 1.0) * self.speed_weight
+        risk += np.minimum(abs_lean / self.max_lean, 1.0) * self.lean_weight
+
+        # Adding 0.0 where a branch is off leaves risk bit-for-bit unchanged
+        braking_in_lean = (brake > 0.2) & (abs_lean > 20)
+        combined_risk = (brake * 0.5) + (abs_lean / self.max_lean * 0.5)
+        risk += np.where(braking_in_lean, combined_risk * self.brake_lean_weight, 0.0)
+
+        throttle_in_corner = (throttle > 50) & (abs_lean > 25)
+        throttle_risk = (throttle / 100.0) * (abs_lean / self.max_lean)
+        risk += np.where(throttle_in_corner, throttle_risk * self.throttle_lean_weight, 0.0)
+
+        return np.minimum(risk, 1.0)
+
+    def calculate_interventions_array(self, risk, current_throttle, current_brake, speed, lean_angle):
+        """calculate_interventions over whole arrays, returning (throttle_limit, brake_limit) arrays"""
+        risk = np.asarray(risk, dtype=np.float64)
+        current_throttle = np.asarray(current_throttle, dtype=np.float64)
+        current_brake = np.asarray(current_brake, dtype=np.float64)
+        abs_lean = np.abs(np.asarray(lean_angle, dtype=np.float64))
+
+        intervening = risk > self.risk_threshold
+        intervention_strength = (risk - self.risk_threshold) / (1 - self.risk_threshold)
+        throttle_limit = np.where(intervening, current_throttle * (1 - intervention_strength * 0.8), 100.0)
+
+        brake_reduction = intervention_strength * np.minimum(abs_lean / self.max_lean, 0.7)
+        brake_limit = np.where(intervening & (abs_lean > 15), current_brake * (1 - brake_reduction), 1.0)
+
+        emergency = intervening & (risk > 0.8)
+        throttle_limit = np.where(emergency, np.maximum(throttle_limit, 10), throttle_limit)
+        brake_limit = np.where(emergency, np.maximum(brake_limit, 0.1), brake_limit)
+
+        return throttle_limit, brake_limit
+
+    def evaluate(self, speed, lean_angle, throttle, brake, dt=0.1):
+        """Risk, limits, limited outputs and active flags for whole input arrays in one pass"""
+        throttle = np.asarray(throttle, dtype=np.float64)
+        brake = np.asarray(brake, dtype=np.float64)
+        risk = self.calculate_risk_array(speed, lean_angle, throttle, brake, dt)
+        throttle_limit, brake_limit = self.calculate_interventions_array(risk, throttle, brake, speed, lean_angle)
+        throttle_output = np.minimum(throttle, throttle_limit)
+        brake_output = np.minimum(brake, brake_limit)
+        return {
+            'risk_level': risk,
+            'throttle_limit': throttle_limit,
+            'brake_limit': brake_limit,
+            'throttle_output': throttle_output,
+            'brake_output': brake_output,
+            'msc_active': (throttle_output < throttle - 1) | (brake_output < brake - 0.05),
+        }
+
+def create_dynamic_scenario(rng=None, controller=None):
+    """Create a realistic riding scenario with varied inputs.
+
+    rng is an np.random.Generator; without one the global np.random state
+    is used. controller defaults to an MSCController with stock settings.
+    """
+    rng = np.random if rng is None else rng
     time_steps = 400
     time = np.linspace(0, 40, time_steps)
     
@@ -168,9 +352,8 @@ def create_dynamic_scenario():
     speed[250:300] = np.linspace(80, 40, 50)
     speed[350:380] = np.linspace(70, 30, 30)
     
-    # Add random speed variations
-    for i in range(1, time_steps):
-        speed[i] += np.random.normal(0, 1.5)
+    # Add random speed variations (the first sample stays exact)
+    speed[1:] += rng.normal(0, 1.5, time_steps - 1)
     speed = np.clip(speed, 10, 120)
     
     # Create realistic lean angle profile (cornering)
@@ -186,7 +369,7 @@ def create_dynamic_scenario():
     lean[370:400] = np.linspace(-30, 20, 30)
     
     # Add random lean variations
-    lean += np.random.normal(0, 2, time_steps)
+    lean += rng.normal(0, 2, time_steps)
     lean = np.clip(lean, -45, 45)
     
     # Create dynamic throttle inputs
@@ -196,7 +379,7 @@ def create_dynamic_scenario():
     throttle[140:180] = np.linspace(30, 90, 40)
     throttle[320:350] = np.linspace(30, 70, 30)
     # Add random throttle variations
-    throttle += np.random.normal(0, 10, time_steps)
+    throttle += rng.normal(0, 10, time_steps)
     throttle = np.clip(throttle, 0, 100)
     
     # Create realistic brake inputs
@@ -209,158 +392,176 @@ def create_dynamic_scenario():
     brake[200:210] = 0.3
     brake[350:355] = 0.4
     # Add random brake variations
-    brake += np.random.normal(0, 0.05, time_steps)
+    brake += rng.normal(0, 0.05, time_steps)
     brake = np.clip(brake, 0, 1)
     
-    # Initialize MSC controller
-    msc = MSCController()
-    
-    # Simulate MSC interventions
-    msc_active = np.zeros(time_steps, dtype=bool)
-    throttle_limited = np.zeros(time_steps)
-    brake_limited = np.zeros(time_steps)
-    risk_level = np.zeros(time_steps)
-    
-    for i in range(time_steps):
-        # Calculate current risk
-        current_risk = msc.calculate_risk(
-            speed[i], lean[i], throttle[i], brake[i], 0.1
-        )
-        risk_level[i] = current_risk
-        
-        # Calculate MSC interventions
-        throttle_limit, brake_limit = msc.calculate_interventions(
-            current_risk, throttle[i], brake[i], speed[i], lean[i]
-        )
-        
-        # Apply limits
-        throttle_limited[i] = min(throttle[i], throttle_limit)
-        brake_limited[i] = min(brake[i], brake_limit)
-        
-        # Check if MSC is actively intervening
-        msc_active[i] = (throttle_limited[i] < throttle[i] - 1) or (brake_limited[i] < brake[i] - 0.05)
-    
+    # Simulate MSC interventions over the whole ride at once
+    msc = controller or MSCController()
+    outputs = msc.evaluate(speed, lean, throttle, brake, 0.1)
+
     return {
         'time': time,
         'speed': speed,
         'lean_angle': lean,
         'throttle_input': throttle,
-        'throttle_output': throttle_limited,
+        'throttle_output': outputs['throttle_output'],
         'brake_input': brake,
-        'brake_output': brake_limited,
-        'msc_active': msc_active,
-        'risk_level': risk_level
+        'brake_output': outputs['brake_output'],
+        'msc_active': outputs['msc_active'],
+        'risk_level': outputs['risk_level']
     }
 
-def animate_ride(scenario_data):
-    viz = MotorcycleVisualization()
-    msc = MSCController()
-    
-    def update(frame):
-        # Clear dynamic axes
-        viz.ax_params.clear()
-        viz.ax_inputs.clear()
-        viz.ax_msc.clear()
-        viz.ax_status.clear()
-        viz.ax_params.axis('off')
-        viz.ax_status.axis('off')
-        
-        current_data = {key: values[frame] for key, values in scenario_data.items()}
-        
-        # Calculate current risk for visualization
-        current_risk = msc.calculate_risk(
-            current_data['speed'], 
-            current_data['lean_angle'],
-            current_data['throttle_input'],
-            current_data['brake_input'],
-            0.1
-        )
-        
-        # Draw motorcycle with risk-based coloring
-        viz.draw_motorcycle(
+class RideRenderer:
+    """Plays an evaluated ride in a MotorcycleVisualization with blitting.
+
+    render(frame) updates the existing artists for one sample and returns
+    them. animate() drives it from a timer: the playhead follows the wall
+    clock times a speed factor, so 10 Hz data plays in real time and faster
+    speeds skip samples rather than fall behind. A timeline of the ride's
+    risk under the live view shows the playhead; click or drag on it to
+    scrub. Keys: space pauses, left/right step one second (one sample when
+    paused), up/down (or +/-) double/halve the speed, home/end jump.
+    """
+
+    SPEEDS = (0.25, 0.5, 1, 2, 4, 8, 16, 32, 64)
+
+    def __init__(self, scenario_data, fig=None):
+        self.data = scenario_data
+        self.frames = len(scenario_data['time'])
+        times = scenario_data['time']
+        self.dt = float(times[1] - times[0]) if self.frames > 1 else 0.1
+        self.viz = MotorcycleVisualization(fig)
+        self.fig = self.viz.fig
+        self.position = 0.0
+        self.speed = 1
+        self.paused = False
+        self._last_tick = None
+        self._scrubbing = False
+
+        # Ride timeline under the four panels
+        self.fig.tight_layout(rect=(0, 0.09, 1, 1))
+        ax = self.ax_timeline = self.fig.add_axes((0.05, 0.02, 0.9, 0.06))
+        ax.fill_between(times, 0, scenario_data['risk_level'], color='orange', alpha=0.5, linewidth=0)
+        ax.fill_between(times, 0, 1, where=scenario_data['msc_active'], color='red', alpha=0.15, linewidth=0)
+        ax.set_xlim(times[0], times[-1])
+        ax.set_ylim(0, 1)
+        ax.set_yticks([])
+        ax.tick_params(axis='x', labelsize=8)
+        self.cursor = ax.axvline(times[0], color='black', linewidth=2)
+        self.playback_text = ax.text(0.995, 0.8, '', transform=ax.transAxes, ha='right', va='top', fontsize=9)
+
+    def render(self, frame):
+        """Update every changing artist to sample `frame` and return them in drawing order"""
+        current_data = {key: values[frame] for key, values in self.data.items()}
+        msc_active = self.data['msc_active'][frame]
+        artists = self.viz.draw_motorcycle(
             lean_angle=current_data['lean_angle'],
             speed=current_data['speed'],
-            msc_active=scenario_data['msc_active'][frame],
-            risk_level=current_risk
+            msc_active=msc_active,
+            risk_level=current_data['risk_level']
         )
-        
-        # Parameters display
-        viz.ax_params.text(0.1, 0.9, 'CRITICAL PARAMETERS', fontsize=16, fontweight='bold', 
-                          transform=viz.ax_params.transAxes)
-        viz.ax_params.text(0.1, 0.7, f"Speed: {current_data['speed']:.0f} km/h", fontsize=12,
-                          transform=viz.ax_params.transAxes)
-        viz.ax_params.text(0.1, 0.6, f"Lean Angle: {current_data['lean_angle']:.0f}°", fontsize=12,
-                          transform=viz.ax_params.transAxes)
-        viz.ax_params.text(0.1, 0.5, f"Risk Level: {current_risk:.2f}", fontsize=12,
-                          color='red' if current_risk > 0.5 else 'orange' if current_risk > 0.3 else 'green',
-                          transform=viz.ax_params.transAxes)
-        
-        # Rider inputs bar chart
-        inputs = ['Throttle', 'Brake']
-        input_values = [current_data['throttle_input'], current_data['brake_input'] * 100]
-        output_values = [current_data['throttle_output'], current_data['brake_output'] * 100]
-        
-        x_pos = np.arange(len(inputs))
-        bar_width = 0.35
-        
-        bars1 = viz.ax_inputs.bar(x_pos - bar_width/2, input_values, bar_width, 
-                                 color=['green', 'red'], alpha=0.7, label='Rider Input')
-        bars2 = viz.ax_inputs.bar(x_pos + bar_width/2, output_values, bar_width,
-                                 color=['lightgreen', 'pink'], alpha=0.7, label='After MSC')
-        
-        viz.ax_inputs.set_xticks(x_pos)
-        viz.ax_inputs.set_xticklabels(inputs)
-        viz.ax_inputs.set_ylim(0, 100)
-        viz.ax_inputs.set_ylabel('Input %')
-        viz.ax_inputs.legend()
-        viz.ax_inputs.grid(True, alpha=0.3)
-        
-        # MSC interventions
-        interventions = ['Throttle\nLimit', 'Brake\nLimit']
-        intervention_strength = [
-            max(0, (current_data['throttle_input'] - current_data['throttle_output']) / current_data['throttle_input'] * 100) if current_data['throttle_input'] > 0 else 0,
-            max(0, (current_data['brake_input'] - current_data['brake_output']) / current_data['brake_input'] * 100) if current_data['brake_input'] > 0 else 0
-        ]
-        
-        intervention_colors = ['orange' if strength > 0 else 'gray' for strength in intervention_strength]
-        bars = viz.ax_msc.bar(interventions, intervention_strength, color=intervention_colors, alpha=0.7)
-        viz.ax_msc.set_ylim(0, 100)
-        viz.ax_msc.set_ylabel('Reduction %')
-        viz.ax_msc.grid(True, alpha=0.3)
-        
-        # Status messages
-        if scenario_data['msc_active'][frame]:
-            reasons = []
-            if current_data['throttle_output'] < current_data['throttle_input']:
-                reasons.append("throttle reduction")
-            if current_data['brake_output'] < current_data['brake_input']:
-                reasons.append("brake modulation")
-                
-            status_msg = f"⚠️ MSC ACTIVE: {', '.join(reasons)} for stability!"
-            viz.ax_status.text(0.05, 0.7, status_msg, fontsize=14, color='red', fontweight='bold',
-                              transform=viz.ax_status.transAxes)
-            
-            if current_risk > 0.7:
-                viz.ax_status.text(0.05, 0.4, "HIGH RISK: Extreme intervention required!", fontsize=12, color='darkred',
-                                  transform=viz.ax_status.transAxes)
-            elif current_risk > 0.4:
-                viz.ax_status.text(0.05, 0.4, "MEDIUM RISK: Moderate intervention", fontsize=12, color='orange',
-                                  transform=viz.ax_status.transAxes)
-        else:
-            viz.ax_status.text(0.05, 0.7, "✅ Riding stable - MSC monitoring", fontsize=14, color='green',
-                              transform=viz.ax_status.transAxes)
-            if current_risk > 0.2:
-                viz.ax_status.text(0.05, 0.4, "⚠️ Caution: Risk level increasing", fontsize=12, color='orange',
-                                  transform=viz.ax_status.transAxes)
-        
-        viz.ax_status.text(0.05, 0.1, f"Time: {scenario_data['time'][frame]:.1f}s", fontsize=10,
-                          transform=viz.ax_status.transAxes)
-        
-        plt.tight_layout()
-    
-    anim = animation.FuncAnimation(viz.fig, update, frames=len(scenario_data['time']), 
-                                  interval=100, repeat=True)
-    return anim
+        artists += self.viz.draw_panels(current_data, msc_active, current_data['time'])
+        self.cursor.set_xdata([current_data['time']])
+        self.playback_text.set_text('paused' if self.paused else f'x{self.speed:g}')
+        artists += [self.cursor, *self.ax_timeline.spines.values(), self.playback_text]
+        # Blitting draws in list order; sorting by zorder (stable, so ties keep
+        # creation order) layers them exactly as a full redraw would
+        return sorted(artists, key=lambda artist: artist.get_zorder())
+
+    def _tick(self, _):
+        now = time.perf_counter()
+        if self._last_tick is not None and not self.paused and not self._scrubbing:
+            self.position = (self.position + (now - self._last_tick) / self.dt * self.speed) % self.frames
+        self._last_tick = now
+        return self.render(int(self.position))
+
+    def _seek(self, position):
+        self.position = float(min(max(position, 0), self.frames - 1))
+
+    def _on_key(self, event):
+        step = 1 if self.paused else round(1 / self.dt)
+        faster = self.SPEEDS.index(self.speed)
+        if event.key == ' ':
+            self.paused = not self.paused
+        elif event.key == 'right':
+            self._seek(int(self.position) + step)
+        elif event.key == 'left':
+            self._seek(int(self.position) - step)
+        elif event.key in ('up', '+', '='):
+            self.speed = self.SPEEDS[min(faster + 1, len(self.SPEEDS) - 1)]
+        elif event.key in ('down', '-'):
+            self.speed = self.SPEEDS[max(faster - 1, 0)]
+        elif event.key == 'home':
+            self._seek(0)
+        elif event.key == 'end':
+            self._seek(self.frames - 1)
+
+    def _scrub_to(self, event):
+        if event.inaxes is self.ax_timeline and event.xdata is not None:
+            times = self.data['time']
+            self._seek(np.searchsorted(times, event.xdata) if self.frames > 1 else 0)
+
+    def _on_press(self, event):
+        if event.inaxes is self.ax_timeline:
+            self._scrubbing = True
+            self._scrub_to(event)
+
+    def _on_motion(self, event):
+        if self._scrubbing:
+            self._scrub_to(event)
+
+    def _on_release(self, event):
+        self._scrubbing = False
+
+    def animate(self, fps=None):
+        """FuncAnimation playing the ride; keep a reference to it while it runs.
+
+        fps is the redraw rate and defaults to the data rate (10 Hz for
+        dt = 0.1 s); the playback speed is independent of it.
+        """
+        fps = fps or 1 / self.dt
+        canvas = self.fig.canvas
+        # Bound methods are held weakly by the canvas; the animation keeps self alive
+        canvas.mpl_connect('key_press_event', self._on_key)
+        canvas.mpl_connect('button_press_event', self._on_press)
+        canvas.mpl_connect('motion_notify_event', self._on_motion)
+        canvas.mpl_connect('button_release_event', self._on_release)
+        return animation.FuncAnimation(self.fig, self._tick, frames=itertools.count(),
+                                       init_func=lambda: self.render(int(self.position)), interval=1000 / fps,
+                                       blit=True, cache_frame_data=False)
+
+def animate_ride(scenario_data):
+    return RideRenderer(scenario_data).animate()
+
+def performance_scores(high_risk_samples, interventions, samples, duration, dt=0.1):
+    """Safety score and intervention efficiency (%); works on scalars or arrays of rides"""
+    high_risk_time = high_risk_samples * dt
+    safety_score = 100 - (high_risk_time / duration * 100)
+    intervention_efficiency = 100 - (interventions / samples * 100)
+    return safety_score, intervention_efficiency
+
+def performance_metrics(scenario_data, dt=0.1):
+    """Summary statistics of one evaluated ride, as printed by plot_performance_summary"""
+    risk = scenario_data['risk_level']
+    interventions = int(np.sum(scenario_data['msc_active']))
+    high_risk_samples = int(np.sum(risk > 0.7))
+    duration = float(scenario_data['time'][-1])
+    safety_score, intervention_efficiency = performance_scores(
+        high_risk_samples, interventions, len(scenario_data['time']), duration, dt)
+    return {
+        'duration': duration,
+        'interventions': interventions,
+        'high_risk_samples': high_risk_samples,
+        'medium_risk_samples': int(np.sum(risk > 0.4)),
+        'max_risk': float(np.max(risk)),
+        'mean_risk': float(np.mean(risk)),
+        'throttle_reduction': float(np.sum(np.maximum(0, scenario_data['throttle_input'] - scenario_data['throttle_output']))),
+        'brake_reduction': float(np.sum(np.maximum(0, scenario_data['brake_input'] - scenario_data['brake_output']))),
+        'max_lean': float(np.max(np.abs(scenario_data['lean_angle']))),
+        'max_speed': float(np.max(scenario_data['speed'])),
+        'safety_score': safety_score,
+        'intervention_efficiency': intervention_efficiency,
+    }
 
 def plot_performance_summary(scenario_data):
     """Enhanced performance summary with risk analysis"""
@@ -436,32 +637,25 @@ def plot_performance_summary(scenario_data):
     plt.show()
     
     # Enhanced performance statistics
-    total_interventions = np.sum(scenario_data['msc_active'])
-    high_risk_time = np.sum(scenario_data['risk_level'] > 0.7) * 0.1
-    medium_risk_time = np.sum(scenario_data['risk_level'] > 0.4) * 0.1
-    
-    total_throttle_reduction = np.sum(np.maximum(0, scenario_data['throttle_input'] - scenario_data['throttle_output']))
-    total_brake_reduction = np.sum(np.maximum(0, scenario_data['brake_input'] - scenario_data['brake_output']))
-    
+    metrics = performance_metrics(scenario_data)
+    safety_score = metrics['safety_score']
+
     print("\n" + "="*60)
     print("ENHANCED MSC PERFORMANCE SUMMARY")
     print("="*60)
-    print(f"Total riding time: {scenario_data['time'][-1]:.1f} seconds")
-    print(f"MSC interventions: {total_interventions} events")
-    print(f"High risk situations: {np.sum(scenario_data['risk_level'] > 0.7)}")
-    print(f"Maximum risk level: {np.max(scenario_data['risk_level']):.2f}")
-    print(f"Average risk level: {np.mean(scenario_data['risk_level']):.2f}")
-    print(f"\nTotal throttle reduction: {total_throttle_reduction:.0f}%·s")
-    print(f"Total brake reduction: {total_brake_reduction:.2f}·s")
-    print(f"Maximum lean angle: {np.max(np.abs(scenario_data['lean_angle'])):.1f}°")
-    print(f"Maximum speed: {np.max(scenario_data['speed']):.0f} km/h")
-    
-    safety_score = 100 - (high_risk_time / scenario_data['time'][-1] * 100)
-    intervention_efficiency = 100 - (total_interventions / len(scenario_data['time']) * 100)
-    
+    print(f"Total riding time: {metrics['duration']:.1f} seconds")
+    print(f"MSC interventions: {metrics['interventions']} events")
+    print(f"High risk situations: {metrics['high_risk_samples']}")
+    print(f"Maximum risk level: {metrics['max_risk']:.2f}")
+    print(f"Average risk level: {metrics['mean_risk']:.2f}")
+    print(f"\nTotal throttle reduction: {metrics['throttle_reduction']:.0f}%·s")
+    print(f"Total brake reduction: {metrics['brake_reduction']:.2f}·s")
+    print(f"Maximum lean angle: {metrics['max_lean']:.1f}°")
+    print(f"Maximum speed: {metrics['max_speed']:.0f} km/h")
+
     print(f"\nSafety Score: {safety_score:.1f}%")
-    print(f"Intervention Efficiency: {intervention_efficiency:.1f}%")
-    
+    print(f"Intervention Efficiency: {metrics['intervention_efficiency']:.1f}%")
+
     if safety_score > 85:
         print("🎯 EXCELLENT: MSC effectively maintained safety!")
     elif safety_score > 70:
@@ -469,27 +663,28 @@ def plot_performance_summary(scenario_data):
     else:
         print("⚠️ NEEDS IMPROVEMENT: Consider more aggressive interventions")
 
-# Generate and run the enhanced simulation
-print("Creating Enhanced Motorcycle Stability Control Simulation...")
-print("This simulation features:")
-print("• Dynamic throttle and brake inputs")
-print("• Realistic cornering scenarios") 
-print("• Risk-based MSC interventions")
-print("• Progressive throttle and brake limiting")
+if __name__ == "__main__":
+    # Generate and run the enhanced simulation
+    print("Creating Enhanced Motorcycle Stability Control Simulation...")
+    print("This simulation features:")
+    print("• Dynamic throttle and brake inputs")
+    print("• Realistic cornering scenarios") 
+    print("• Risk-based MSC interventions")
+    print("• Progressive throttle and brake limiting")
 
-scenario = create_dynamic_scenario()
+    scenario = create_dynamic_scenario()
 
-print("\nStarting Animation - Watch for MSC interventions when:")
-print("• Risk level increases (orange/red risk bar)")
-print("• Braking while leaned over")
-print("• High speed in corners")
-print("• Aggressive acceleration in turns")
+    print("\nStarting Animation - Watch for MSC interventions when:")
+    print("• Risk level increases (orange/red risk bar)")
+    print("• Braking while leaned over")
+    print("• High speed in corners")
+    print("• Aggressive acceleration in turns")
 
-# Create animation
-anim = animate_ride(scenario)
+    # Create animation
+    anim = animate_ride(scenario)
 
-# After animation, show performance summary
-plt.show()
+    # After animation, show performance summary
+    plt.show()
 
-print("\nGenerating Enhanced Performance Summary...")
-plot_performance_summary(scenario)
+    print("\nGenerating Enhanced Performance Summary...")
+    plot_performance_summary(scenario)
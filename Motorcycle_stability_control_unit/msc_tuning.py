@@ -0,0 +1,279 @@
+import argparse
+import itertools
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from multiprocessing import shared_memory
+import numpy as np
+from MSC_prot import MSCController, performance_scores
+
+# MSCController settings that can be tuned, with their stock values
+CONTROLLER_PARAMETERS = {
+    'risk_threshold': 0.3,
+    'max_lean': 45.0,
+    'speed_weight': 0.3,
+    'lean_weight': 0.4,
+    'brake_lean_weight': 0.3,
+    'throttle_lean_weight': 0.2,
+}
+INPUTS = ('speed', 'lean_angle', 'throttle_input', 'brake_input')
+METRICS = ('safety_score', 'intervention_efficiency', 'interventions', 'high_risk_samples',
+           'max_risk', 'mean_risk', 'throttle_reduction', 'brake_reduction')
+
+# Ride profiles: (low, high) ranges each corner or ride draws from.
+# corner_length is in samples, corner_speed the fraction of cruise speed
+# kept at corner entry, trail_braking the chance of still braking into the
+# corner and exit_throttle the peak throttle when driving out of it.
+PROFILES = {
+    'sweepers': {'cruise': (70, 100), 'corners': (2, 4), 'corner_length': (60, 120), 'lean': (15, 30),
+                 'corner_speed': (0.8, 0.95), 'brake': (0.1, 0.3), 'trail_braking': 0.1,
+                 'exit_throttle': (35, 60)},
+    'twisties': {'cruise': (50, 80), 'corners': (4, 7), 'corner_length': (30, 60), 'lean': (20, 38),
+                 'corner_speed': (0.65, 0.85), 'brake': (0.3, 0.7), 'trail_braking': 0.4,
+                 'exit_throttle': (40, 80)},
+    'hairpins': {'cruise': (40, 65), 'corners': (3, 5), 'corner_length': (25, 45), 'lean': (30, 45),
+                 'corner_speed': (0.45, 0.65), 'brake': (0.6, 0.95), 'trail_braking': 0.6,
+                 'exit_throttle': (50, 90)},
+    'track': {'cruise': (90, 120), 'corners': (3, 6), 'corner_length': (30, 70), 'lean': (30, 45),
+              'corner_speed': (0.7, 0.9), 'brake': (0.7, 1.0), 'trail_braking': 0.5,
+              'exit_throttle': (70, 100)},
+}
+BRAKING_SAMPLES = 15                    # braking zone before each corner (1.5 s at 10 Hz)
+
+def build_scenario(rng, profile, steps=400):
+    """Rider inputs for one ride of the given profile, drawn from rng (an np.random.Generator)"""
+    spec = PROFILES[profile]
+    cruise = rng.uniform(*spec['cruise'])
+    speed = np.full(steps, cruise)
+    lean = np.zeros(steps)
+    throttle = np.full(steps, 30.0)
+    brake = np.zeros(steps)
+
+    # One corner per equal slot of the ride, each starting somewhere in its slot
+    n_corners = rng.integers(spec['corners'][0], spec['corners'][1] + 1)
+    slot = steps // n_corners
+    for k in range(n_corners):
+        length = min(int(rng.integers(*spec['corner_length'])), slot - BRAKING_SAMPLES)
+        if length < 4:
+            continue
+        start = k * slot + BRAKING_SAMPLES + int(rng.integers(0, slot - BRAKING_SAMPLES - length + 1))
+        apex = start + length // 2
+        peak = rng.uniform(*spec['lean']) * rng.choice((-1, 1))
+        lean[start:apex] = np.linspace(0, peak, apex - start)
+        lean[apex:start + length] = np.linspace(peak, 0, start + length - apex)
+
+        # Brake down to entry speed, sometimes still braking up to the apex
+        entry = cruise * rng.uniform(*spec['corner_speed'])
+        brake_end = apex if rng.random() < spec['trail_braking'] else start
+        brake[start - BRAKING_SAMPLES:brake_end] = rng.uniform(*spec['brake'])
+        speed[start - BRAKING_SAMPLES:start] = np.linspace(cruise, entry, BRAKING_SAMPLES)
+        speed[start:apex] = entry
+        # Drive out of it from the apex, back up to cruise speed
+        throttle[apex:start + length] = np.linspace(30, rng.uniform(*spec['exit_throttle']),
+                                                    start + length - apex)
+        speed[apex:start + length] = np.linspace(entry, cruise, start + length - apex)
+
+    # Rider noise, as in create_dynamic_scenario
+    speed = np.clip(speed + rng.normal(0, 1.5, steps), 10, 120)
+    lean = np.clip(lean + rng.normal(0, 2, steps), -45, 45)
+    throttle = np.clip(throttle + rng.normal(0, 10, steps), 0, 100)
+    brake = np.clip(brake + rng.normal(0, 0.05, steps), 0, 1)
+    return {'speed': speed, 'lean_angle': lean, 'throttle_input': throttle, 'brake_input': brake}
+
+def scenario_library(n, seed=0, steps=400, profiles=None):
+    """n rides cycling through profiles, as (4, n, steps) inputs in INPUTS order plus profile names.
+
+    Ride i is drawn from its own Generator seeded with (seed, i), so any ride
+    can be rebuilt alone and the library does not depend on n.
+    """
+    profiles = list(profiles or PROFILES)
+    inputs = np.empty((len(INPUTS), n, steps))
+    names = []
+    for i in range(n):
+        profile = profiles[i % len(profiles)]
+        ride = build_scenario(np.random.default_rng([seed, i]), profile, steps)
+        for j, name in enumerate(INPUTS):
+            inputs[j, i] = ride[name]
+        names.append(profile)
+    return inputs, names
+
+def scenario_metrics(inputs, outputs, dt=0.1):
+    """Per-ride metrics (arrays over axis 0) for rides evaluated together as 2-D arrays"""
+    risk = outputs['risk_level']
+    samples = risk.shape[1]
+    interventions = np.count_nonzero(outputs['msc_active'], axis=1)
+    high_risk_samples = np.count_nonzero(risk > 0.7, axis=1)
+    safety_score, intervention_efficiency = performance_scores(
+        high_risk_samples, interventions, samples, (samples - 1) * dt, dt)
+    speed, lean, throttle, brake = inputs
+    return {
+        'safety_score': safety_score,
+        'intervention_efficiency': intervention_efficiency,
+        'interventions': interventions,
+        'high_risk_samples': high_risk_samples,
+        'max_risk': risk.max(axis=1),
+        'mean_risk': risk.mean(axis=1),
+        'throttle_reduction': np.maximum(0, throttle - outputs['throttle_output']).sum(axis=1),
+        'brake_reduction': np.maximum(0, brake - outputs['brake_output']).sum(axis=1),
+    }
+
+# Set in each worker by _attach: the shared block and the inputs array viewing it
+_shared = None
+_inputs = None
+
+def _attach(name, shape):
+    global _shared, _inputs
+    _shared = shared_memory.SharedMemory(name=name)
+    _inputs = np.ndarray(shape, dtype=np.float64, buffer=_shared.buf)
+
+def evaluate_points(point_ids, names, points, dt=0.1):
+    """Worker entry point: every shared ride under each controller setting in points"""
+    results = []
+    for point_id, values in zip(point_ids, points):
+        controller = MSCController(**dict(zip(names, values)))
+        outputs = controller.evaluate(*_inputs, dt=dt)
+        results.append((point_id, scenario_metrics(_inputs, outputs, dt)))
+    return results
+
+def _create_tables(db, names):
+    params = ", ".join(f"{name} REAL" for name in names)
+    metrics = ", ".join(f"{name} REAL" for name in METRICS)
+    db.executescript(f"""
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE points (point INTEGER PRIMARY KEY, {params});
+        CREATE TABLE scenarios (scenario INTEGER PRIMARY KEY, profile TEXT);
+        CREATE TABLE results (point INTEGER, scenario INTEGER, {metrics},
+                              PRIMARY KEY (point, scenario));
+        CREATE VIEW summary AS
+            SELECT points.*, COUNT(*) AS rides,
+                   AVG(safety_score) AS safety_score, MIN(safety_score) AS worst_safety_score,
+                   AVG(intervention_efficiency) AS intervention_efficiency,
+                   AVG(max_risk) AS max_risk, AVG(mean_risk) AS mean_risk
+            FROM results JOIN points USING (point) GROUP BY point;
+        CREATE VIEW profile_summary AS
+            SELECT point, profile, COUNT(*) AS rides,
+                   AVG(safety_score) AS safety_score, AVG(intervention_efficiency) AS intervention_efficiency
+            FROM results JOIN scenarios USING (scenario) GROUP BY point, profile;
+    """)
+
+def run_tuning(db_path, names, points, scenarios=1000, seed=0, steps=400, dt=0.1,
+               profiles=None, workers=None, points_per_task=4, progress=None):
+    """Evaluate every controller setting in points on a shared scenario library.
+
+    The rides are built once and placed in shared memory, so workers read
+    them without a copy per task. Per-ride metrics go to the SQLite table
+    'results' (one row per setting and ride), with the views 'summary'
+    (per setting) and 'profile_summary' (per setting and profile) on top.
+    The database is written to a temporary file and moved into place at
+    the end. progress, if given, is called with (points_done, points_total).
+    """
+    unknown = set(names) - set(CONTROLLER_PARAMETERS)
+    if unknown:
+        raise ValueError(f"unknown parameters: {', '.join(sorted(unknown))}")
+    points = np.asarray(points, dtype=np.float64).reshape(-1, len(names))
+    start_time = time.perf_counter()
+    inputs, profile_names = scenario_library(scenarios, seed, steps, profiles)
+
+    tmp_path = db_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    db = sqlite3.connect(tmp_path)
+    _create_tables(db, names)
+    db.executemany("INSERT INTO meta VALUES (?, ?)", [
+        ('spec', json.dumps({'names': list(names), 'scenarios': scenarios, 'seed': seed, 'steps': steps,
+                             'dt': dt, 'profiles': sorted(set(profile_names))}))])
+    db.executemany(f"INSERT INTO points VALUES (?{', ?' * len(names)})",
+                   [(i, *values) for i, values in enumerate(points.tolist())])
+    db.executemany("INSERT INTO scenarios VALUES (?, ?)", enumerate(profile_names))
+    insert = f"INSERT INTO results VALUES (?, ?{', ?' * len(METRICS)})"
+
+    shared = shared_memory.SharedMemory(create=True, size=inputs.nbytes)
+    try:
+        np.ndarray(inputs.shape, dtype=np.float64, buffer=shared.buf)[:] = inputs
+        del inputs
+        workers = workers or os.cpu_count() or 1
+        tasks = (range(i, min(i + points_per_task, len(points)))
+                 for i in range(0, len(points), points_per_task))
+        done = 0
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                 initargs=(shared.name, (len(INPUTS), scenarios, steps))) as pool:
+            in_flight = set()
+            while True:
+                for ids in itertools.islice(tasks, max(0, 2 * workers - len(in_flight))):
+                    in_flight.add(pool.submit(evaluate_points, list(ids), names, points[ids.start:ids.stop].tolist(), dt))
+                if not in_flight:
+                    break
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    for point_id, metrics in future.result():
+                        columns = [metrics[name].tolist() for name in METRICS]
+                        db.executemany(insert, ((point_id, ride, *row) for ride, row in enumerate(zip(*columns))))
+                        done += 1
+                    db.commit()
+                    if progress:
+                        progress(done, len(points))
+    finally:
+        shared.close()
+        shared.unlink()
+    db.close()
+    os.replace(tmp_path, db_path)
+    return {
+        'db': db_path,
+        'points': len(points),
+        'scenarios': scenarios,
+        'seconds': time.perf_counter() - start_time,
+    }
+
+def parse_param(text):
+    """name=low:high:n (grid of n) or name=v1,v2,..."""
+    name, _, value = text.partition("=")
+    if name not in CONTROLLER_PARAMETERS or not value:
+        raise argparse.ArgumentTypeError(
+            f"expected one of {', '.join(CONTROLLER_PARAMETERS)} as name=value, got {text!r}")
+    if ":" in value:
+        parts = [float(v) for v in value.split(":")]
+        if len(parts) != 3:
+            raise argparse.ArgumentTypeError(f"bad range {value!r}; use low:high:n")
+        return name, np.linspace(parts[0], parts[1], int(parts[2])).tolist()
+    return name, [float(v) for v in value.split(",")]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune MSC controller settings over a library of simulated rides")
+    parser.add_argument("--db", default="msc_tuning.sqlite", help="SQLite results file (replaced)")
+    parser.add_argument("--param", action="append", type=parse_param, default=[],
+                        help="name=low:high:n or name=v1,v2,...; repeat per parameter")
+    parser.add_argument("--scenarios", type=int, default=1000)
+    parser.add_argument("--profiles", type=lambda text: text.split(","),
+                        help=f"comma-separated subset of {', '.join(PROFILES)}")
+    parser.add_argument("--steps", type=int, default=400, help="samples per ride (10 Hz)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=5, help="settings to print, best safety score first")
+    args = parser.parse_args(argv)
+    if not args.param:
+        parser.error("give at least one --param")
+    unknown = set(args.profiles or ()) - set(PROFILES)
+    if unknown:
+        parser.error(f"unknown profiles: {', '.join(sorted(unknown))}")
+    space = dict(args.param)
+    names = list(space)
+    points = list(itertools.product(*(space[name] for name in names)))
+
+    def progress(done, total):
+        print(f"\r{done}/{total} settings", end="", flush=True)
+
+    stats = run_tuning(args.db, names, points, scenarios=args.scenarios, seed=args.seed,
+                       steps=args.steps, profiles=args.profiles, workers=args.workers, progress=progress)
+    print()
+    print(json.dumps(stats, indent=2))
+    db = sqlite3.connect(args.db)
+    query = (f"SELECT {', '.join(names)}, safety_score, worst_safety_score, intervention_efficiency "
+             "FROM summary ORDER BY safety_score DESC, intervention_efficiency DESC LIMIT ?")
+    for row in db.execute(query, (args.top,)):
+        print(", ".join(f"{value:.3f}" for value in row))
+    db.close()
+
+if __name__ == "__main__":
+    main()
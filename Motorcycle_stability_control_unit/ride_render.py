@@ -0,0 +1,219 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from MSC_prot import MSCController, RideRenderer, create_dynamic_scenario
+
+FORMATS = ("auto", "mp4", "png", "npz")
+RIDE_INPUTS = ('speed', 'lean_angle', 'throttle_input', 'brake_input')
+
+def load_ride(path, dt=0.1):
+    """Scenario dict from an .npz of ride arrays; MSC outputs are computed if not stored"""
+    with np.load(path) as data:
+        ride = {name: data[name] for name in data.files}
+    missing = [name for name in RIDE_INPUTS if name not in ride]
+    if missing:
+        raise ValueError(f"{path} lacks {', '.join(missing)}")
+    if 'time' not in ride:
+        ride['time'] = np.arange(len(ride['speed'])) * dt
+    if 'risk_level' not in ride:
+        ride.update(MSCController().evaluate(*(ride[name] for name in RIDE_INPUTS), dt=dt))
+    return ride
+
+def rgb_frames(scenario, frames, dpi=100):
+    """RGB uint8 arrays for the given sample indices, drawn off-screen with Agg.
+
+    The static parts of the figure are drawn once; each frame restores them
+    and draws only the artists RideRenderer changes. The yielded array is a
+    view of the canvas buffer and is overwritten by the next frame.
+    """
+    fig = Figure(figsize=(15, 10), dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    renderer = RideRenderer(scenario, fig)
+    renderer.playback_text.set_visible(False)
+    for artist in renderer.render(0):
+        artist.set_animated(True)
+    canvas.draw()
+    background = canvas.copy_from_bbox(fig.bbox)
+    for frame in frames:
+        canvas.restore_region(background)
+        for artist in renderer.render(frame):
+            fig.draw_artist(artist)
+        yield np.asarray(canvas.buffer_rgba())[..., :3]
+
+def _frame_name(frame):
+    return f"frame_{frame:06d}"
+
+def _encoder_command(ffmpeg, width, height, fps, path):
+    # libx264 with yuv420p needs even dimensions, so pad odd ones by a pixel
+    return [ffmpeg, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", f"{fps:g}", "-i", "-",
+            "-an", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+            "-c:v", "libx264", "-pix_fmt", "yuv420p", "-crf", "23", path]
+
+def render_part(scenario, frames, fmt, target, dpi=100, fps=10.0, ffmpeg=None):
+    """Worker entry point: render one range of frames to target.
+
+    mp4 pipes raw RGB into an ffmpeg segment file, png writes one image per
+    frame into the target folder, and npz streams one array per frame into
+    a zip. Only one frame is held in memory at a time.
+    """
+    frames = list(frames)
+    if fmt == "mp4":
+        encoder = None
+        try:
+            for rgb in rgb_frames(scenario, frames, dpi):
+                if encoder is None:
+                    height, width = rgb.shape[:2]
+                    encoder = subprocess.Popen(_encoder_command(ffmpeg, width, height, fps, target),
+                                               stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+                encoder.stdin.write(rgb.tobytes())
+        finally:
+            if encoder is not None:
+                _, errors = encoder.communicate()
+                if encoder.returncode:
+                    raise RuntimeError(f"ffmpeg failed on {target}: {errors.decode(errors='replace').strip()}")
+    elif fmt == "png":
+        from matplotlib.image import imsave
+        for frame, rgb in zip(frames, rgb_frames(scenario, frames, dpi)):
+            imsave(os.path.join(target, _frame_name(frame) + ".png"), rgb)
+    else:
+        with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as archive:
+            for frame, rgb in zip(frames, rgb_frames(scenario, frames, dpi)):
+                with archive.open(_frame_name(frame) + ".npy", "w", force_zip64=True) as f:
+                    np.lib.format.write_array(f, np.ascontiguousarray(rgb))
+    return target, len(frames)
+
+def _merge(fmt, parts, out, ffmpeg):
+    """Join the parts of one ride in frame order"""
+    if fmt == "mp4":
+        listing = out + ".parts.txt"
+        with open(listing, "w") as f:
+            for part in parts:
+                f.write(f"file '{os.path.abspath(part)}'\n")
+        result = subprocess.run([ffmpeg, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+                                 "-i", listing, "-c", "copy", out], capture_output=True)
+        os.remove(listing)
+        if result.returncode:
+            raise RuntimeError(f"ffmpeg could not join {out}: {result.stderr.decode(errors='replace').strip()}")
+    elif fmt == "npz":
+        # Copy members across one frame at a time, so merging needs no more memory than rendering
+        tmp_path = out + ".tmp"
+        with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as merged:
+            for part in parts:
+                with zipfile.ZipFile(part) as archive:
+                    for name in archive.namelist():
+                        with archive.open(name) as src, merged.open(name, "w", force_zip64=True) as dst:
+                            shutil.copyfileobj(src, dst)
+        os.replace(tmp_path, out)
+
+def _output_path(out_dir, name, fmt):
+    if fmt == "mp4":
+        return os.path.join(out_dir, name + ".mp4")
+    if fmt == "npz":
+        return os.path.join(out_dir, name + "_frames.npz")
+    return os.path.join(out_dir, name + "_frames")
+
+def render_rides(rides, out_dir, fmt="auto", every=1, fps=None, dpi=100, workers=None,
+                 chunk_frames=None, ffmpeg=None, progress=None):
+    """Render every (name, scenario) ride to out_dir, splitting each across a process pool.
+
+    Each ride's frames (every `every`-th sample) are cut into contiguous
+    ranges of chunk_frames, by default one range per worker, and the parts
+    are merged in frame order once the last one is done. fmt 'auto' picks
+    mp4 when ffmpeg is on the PATH and a PNG sequence otherwise. fps
+    defaults to real time for the frames kept. progress, if given, is
+    called with (parts_done, parts_total). Returns the output paths.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    ffmpeg = ffmpeg or shutil.which("ffmpeg")
+    if fmt == "auto":
+        fmt = "mp4" if ffmpeg else "png"
+    if fmt == "mp4" and not ffmpeg:
+        raise RuntimeError("mp4 output needs ffmpeg; install it or use --format png/npz")
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(out_dir, exist_ok=True)
+
+    jobs = []
+    for name, scenario in rides:
+        times = scenario['time']
+        dt = float(times[1] - times[0]) if len(times) > 1 else 0.1
+        frames = range(0, len(times), every)
+        size = chunk_frames or max(1, -(-len(frames) // workers))
+        out = _output_path(out_dir, name, fmt)
+        parts_dir = os.path.join(out_dir, f".{name}.parts")
+        os.makedirs(out if fmt == "png" else parts_dir, exist_ok=True)
+        parts = []
+        for k, start in enumerate(range(0, len(frames), size)):
+            # PNG frames land in the output folder under their global index; nothing to merge
+            target = out if fmt == "png" else os.path.join(parts_dir, f"part_{k:04d}.{fmt}")
+            parts.append((frames[start:start + size], target))
+        jobs.append({'scenario': scenario, 'out': out, 'parts_dir': parts_dir, 'parts': parts,
+                     'fps': fps or 1 / (dt * every), 'pending': len(parts)})
+
+    total = sum(len(job['parts']) for job in jobs)
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        owner = {}
+        for job in jobs:
+            for frames, target in job['parts']:
+                future = pool.submit(render_part, job['scenario'], frames, fmt, target, dpi, job['fps'], ffmpeg)
+                owner[future] = job
+        in_flight = set(owner)
+        while in_flight:
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                future.result()
+                job = owner.pop(future)
+                job['pending'] -= 1
+                if not job['pending']:
+                    _merge(fmt, [target for _, target in job['parts']], job['out'], ffmpeg)
+                    shutil.rmtree(job['parts_dir'], ignore_errors=True)
+                done += 1
+                if progress:
+                    progress(done, total)
+    return [job['out'] for job in jobs]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render MSC ride views to video or frame files without a display")
+    parser.add_argument("rides", nargs="*", help=".npz files of ride arrays (speed, lean_angle, throttle_input, "
+                                                 "brake_input; time and MSC outputs optional)")
+    parser.add_argument("--seed", type=int, action="append", default=[],
+                        help="also render the built-in demo ride drawn with this seed; repeatable")
+    parser.add_argument("--out-dir", default="renders")
+    parser.add_argument("--format", choices=FORMATS, default="auto",
+                        help="mp4 needs ffmpeg; auto falls back to a PNG sequence without it")
+    parser.add_argument("--every", type=int, default=1, help="render every n-th sample (n x real time)")
+    parser.add_argument("--fps", type=float, help="output frame rate (default: real time)")
+    parser.add_argument("--dpi", type=int, default=100, help="100 gives 1500x1000 frames")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-frames", type=int, help="frames per worker task (default: split evenly)")
+    parser.add_argument("--ffmpeg", help="ffmpeg executable (default: from PATH)")
+    args = parser.parse_args(argv)
+    rides = [(os.path.splitext(os.path.basename(path))[0], load_ride(path)) for path in args.rides]
+    rides += [(f"demo_seed{seed}", create_dynamic_scenario(np.random.default_rng(seed))) for seed in args.seed]
+    if not rides:
+        parser.error("give ride files or --seed")
+
+    def progress(done, total):
+        print(f"\r{done}/{total} parts", end="", flush=True)
+
+    start = time.perf_counter()
+    outputs = render_rides(rides, args.out_dir, fmt=args.format, every=args.every, fps=args.fps, dpi=args.dpi,
+                           workers=args.workers, chunk_frames=args.chunk_frames, ffmpeg=args.ffmpeg,
+                           progress=progress)
+    print()
+    print(json.dumps({'outputs': outputs, 'seconds': time.perf_counter() - start}, indent=2))
+
+if __name__ == "__main__":
+    main()
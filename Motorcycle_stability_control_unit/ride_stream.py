@@ -0,0 +1,309 @@
+import argparse
+import itertools
+import json
+import os
+import numpy as np
+from MSC_prot import MSCController, performance_scores
+
+# Rider inputs the controller needs; a 'time' column is optional
+INPUT_COLUMNS = ('speed', 'lean_angle', 'throttle_input', 'brake_input')
+# Per-sample outputs written to the .npy file
+OUTPUT_DTYPE = np.dtype([
+    ('time', np.float64),
+    ('risk_level', np.float64),
+    ('throttle_output', np.float64),
+    ('brake_output', np.float64),
+    ('msc_active', np.bool_),
+    ('risk_rolling', np.float64),       # mean risk over the last `window` samples
+    ('active_rolling', np.float64),     # fraction of those samples with MSC active
+])
+CHUNK_ROWS = 65536
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+
+class NpyStreamWriter:
+    """Appends rows of one structured dtype to a .npy file of unknown final length.
+
+    The header is written with room to spare and rewritten with the real
+    row count by close(), so np.load (including mmap_mode='r') reads the
+    result like any other .npy file.
+    """
+
+    def __init__(self, path, dtype):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.rows = 0
+        self._f = open(path, "wb")
+        # Version 1.0 header padded to a 64-byte boundary, sized for a 20-digit row count
+        longest = len(NPY_MAGIC) + 2 + len(self._dict(10 ** 20)) + 1
+        self._header_size = -(-longest // 64) * 64
+        self._f.write(self._header(0))
+
+    def _dict(self, rows):
+        return repr({'descr': np.lib.format.dtype_to_descr(self.dtype),
+                     'fortran_order': False, 'shape': (rows,)})
+
+    def _header(self, rows):
+        length = self._header_size - len(NPY_MAGIC) - 2
+        text = self._dict(rows).ljust(length - 1) + "\n"
+        return NPY_MAGIC + length.to_bytes(2, "little") + text.encode("latin1")
+
+    def write(self, rows):
+        rows = np.ascontiguousarray(rows, dtype=self.dtype)
+        self._f.write(rows.tobytes())
+        self.rows += len(rows)
+
+    def close(self):
+        if self._f.closed:
+            return
+        self._f.seek(0)
+        self._f.write(self._header(self.rows))
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class RideStats:
+    """Running totals and the rolling window carried from one chunk to the next"""
+
+    def __init__(self, window=100):
+        if window < 1:
+            raise ValueError(f"window must be at least 1 sample, got {window}")
+        self.window = window
+        self.samples = 0
+        self.interventions = 0
+        self.episodes = 0                   # separate runs of MSC activity
+        self.high_risk = 0
+        self.medium_risk = 0
+        self.risk_sum = 0.0
+        self.max_risk = 0.0
+        self.throttle_reduction = 0.0
+        self.brake_reduction = 0.0
+        self.max_lean = 0.0
+        self.max_speed = 0.0
+        self.last_time = 0.0
+        self._was_active = False
+        self._tail_risk = np.empty(0)
+        self._tail_active = np.empty(0)
+
+    def update(self, chunk, out):
+        """Fold one evaluated chunk into the totals and fill its rolling columns"""
+        risk, active = out['risk_level'], out['msc_active']
+        n = len(risk)
+        self.samples += n
+        self.interventions += int(np.count_nonzero(active))
+        previous = np.concatenate(([self._was_active], active[:-1]))
+        self.episodes += int(np.count_nonzero(active & ~previous))
+        self.high_risk += int(np.count_nonzero(risk > 0.7))
+        self.medium_risk += int(np.count_nonzero(risk > 0.4))
+        self.risk_sum += float(risk.sum())
+        self.max_risk = max(self.max_risk, float(risk.max()))
+        self.throttle_reduction += float(np.maximum(0, chunk['throttle_input'] - out['throttle_output']).sum())
+        self.brake_reduction += float(np.maximum(0, chunk['brake_input'] - out['brake_output']).sum())
+        self.max_lean = max(self.max_lean, float(np.abs(chunk['lean_angle']).max()))
+        self.max_speed = max(self.max_speed, float(chunk['speed'].max()))
+        self.last_time = float(chunk['time'][-1])
+        self._was_active = bool(active[-1])
+
+        # Sums over the window via cumsum of (carried tail + chunk); the tail is
+        # at most window - 1 samples, so rounding never builds up across chunks
+        carried = len(self._tail_risk)
+        risk_ext = np.concatenate((self._tail_risk, risk))
+        active_ext = np.concatenate((self._tail_active, active))
+        ends = np.arange(carried + 1, carried + n + 1)
+        starts = np.maximum(ends - self.window, 0)
+        counts = np.minimum(self.samples - n + np.arange(1, n + 1), self.window)
+        risk_cs = np.concatenate(([0.0], np.cumsum(risk_ext)))
+        active_cs = np.concatenate(([0.0], np.cumsum(active_ext)))
+        out['risk_rolling'] = (risk_cs[ends] - risk_cs[starts]) / counts
+        out['active_rolling'] = (active_cs[ends] - active_cs[starts]) / counts
+        # A chunk shorter than the window keeps the whole buffer
+        keep = max(0, len(risk_ext) - (self.window - 1))
+        self._tail_risk = risk_ext[keep:]
+        self._tail_active = active_ext[keep:]
+
+    def summary(self, dt):
+        if not self.samples:
+            return {'samples': 0}
+        duration = self.last_time
+        if duration > 0:
+            safety_score, intervention_efficiency = performance_scores(
+                self.high_risk, self.interventions, self.samples, duration, dt)
+        else:
+            safety_score, intervention_efficiency = None, None
+        return {
+            'samples': self.samples,
+            'duration': duration,
+            'interventions': self.interventions,
+            'intervention_episodes': self.episodes,
+            'high_risk_samples': self.high_risk,
+            'medium_risk_samples': self.medium_risk,
+            'max_risk': self.max_risk,
+            'mean_risk': self.risk_sum / self.samples,
+            'throttle_reduction': self.throttle_reduction,
+            'brake_reduction': self.brake_reduction,
+            'max_lean': self.max_lean,
+            'max_speed': self.max_speed,
+            'safety_score': safety_score,
+            'intervention_efficiency': intervention_efficiency,
+        }
+
+def _column_map(names):
+    """Index of each input column (and 'time' if present) in a list of column names"""
+    missing = [name for name in INPUT_COLUMNS if name not in names]
+    if missing:
+        raise ValueError(f"missing columns {', '.join(missing)}; have {', '.join(names)}")
+    wanted = INPUT_COLUMNS + (('time',) if 'time' in names else ())
+    return {name: names.index(name) for name in wanted}
+
+def _with_time(chunk, start, dt):
+    if 'time' not in chunk:
+        chunk['time'] = (start + np.arange(len(chunk['speed']))) * dt
+    return chunk
+
+def csv_chunks(path, chunk_rows=CHUNK_ROWS, columns=None, delimiter=",", dt=0.1):
+    """Column dicts of up to chunk_rows rows from a CSV, read a chunk at a time.
+
+    The first line is taken as a header naming the columns unless columns
+    gives their order explicitly.
+    """
+    with open(path) as f:
+        if columns is None:
+            columns = [name.strip() for name in f.readline().split(delimiter)]
+        index = _column_map(list(columns))
+        start = 0
+        while True:
+            lines = list(itertools.islice(f, chunk_rows))
+            if not lines:
+                return
+            table = np.loadtxt(lines, delimiter=delimiter, ndmin=2)
+            yield _with_time({name: table[:, j] for name, j in index.items()}, start, dt)
+            start += len(table)
+
+def array_chunks(table, chunk_rows=CHUNK_ROWS, columns=None, dt=0.1):
+    """Column dicts from a (memory-mapped) structured or 2-D array, one slice at a time"""
+    if table.dtype.names:
+        index = _column_map(list(table.dtype.names))
+        get = lambda rows, name: rows[name]
+    else:
+        if columns is None:
+            raise ValueError("a plain 2-D array needs the column order (columns=...)")
+        index = _column_map(list(columns))
+        get = lambda rows, name: rows[:, index[name]]
+    for start in range(0, len(table), chunk_rows):
+        rows = table[start:start + chunk_rows]
+        # Only this slice is paged in and copied; the mapping itself stays on disk
+        yield _with_time({name: np.array(get(rows, name), dtype=np.float64) for name in index}, start, dt)
+
+def open_recording(path, chunk_rows=CHUNK_ROWS, columns=None, dtype="float32", dt=0.1):
+    """Chunk iterator for a .csv, .npy or raw little-endian binary recording"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".csv", ".txt"):
+        return csv_chunks(path, chunk_rows, columns, dt=dt)
+    if ext == ".npy":
+        return array_chunks(np.load(path, mmap_mode="r"), chunk_rows, columns, dt)
+    if columns is None:
+        raise ValueError("raw binary recordings need the column order (--columns)")
+    flat = np.memmap(path, dtype=np.dtype(dtype).newbyteorder("<"), mode="r")
+    # A recording cut off mid-row loses only the partial row
+    rows = len(flat) // len(columns)
+    return array_chunks(flat[:rows * len(columns)].reshape(rows, len(columns)), chunk_rows, columns, dt)
+
+def evaluate_stream(chunks, out_path, controller=None, window=100, dt=0.1):
+    """Run the MSC over every chunk, writing per-sample outputs to out_path (.npy).
+
+    Memory use is one chunk plus the rolling window, however long the
+    recording. Returns the ride summary.
+    """
+    controller = controller or MSCController()
+    stats = RideStats(window)
+    with NpyStreamWriter(out_path, OUTPUT_DTYPE) as writer:
+        for chunk in chunks:
+            if not len(chunk['speed']):
+                continue
+            out = controller.evaluate(chunk['speed'], chunk['lean_angle'],
+                                      chunk['throttle_input'], chunk['brake_input'], dt)
+            stats.update(chunk, out)
+            rows = np.empty(len(chunk['speed']), dtype=OUTPUT_DTYPE)
+            rows['time'] = chunk['time']
+            for name in OUTPUT_DTYPE.names[1:]:
+                rows[name] = out[name]
+            writer.write(rows)
+    return stats.summary(dt)
+
+def self_check(window=100, chunk_sizes=(1, 7, 50, 99, 100, 101, 4096)):
+    """Check that chunked evaluation of the demo ride matches a single chunk.
+
+    Chunk sizes below, at and above the window exercise the carried tail.
+    Rolling columns may differ only by float rounding of the window sums.
+    """
+    import tempfile
+    from MSC_prot import create_dynamic_scenario
+
+    ride = create_dynamic_scenario(np.random.default_rng(0))
+    table = np.empty(len(ride['time']), dtype=[(name, np.float64) for name in ('time',) + INPUT_COLUMNS])
+    for name in table.dtype.names:
+        table[name] = ride[name]
+    with tempfile.TemporaryDirectory() as folder:
+        reference_path = os.path.join(folder, "reference.npy")
+        reference_summary = evaluate_stream(array_chunks(table, len(table)), reference_path, window=window)
+        reference = np.load(reference_path)
+        for size in chunk_sizes:
+            path = os.path.join(folder, f"chunk_{size}.npy")
+            summary = evaluate_stream(array_chunks(table, size), path, window=window)
+            got = np.load(path)
+            for name in ('time', 'risk_level', 'throttle_output', 'brake_output', 'msc_active'):
+                if not np.array_equal(got[name], reference[name]):
+                    raise AssertionError(f"chunk_rows={size}: {name} differs from a single chunk")
+            for name in ('risk_rolling', 'active_rolling'):
+                if not np.allclose(got[name], reference[name], rtol=0, atol=1e-12):
+                    error = np.abs(got[name] - reference[name]).max()
+                    raise AssertionError(f"chunk_rows={size}: {name} off by up to {error:g}")
+            if summary['interventions'] != reference_summary['interventions'] or \
+                    summary['intervention_episodes'] != reference_summary['intervention_episodes']:
+                raise AssertionError(f"chunk_rows={size}: summary differs from a single chunk")
+    return list(chunk_sizes)
+
+def _write_atomic(path, text):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate the MSC over a ride recording of any length")
+    parser.add_argument("recording", nargs="?", help=".csv (with a header), .npy, or raw binary telemetry")
+    parser.add_argument("--out", help="per-sample output .npy (default: <recording>_msc.npy)")
+    parser.add_argument("--summary", help="also write the ride summary to this JSON file")
+    parser.add_argument("--columns", type=lambda text: text.split(","),
+                        help="column order for headerless or raw input, e.g. time,speed,lean_angle,...")
+    parser.add_argument("--dtype", default="float32", help="sample type of raw binary input")
+    parser.add_argument("--dt", type=float, default=0.1, help="sample period in s (10 Hz by default)")
+    parser.add_argument("--window", type=int, default=100, help="rolling statistics window in samples")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--self-check", action="store_true",
+                        help="check chunked against single-chunk results on the demo ride and exit")
+    args = parser.parse_args(argv)
+    if args.window < 1:
+        parser.error("--window must be at least 1")
+    if args.chunk_rows < 1:
+        parser.error("--chunk-rows must be at least 1")
+    if args.self_check:
+        sizes = self_check(args.window)
+        print(f"chunked output matches single-chunk output for chunk_rows {sizes} (window {args.window})")
+        return
+    if args.recording is None:
+        parser.error("give a recording")
+
+    out_path = args.out or os.path.splitext(args.recording)[0] + "_msc.npy"
+    chunks = open_recording(args.recording, args.chunk_rows, args.columns, args.dtype, args.dt)
+    summary = evaluate_stream(chunks, out_path, window=args.window, dt=args.dt)
+    text = json.dumps(summary, indent=2)
+    if args.summary:
+        _write_atomic(args.summary, text + "\n")
+    print(text)
+
+if __name__ == "__main__":
+    main()